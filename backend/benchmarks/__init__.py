@@ -0,0 +1 @@
+# Offline benchmarks for the PersonalLearn backend (run with `python -m backend.benchmarks.<name>`)
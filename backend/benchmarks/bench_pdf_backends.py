@@ -0,0 +1,185 @@
+"""Compare the PDF text extractors on a generated corpus and suggest a PDF_EXTRACTORS order.
+
+Run from the repo root: `python -m backend.benchmarks.bench_pdf_backends [--corpus DIR]`
+The bundled corpus is rendered with ReportLab from known text, so quality is measured as
+word recall (truth words found) and noise (output words not in the truth, e.g. words glued
+together or split apart). PDFs from `--corpus` have no truth and only report speed and
+empty pages. The suggested order lists the fastest extractor meeting `--min-recall` and
+`--max-noise` first; the rest follow as fallbacks for pages it returns empty.
+"""
+
+import argparse
+import glob
+import os
+import random
+import re
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from reportlab.lib.enums import TA_JUSTIFY
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.pdfgen import canvas
+from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate, Paragraph, SimpleDocTemplate
+
+from ..services.pdf_io import PDF_BACKENDS, PdfTextExtractor
+
+WORDS = (
+    "learning memory attention practice retrieval spacing feedback concept model example "
+    "structure energy cell reaction equation function variable theorem proof evidence "
+    "hypothèse énergie mémoire modèle système réaction élève cours chapitre résumé"
+).split()
+WORD = re.compile(r"\w+")
+
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+    return " ".join(words).capitalize() + "."
+
+
+def paragraphs(rng: random.Random, count: int) -> List[str]:
+    return [" ".join(sentence(rng) for _ in range(rng.randint(3, 6))) for _ in range(count)]
+
+
+def build_prose(path: str, rng: random.Random) -> List[str]:
+    """Justified paragraphs: stretched spaces are where extractors glue or split words."""
+    style = ParagraphStyle(
+        "Body", fontName="Helvetica", fontSize=11, leading=14, alignment=TA_JUSTIFY, spaceAfter=8
+    )
+    texts = paragraphs(rng, 120)
+    SimpleDocTemplate(path, pagesize=A4).build([Paragraph(text, style) for text in texts])
+    return texts
+
+
+def build_columns(path: str, rng: random.Random) -> List[str]:
+    """Two narrow columns per page; reading order matters for recall of whole sentences."""
+    width, height = A4
+    column = (width - 5 * cm) / 2
+    frames = [
+        Frame(2 * cm, 2 * cm, column, height - 4 * cm, id="left"),
+        Frame(3 * cm + column, 2 * cm, column, height - 4 * cm, id="right"),
+    ]
+    doc = BaseDocTemplate(path, pagesize=A4, pageTemplates=[PageTemplate("two", frames)])
+    style = ParagraphStyle("Column", fontName="Times-Roman", fontSize=9, leading=11)
+    texts = paragraphs(rng, 100)
+    doc.build([Paragraph(text, style) for text in texts])
+    return texts
+
+
+def build_dense(path: str, rng: random.Random) -> List[str]:
+    """Small-font lines drawn directly, plus shape-only pages standing in for scans."""
+    pdf = canvas.Canvas(path, pagesize=A4)
+    texts = []
+    for page in range(40):
+        if page % 8 == 7:
+            pdf.rect(2 * cm, 2 * cm, 15 * cm, 24 * cm, fill=1)
+        else:
+            pdf.setFont("Courier", 7)
+            for row in range(90):
+                line = sentence(rng)
+                pdf.drawString(1.5 * cm, 28 * cm - row * 0.28 * cm, line)
+                texts.append(line)
+        pdf.showPage()
+    pdf.save()
+    return texts
+
+
+CORPUS = {"prose": build_prose, "two-column": build_columns, "dense+blank": build_dense}
+
+
+def quality(truth: Counter, output: Counter) -> Tuple[float, float]:
+    """(recall, noise) over lower-cased word counts."""
+    found = sum((truth & output).values())
+    recall = found / max(1, sum(truth.values()))
+    noise = 1 - found / max(1, sum(output.values()))
+    return recall, noise
+
+
+def run(backend_name: str, path: str, repeat: int) -> Tuple[float, List[str]]:
+    """Best-of-`repeat` seconds to open and read every page with one extractor."""
+    best, pages = float("inf"), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extractor = PdfTextExtractor(path, [PDF_BACKENDS[backend_name]()])
+        pages = [extractor.page_text(i) for i in range(extractor.page_count())]
+        best = min(best, time.perf_counter() - start)
+    return best, pages
+
+
+def words(text: str) -> Counter:
+    return Counter(WORD.findall(text.lower()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", help="directory of extra PDFs (speed and empty pages only)")
+    parser.add_argument("--backends", nargs="+", default=sorted(PDF_BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-recall", type=float, default=0.98)
+    parser.add_argument("--max-noise", type=float, default=0.02)
+    args = parser.parse_args()
+
+    backends = [name for name in args.backends if PDF_BACKENDS[name].installed()]
+    missing = sorted(set(args.backends) - set(backends))
+    if missing:
+        print(f"not installed, skipped: {', '.join(missing)}")
+
+    totals: Dict[str, Dict[str, float]] = {
+        name: {"seconds": 0.0, "pages": 0, "recall": 1.0, "noise": 0.0} for name in backends
+    }
+    print(
+        f"{'document':<16} {'extractor':<10} {'pages/s':>9} {'empty':>6} "
+        f"{'recall':>7} {'noise':>6}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        documents: List[Tuple[str, str, Optional[Counter]]] = []
+        for name, build in CORPUS.items():
+            path = os.path.join(tmp, f"{name}.pdf")
+            documents.append((name, path, words(" ".join(build(path, random.Random(name))))))
+        if args.corpus:
+            for path in sorted(glob.glob(os.path.join(args.corpus, "*.pdf"))):
+                documents.append((os.path.basename(path)[:16], path, None))
+
+        for name, path, truth in documents:
+            for backend in backends:
+                seconds, pages = run(backend, path, args.repeat)
+                empty = sum(1 for page in pages if not page.strip())
+                total = totals[backend]
+                total["seconds"] += seconds
+                total["pages"] += len(pages)
+                cells = ["", ""]
+                if truth is not None:
+                    recall, noise = quality(truth, words(" ".join(pages)))
+                    total["recall"] = min(total["recall"], recall)
+                    total["noise"] = max(total["noise"], noise)
+                    cells = [f"{recall:.3f}", f"{noise:.3f}"]
+                print(
+                    f"{name:<16} {backend:<10} {len(pages) / seconds:>9.1f} {empty:>6} "
+                    f"{cells[0]:>7} {cells[1]:>6}"
+                )
+
+    print()
+    print(f"{'extractor':<10} {'pages/s':>9} {'min recall':>11} {'max noise':>10}")
+    ranked = sorted(backends, key=lambda name: totals[name]["seconds"] / totals[name]["pages"])
+    for name in ranked:
+        total = totals[name]
+        print(
+            f"{name:<10} {total['pages'] / total['seconds']:>9.1f} "
+            f"{total['recall']:>11.3f} {total['noise']:>10.3f}"
+        )
+    acceptable = [
+        name
+        for name in ranked
+        if totals[name]["recall"] >= args.min_recall and totals[name]["noise"] <= args.max_noise
+    ]
+    order = acceptable + [name for name in ranked if name not in acceptable]
+    if not acceptable:
+        print("no extractor met the quality bar; ordered by speed only")
+    print(f"\nsuggested: PDF_EXTRACTORS={','.join(order)}")
+
+
+if __name__ == "__main__":
+    main()
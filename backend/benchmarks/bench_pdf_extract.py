@@ -0,0 +1,83 @@
+"""Compare PDF text extraction strategies on synthetic 10/100/1000-page documents.
+
+Run from the repo root: `python -m backend.benchmarks.bench_pdf_extract [--pages 10 100 1000]`
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import PyPDF2
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from ..services.course_generator import EXTRACTION_MAX_CHARS
+from ..services.pdf_io import read_pdf
+from ..services.pipeline import iter_pdf_pages_async
+from ..services.workers import shutdown_workers
+
+LINE = "Adaptive learning restructures dense material into units sized for each learner."
+
+
+def build_pdf(path: str, pages: int) -> None:
+    pdf = canvas.Canvas(path, pagesize=A4)
+    for page in range(pages):
+        pdf.drawString(72, 800, f"Chapter {page // 10 + 1} - page {page + 1}")
+        for row in range(45):
+            pdf.drawString(72, 770 - row * 15, LINE)
+        pdf.showPage()
+    pdf.save()
+
+
+def quadratic_baseline(path: str) -> str:
+    """The original read_pdf loop, kept here as the reference point."""
+    reader = PyPDF2.PdfReader(path)
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() or ""
+    return text
+
+
+async def collect(path: str, max_chars=None) -> int:
+    chars = 0
+    async for page in iter_pdf_pages_async(path, max_pages=10**6, max_chars=max_chars):
+        chars += len(page)
+    return chars
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    stop_at = EXTRACTION_MAX_CHARS
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'pages':>6} {'strategy':<28} {'seconds':>9} {'chars':>10}")
+        for pages in args.pages:
+            path = os.path.join(tmp, f"doc_{pages}.pdf")
+            build_pdf(path, pages)
+            rows = [
+                ("baseline (text +=)", *timed(quadratic_baseline, path)),
+                ("read_pdf (join)", *timed(read_pdf, path)),
+                ("parallel, full document", *timed(lambda: asyncio.run(collect(path)))),
+                (
+                    f"parallel, stop at {stop_at} chars",
+                    *timed(lambda: asyncio.run(collect(path, stop_at))),
+                ),
+            ]
+            for name, seconds, result in rows:
+                chars = result if isinstance(result, int) else len(result)
+                print(f"{pages:>6} {name:<28} {seconds:>9.3f} {chars:>10}")
+    shutdown_workers()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Time course PDF rendering for 4/7/10-unit courses, per-render styles vs the shared renderer.
+
+Run from the repo root: `python -m backend.benchmarks.bench_render [--repeat 20] [--max-ms 400]`
+Sharing the styles saves only the stylesheet build, which is within noise next to paragraph
+layout; the "saved" column shows that. `--max-ms` exits non-zero when the shared renderer's
+median exceeds the budget. The pytest-benchmark suite in backend/tests/test_render_benchmark.py
+times the same courses and can compare runs against a saved baseline.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+from ..services.pdf_io import CoursePdfRenderer, get_pdf_renderer
+
+PARAGRAPH = (
+    "Spaced practice spreads study sessions over time so each review lands just before the "
+    "learner would otherwise forget, which strengthens recall far more than massed repetition."
+)
+
+
+def sample_course(units: int) -> dict:
+    return {
+        "title": "Foundations of Adaptive Learning",
+        "level": "Intermediate",
+        "description": PARAGRAPH,
+        "units": [
+            {
+                "title": f"Unit topic {index + 1}",
+                "objectives": [f"Explain idea {n} of this unit" for n in range(1, 4)],
+                "content": "\n".join(PARAGRAPH for _ in range(6)),
+                "quiz_questions": [
+                    {"question": f"What does principle {n} imply?", "answer": "It depends."}
+                    for n in range(1, 4)
+                ],
+            }
+            for index in range(units)
+        ],
+    }
+
+
+def fresh_render(course: dict) -> bytes:
+    """Previous behaviour: a new stylesheet and styles for every render."""
+    return CoursePdfRenderer().render_to_bytes(course)
+
+
+def cached_render(course: dict) -> bytes:
+    return get_pdf_renderer().render_to_bytes(course)
+
+
+def median_ms(fn, course: dict, repeat: int) -> float:
+    fn(course)  # warm fonts and imports
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(course)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, nargs="+", default=[4, 7, 10])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    over_budget = False
+    print(f"{'units':>5} {'fresh styles ms':>16} {'cached ms':>10} {'saved':>7} {'kB':>6}")
+    for units in args.units:
+        course = sample_course(units)
+        fresh = median_ms(fresh_render, course, args.repeat)
+        cached = median_ms(cached_render, course, args.repeat)
+        size_kb = len(cached_render(course)) / 1024
+        print(
+            f"{units:>5} {fresh:>16.1f} {cached:>10.1f} "
+            f"{(fresh - cached) / fresh:>6.1%} {size_kb:>6.1f}"
+        )
+        if args.max_ms is not None and cached > args.max_ms:
+            over_budget = True
+    if over_budget:
+        print(f"cached render exceeded {args.max_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Measure response compression, JSON encoding and conditional requests on a live server.
+
+Run from the repo root: `python -m backend.benchmarks.bench_responses [--link-mbps 10]`
+Stored courses are built from the prose of backend/README.md, so their compression ratio
+is close to a real course's (the fake provider's padding would flatter it). For /quiz,
+GET /courses/{id} and a listing page with full course JSON, every encoding reports wire
+bytes, median loopback latency and the transfer time at `--link-mbps`; the last row is a
+revalidation answered with 304.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import statistics
+import tempfile
+import time
+
+import httpx
+from starlette.responses import JSONResponse
+
+from ..services.course_store import CourseStore
+from ..services.responses import ENCODINGS, FastJSONResponse
+from .load_test import free_port, start_server, wait_ready
+
+README = os.path.join(os.path.dirname(os.path.dirname(__file__)), "README.md")
+
+
+def sample_course(units: int, seed: int) -> dict:
+    with open(README, encoding="utf-8") as readme:
+        paragraphs = [p.strip() for p in readme.read().split("\n") if len(p.strip()) > 80]
+
+    def pick(count: int, offset: int) -> list:
+        return [paragraphs[(seed + offset + i) % len(paragraphs)] for i in range(count)]
+
+    return {
+        "title": f"Operating PersonalLearn {seed}",
+        "level": "Intermediate",
+        "description": pick(1, 0)[0],
+        "language": "en",
+        "units": [
+            {
+                "title": f"Unit {index + 1}",
+                "content": "\n".join(pick(6, index * 6)),
+                "objectives": [p[:90] for p in pick(3, index)],
+                "quiz_questions": [
+                    {
+                        "question": p[:120] + "?",
+                        "choices": [p[:30] for p in pick(4, index + n)],
+                        "correct_choice": n % 4,
+                        "explanation": p,
+                    }
+                    for n, p in enumerate(pick(3, index * 3))
+                ],
+            }
+            for index in range(units)
+        ],
+    }
+
+
+def encode_ms(response_class, content, repeat: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        response_class(content)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+async def measure(client: httpx.AsyncClient, path: str, headers: dict, repeat: int):
+    timings, response = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        timings.append(time.perf_counter() - start)
+    return response, statistics.median(timings) * 1000
+
+
+async def run(args, port: int) -> None:
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        await wait_ready(client)
+        paths = {
+            "/quiz": "/quiz",
+            "/courses/{id}": f"/courses/{args.course_id}",
+            "/courses?fields=": "/courses?owner=bench&limit=10&fields=id,title,course",
+        }
+        print(
+            f"{'endpoint':<17} {'encoding':<9} {'status':>6} {'bytes':>8} {'saved':>6} "
+            f"{'loopback ms':>12} {f'@{args.link_mbps:g}Mbps ms':>13}"
+        )
+        for name, path in paths.items():
+            identity_bytes, etag = None, None
+            for encoding in ("identity", *ENCODINGS, "304"):
+                headers = {"Accept-Encoding": "identity" if encoding == "304" else encoding}
+                if encoding == "304":
+                    if etag is None:
+                        continue
+                    headers["If-None-Match"] = etag
+                response, median = await measure(client, path, headers, args.repeat)
+                wire = response.num_bytes_downloaded
+                identity_bytes = identity_bytes or wire
+                etag = etag or response.headers.get("etag")
+                transfer = wire * 8 / (args.link_mbps * 1e6) * 1000
+                saved = 1 - wire / identity_bytes
+                print(
+                    f"{name:<17} {encoding:<9} {response.status_code:>6} {wire:>8} "
+                    f"{saved:>6.0%} {median:>12.2f} {median + transfer:>13.2f}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--link-mbps", type=float, default=10.0)
+    args = parser.parse_args()
+
+    course = sample_course(args.units, 0)
+    print(
+        f"encode one {len(json.dumps(course)) // 1024} KiB course: "
+        f"json {encode_ms(JSONResponse, course):.3f} ms, "
+        f"FastJSONResponse {encode_ms(FastJSONResponse, course):.3f} ms\n"
+    )
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # start_server points the server at this same file inside cache_dir.
+        store = CourseStore(os.path.join(cache_dir, "courses.sqlite3"))
+        for seed in range(10):
+            sample = sample_course(args.units, seed)
+            course_id = hashlib.sha256(json.dumps(sample).encode("utf-8")).hexdigest()
+            store.save(course_id, sample, owner="bench")
+            args.course_id = course_id
+        port = free_port()
+        server = start_server(port, 1, 0.0, 0, cache_dir)
+        try:
+            asyncio.run(run(args, port))
+        finally:
+            server.send_signal(signal.SIGINT)
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Offline load test: a uvicorn server on the fake LLM provider driven by a mixed request profile.
+
+Run from the repo root:
+    python -m backend.benchmarks.load_test [--workers 1] [--concurrency 8 32] [--requests 400]
+        [--llm-latency 0.5] [--unit-chars 2000]
+
+Each concurrency level reports throughput, p50/p95/p99 latency per endpoint and the RSS of
+every server process. No API key or network access is needed.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+# Share of requests per endpoint, roughly what a cohort going through the app sends.
+PROFILE = {"quiz": 0.3, "profile": 0.3, "course": 0.25, "course_pdf": 0.15}
+LEVELS = [("Beginner", 10), ("Intermediate", 7), ("Advanced", 4)]
+PARAGRAPH = "Retrieval practice strengthens memory more than rereading the same material. "
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int, llm_latency: float, unit_chars: int, cache_dir: str):
+    env = {
+        **os.environ,
+        "LLM_PROVIDERS": "fake",
+        "LLM_FAKE_LATENCY_SECONDS": str(llm_latency),
+        "LLM_FAKE_UNIT_CHARS": str(unit_chars),
+        "COURSE_CACHE_BACKEND": "none",
+        "ARTIFACT_DIR": os.path.join(cache_dir, "artifacts"),
+        "DOCUMENT_CACHE_DIR": os.path.join(cache_dir, "documents"),
+        "COURSE_STORE_PATH": os.path.join(cache_dir, "courses.sqlite3"),
+    }
+    command = [
+        sys.executable, "-m", "uvicorn", "backend.main:app",
+        "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, env=env)
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready.")
+
+
+def process_tree(root_pid: int) -> List[int]:
+    """The server plus every descendant: uvicorn workers and their PDF pool processes."""
+    pids, index = [root_pid], 0
+    while index < len(pids):
+        pid = pids[index]
+        try:
+            with open(f"/proc/{pid}/task/{pid}/children") as children:
+                pids += [int(child) for child in children.read().split()]
+        except OSError:
+            pass
+        index += 1
+    return pids
+
+
+def rss_by_process(root_pid: int) -> Dict[int, int]:
+    """Resident memory in KiB of every server process (Linux /proc)."""
+    rss = {}
+    for pid in process_tree(root_pid):
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        rss[pid] = int(line.split()[1])
+        except OSError:
+            continue
+    return rss
+
+
+async def send(client: httpx.AsyncClient, kind: str, rng: random.Random) -> int:
+    level, units = rng.choice(LEVELS)
+    # Unique text per request so every course call reaches the (fake) model.
+    text = f"Document {rng.random()}\n" + PARAGRAPH * 40
+    form = {"course_title": "Load test", "level": level, "units": str(units), "pdf_text": text}
+    if kind == "quiz":
+        response = await client.get("/quiz")
+    elif kind == "profile":
+        payload = {"score": rng.randint(0, 5), "duration_seconds": rng.uniform(5, 120)}
+        response = await client.post("/profile", json=payload)
+    elif kind == "course":
+        response = await client.post("/course", data=form)
+    else:
+        response = await client.post("/course/pdf", data=form)
+    return response.status_code
+
+
+async def run_level(client, concurrency: int, total: int, seed: int):
+    rng = random.Random(seed)
+    kinds = rng.choices(list(PROFILE), weights=list(PROFILE.values()), k=total)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for kind in kinds:
+        queue.put_nowait(kind)
+
+    async def user():
+        nonlocal errors
+        while not queue.empty():
+            kind = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                status = await send(client, kind, rng)
+            except httpx.HTTPError:
+                status = 0
+            latencies[kind].append(time.perf_counter() - start)
+            errors += status != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(concurrency, elapsed, latencies, errors, rss) -> None:
+    total = sum(len(samples) for samples in latencies.values())
+    print(
+        f"\nconcurrency {concurrency}: {total} requests in {elapsed:.1f}s "
+        f"= {total / elapsed:.1f} req/s, {errors} errors"
+    )
+    print(
+        f"  {'endpoint':<11} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'mean ms':>8}"
+    )
+    for kind in PROFILE:
+        samples = latencies.get(kind)
+        if not samples:
+            continue
+        print(
+            f"  {kind:<11} {len(samples):>6} {percentile(samples, 0.5) * 1000:>8.0f} "
+            f"{percentile(samples, 0.95) * 1000:>8.0f} {percentile(samples, 0.99) * 1000:>8.0f} "
+            f"{statistics.mean(samples) * 1000:>8.0f}"
+        )
+    sizes = ", ".join(f"{pid}={kib / 1024:.0f}" for pid, kib in rss.items())
+    print(f"  RSS MiB per process: {sizes} (total {sum(rss.values()) / 1024:.0f})")
+
+
+async def main_async(args) -> None:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        server = start_server(port, args.workers, args.llm_latency, args.unit_chars, cache_dir)
+        try:
+            limits = httpx.Limits(max_connections=max(args.concurrency) + 8)
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", timeout=300, limits=limits
+            ) as client:
+                await wait_ready(client)
+                for seed, concurrency in enumerate(args.concurrency):
+                    elapsed, latencies, errors = await run_level(
+                        client, concurrency, args.requests, seed
+                    )
+                    report(concurrency, elapsed, latencies, errors, rss_by_process(server.pid))
+        finally:
+            server.send_signal(signal.SIGINT)
+            server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--requests", type=int, default=400, help="requests per concurrency level")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fake model latency (s)")
+    parser.add_argument("--unit-chars", type=int, default=2000, help="fake unit content size")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,136 @@ from dotenv import load_dotenv
 # Load .env when the module is imported so local development picks up keys.
 load_dotenv()
 
+
+def env_flag(name: str, default: bool) -> bool:
+    """Read a boolean switch such as CHUNKED_GENERATION=false from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 # Central place for Gemini settings so other modules can import without reconfiguring.
 MODEL_NAME = "gemini-2.5-flash"
 
+# Course cache: "memory" (per-process LRU), "sqlite" (shared by all workers) or "none".
+COURSE_CACHE_BACKEND = os.getenv("COURSE_CACHE_BACKEND", "memory").strip().lower()
+COURSE_CACHE_TTL_SECONDS = float(os.getenv("COURSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+COURSE_CACHE_MAX_ENTRIES = int(os.getenv("COURSE_CACHE_MAX_ENTRIES", "256"))
+COURSE_CACHE_MAX_BYTES = int(os.getenv("COURSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+COURSE_CACHE_PATH = os.getenv("COURSE_CACHE_PATH", ".cache/course_cache.sqlite3")
+
+# Concurrency limits: PDF parsing/rendering runs on a process pool, Gemini calls are async.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Upload limits and page-parallel extraction (pages per process-pool task).
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "1000"))
+PDF_PAGE_BATCH = int(os.getenv("PDF_PAGE_BATCH", "25"))
+
+# PDF text extractors in order of preference; names missing from the environment are skipped.
+# The first installed one reads every page, the others only re-read pages it returned empty.
+# `python -m backend.benchmarks.bench_pdf_backends` measures them and suggests an order.
+PDF_EXTRACTORS = [
+    name.strip().lower()
+    for name in os.getenv("PDF_EXTRACTORS", "pypdfium2,pypdf2,pypdf").split(",")
+    if name.strip()
+]
+
+# Extracted-text cache keyed by the SHA-256 of the uploaded PDF (compressed files on disk).
+DOCUMENT_CACHE_DIR = os.getenv("DOCUMENT_CACHE_DIR", ".cache/documents")
+DOCUMENT_CACHE_MEMORY_ENTRIES = int(os.getenv("DOCUMENT_CACHE_MEMORY_ENTRIES", "32"))
+DOCUMENT_CACHE_MAX_FILES = int(os.getenv("DOCUMENT_CACHE_MAX_FILES", "1000"))
+
+# Rendered course PDFs stored once under the SHA-256 of the course JSON (GET /course/{id}/pdf).
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", ".cache/artifacts")
+ARTIFACT_MAX_COURSES = int(os.getenv("ARTIFACT_MAX_COURSES", "500"))
+
+# Every generated course is recorded here for GET /courses (SQLite, shared by all workers).
+COURSE_STORE_PATH = os.getenv("COURSE_STORE_PATH", ".cache/courses.sqlite3")
+
+# JSON/text responses of at least COMPRESSION_MIN_BYTES are sent brotli- (when installed) or
+# gzip-compressed; /quiz may be cached by clients for QUIZ_MAX_AGE_SECONDS.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+QUIZ_MAX_AGE_SECONDS = int(os.getenv("QUIZ_MAX_AGE_SECONDS", "3600"))
+
+# Source text in a single prompt is normalized and packed into this many tokens (the old
+# 25000-character cut at ~4 characters per token).
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+
+# Long documents: above CHUNKED_GENERATION_MIN_CHARS the text is split into chunks of at most
+# CHUNK_MAX_CHARS that are outlined in parallel, then units are generated per outline segment.
+CHUNKED_GENERATION = env_flag("CHUNKED_GENERATION", True)
+CHUNKED_GENERATION_MIN_CHARS = int(os.getenv("CHUNKED_GENERATION_MIN_CHARS", "25000"))
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "12000"))
+
+# Per-unit prompts (parallel and chunked generation) carry the RETRIEVAL_TOP_K passages of at
+# most RETRIEVAL_PASSAGE_CHARS that best match the unit's brief (BM25 over the whole
+# document) instead of the packed document.
+PASSAGE_RETRIEVAL = env_flag("PASSAGE_RETRIEVAL", True)
+RETRIEVAL_PASSAGE_CHARS = int(os.getenv("RETRIEVAL_PASSAGE_CHARS", "1200"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "6"))
+
+# "single": one prompt produces the whole course. "parallel": a short outline call fixes unit
+# titles/objectives, then each unit is generated concurrently and retried on its own.
+GENERATION_MODE = os.getenv("GENERATION_MODE", "single").strip().lower()
+UNIT_MAX_ATTEMPTS = int(os.getenv("UNIT_MAX_ATTEMPTS", "3"))
+
+# Multi-level generation: one canonical CANONICAL_UNITS-unit course per document; courses
+# with fewer units are derived from it by merging neighbouring units instead of new LLM calls.
+MULTI_LEVEL_GENERATION = env_flag("MULTI_LEVEL_GENERATION", False)
+CANONICAL_UNITS = int(os.getenv("CANONICAL_UNITS", "10"))
+
+# Background course jobs (POST /jobs/course): worker count, queue bound and result retention.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", "200"))
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+# Batch course generation (POST /batches): worker count, documents x profiles per batch and
+# the bound on items queued across all batches (served round-robin per batch).
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "200"))
+BATCH_QUEUE_SIZE = int(os.getenv("BATCH_QUEUE_SIZE", "1000"))
+BATCH_RETENTION = int(os.getenv("BATCH_RETENTION", "50"))
+
+
+# Gemini client: quota-aware rate limiting, retries on 429/503 and a per-request timeout.
+# LLM_REQUESTS_PER_MINUTE=0 disables the token bucket.
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_BURST = int(os.getenv("LLM_BURST", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "30"))
+LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "120"))
+
+# LLM routing: providers in order of preference ("gemini", "mistral", "fake" for local runs).
+# A request still running after the hedge deadline is raced against the next provider; the
+# deadline is the primary's rolling p95 once known, never below LLM_HEDGE_AFTER_SECONDS (0 = off).
+LLM_PROVIDERS = [
+    name.strip().lower() for name in os.getenv("LLM_PROVIDERS", "gemini").split(",") if name.strip()
+]
+MISTRAL_MODEL_NAME = os.getenv("MISTRAL_MODEL_NAME", "mistral-large-latest")
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "30"))
+LLM_ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "100"))
+LLM_ROUTER_MAX_ERROR_RATE = float(os.getenv("LLM_ROUTER_MAX_ERROR_RATE", "0.5"))
+LLM_FAKE_LATENCY_SECONDS = float(os.getenv("LLM_FAKE_LATENCY_SECONDS", "0.05"))
+LLM_FAKE_UNIT_CHARS = int(os.getenv("LLM_FAKE_UNIT_CHARS", "0"))
+
+_genai_configured = False
+
 
 def configure_genai():
-    """Configure the Gemini SDK with the API key from environment."""
+    """Configure the Gemini SDK with the API key from environment (once per process)."""
+    global _genai_configured
+    if _genai_configured:
+        return
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY environment variable is required.")
     genai.configure(api_key=api_key)
+    _genai_configured = True
+
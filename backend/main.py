@@ -1,22 +1,76 @@
 import base64
-import io
+import hashlib
+import json
 import os
 import re
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import List, Optional
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from pydantic import TypeAdapter, ValidationError
+
+from .config import BATCH_MAX_ITEMS, QUIZ_MAX_AGE_SECONDS
 from .data import QUESTIONS
-from .schemas import CourseResponse, ProfileRequest, ProfileResponse
-from .services.course_generator import generate_course_from_pdf
-from .services.pdf_io import read_pdf, render_course_pdf_to_bytes
+from .schemas import BatchProfile, CourseResponse, ProfileRequest, ProfileResponse
+from .services.artifact_store import course_pdf_url, get_artifact_store
+from .services.batches import CourseBatch, batch_runner, iter_batch_zip
+from .services.course_cache import get_course_cache
+from .services.course_store import FIELDS, SUMMARY_FIELDS, get_course_store, parse_fields
+from .services.jobs import CourseJob, job_runner
+from .services.llm_router import get_llm_router
+from .services.passage_index import retrieval_stats
+from .services.responses import (
+    CompressionMiddleware,
+    FastJSONResponse,
+    compression_stats,
+    matching_etag,
+)
+from .services.pdf_io import DocumentTooLarge
+from .services.course_generator import parse_stats
+from .services.document_cache import get_document_cache
+from .services.gemini_client import LLMUnavailable, get_gemini_client
+from .services.pipeline import (
+    CourseSource,
+    DocumentNotFound,
+    course_pdf_path,
+    generation_flight,
+    extract_text,
+    load_document_pages,
+    generate_course,
+    spool_upload,
+    save_course,
+    source_document_id,
+    store_course_pdf,
+    stream_course,
+)
+from .services.telemetry import MetricsMiddleware, render_metrics, stage
+from .services.text_prep import document_title, prep_stats
+from .services.workers import run_cpu_bound, shutdown_workers, worker_stats
+
+# How often an idle SSE stream sends a keep-alive comment so proxies keep it open.
+SSE_KEEPALIVE_SECONDS = 15
+# Course PDFs and stored courses are addressed by a content hash, so they never change.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    job_runner.start()
+    batch_runner.start()
+    yield
+    await batch_runner.stop()
+    await job_runner.stop()
+    shutdown_workers()
+
 
 app = FastAPI(
     title="PersonalLearn Backend",
     description="API surface that mirrors the Streamlit backend features.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Allow the frontend (Next.js/Streamlit) to talk to this API locally without CORS failures.
@@ -29,6 +83,8 @@ _default_origins = [
 _env_origins = os.getenv("CORS_ALLOW_ORIGINS", "")
 _origins = [origin.strip() for origin in _env_origins.split(",") if origin.strip()] or _default_origins
 
+# Innermost of the three, so the metrics below count the compressed bytes actually sent.
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_origins,
@@ -36,6 +92,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 
@@ -58,10 +115,20 @@ def healthcheck():
     return {"status": "ok"}
 
 
+# The questions are static: rendered once, with a validator derived from the bytes.
+_QUIZ_BODY = FastJSONResponse({"questions": QUESTIONS}).body
+_QUIZ_ETAG = f'"{hashlib.sha256(_QUIZ_BODY).hexdigest()[:32]}"'
+
+
 @app.get("/quiz")
-def get_quiz():
+def get_quiz(request: Request):
     """Expose the calibration questions so the frontend can stay in sync."""
-    return {"questions": QUESTIONS}
+    return _cached_response(
+        request,
+        _QUIZ_ETAG,
+        f"public, max-age={QUIZ_MAX_AGE_SECONDS}",
+        lambda: Response(_QUIZ_BODY, media_type="application/json"),
+    )
 
 
 @app.post("/profile", response_model=ProfileResponse)
@@ -69,32 +136,158 @@ def get_profile(payload: ProfileRequest):
     return compute_profile(payload.score, payload.duration_seconds)
 
 
+@app.get("/stats")
+def get_stats():
+    """Expose cache counters and worker queue depths for capacity planning."""
+    return {
+        "course_cache": get_course_cache().stats(),
+        "workers": worker_stats(),
+        "jobs": job_runner.stats(),
+        "batches": batch_runner.stats(),
+        "document_cache": get_document_cache().stats(),
+        "artifacts": get_artifact_store().stats(),
+        "course_store": get_course_store().stats(),
+        "gemini": get_gemini_client().stats(),
+        "llm": get_llm_router().stats(),
+        "coalescing": generation_flight.stats(),
+        "parsing": parse_stats.stats(),
+        "text_prep": prep_stats.stats(),
+        "retrieval": retrieval_stats.stats(),
+        "compression": compression_stats.stats(),
+    }
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus exposition: per-stage and LLM latency, tokens, bytes and HTTP timings."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
+async def _document_summary(document_id: str, pages) -> dict:
+    return {
+        "document_id": document_id,
+        # The title comes from the normalized text, which takes a full pass over the pages.
+        "title": await run_cpu_bound(document_title, pages),
+        "pages": len(pages),
+        "chars": sum(len(page) for page in pages),
+    }
+
+
+@app.post("/documents", status_code=201)
+async def upload_document(file: UploadFile = File(...)):
+    """Extract a PDF once; later course requests can pass the returned document_id."""
+    source = await _spool_file(file)
+    try:
+        pages = await load_document_pages(source, max_chars=None)
+    except DocumentTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    finally:
+        source.discard()
+    return await _document_summary(source.document_id, pages)
+
+
+@app.get("/documents/{document_id}")
+async def get_document(document_id: str):
+    entry = get_document_cache().get(document_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired document id.")
+    summary = await _document_summary(document_id, entry["pages"])
+    return {**summary, "complete": entry["complete"]}
+
+
+async def _spool_file(file: UploadFile) -> CourseSource:
+    try:
+        upload_path, document_id = await spool_upload(file)
+    except DocumentTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return CourseSource(upload_path=upload_path, document_id=document_id)
+
+
+async def _resolve_source(
+    file: Optional[UploadFile], pdf_text: Optional[str], document_id: Optional[str]
+) -> CourseSource:
+    """Validate the course source; uploads are spooled to disk and hashed."""
+    if file:
+        return await _spool_file(file)
+    if document_id:
+        if not get_document_cache().contains(document_id):
+            raise HTTPException(status_code=404, detail="Unknown or expired document id.")
+        return CourseSource(document_id=document_id)
+    if pdf_text:
+        return CourseSource(pdf_text=pdf_text)
+    raise HTTPException(
+        status_code=400,
+        detail="Provide a PDF upload, a document_id or a pdf_text string.",
+    )
+
+
+async def _extract_source(source: CourseSource) -> str:
+    try:
+        return await extract_text(source)
+    except DocumentTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except DocumentNotFound as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    finally:
+        source.discard()
+
+
 async def _build_course_from_input(
     file: Optional[UploadFile],
     pdf_text: Optional[str],
+    document_id: Optional[str],
     course_title: str,
     level: str,
     units: int,
+    force_refresh: bool = False,
 ):
-    if not file and not pdf_text:
-        raise HTTPException(
-            status_code=400, detail="Provide either a PDF upload or a pdf_text string."
-        )
-
-    if file:
-        file_bytes = await file.read()
-        if not file_bytes:
-            raise HTTPException(status_code=400, detail="Uploaded PDF was empty.")
-        parsed_pdf_text = read_pdf(io.BytesIO(file_bytes))
-    else:
-        parsed_pdf_text = pdf_text or ""
+    """Generate a course; returns it with the id of the document it was built from."""
+    source = await _resolve_source(file, pdf_text, document_id)
+    parsed_pdf_text = await _extract_source(source)
 
     try:
-        return generate_course_from_pdf(parsed_pdf_text, course_title, level, units)
+        course = await generate_course(parsed_pdf_text, course_title, level, units, force_refresh)
+    except LLMUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "30"}) from exc
     except RuntimeError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
+    return course, source_document_id(source, parsed_pdf_text)
+
+
+def _cached_response(request: Request, etag: str, cache_control: str, render) -> Response:
+    """304 when the client's copy is current, otherwise render(); both carry the validators.
+
+    The 304 echoes the tag the client matched, which carries an encoding suffix when its copy
+    came compressed.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    matched = matching_etag(
+        request.headers.get("if-none-match"), etag, request.headers.get("accept-encoding", "")
+    )
+    if matched is not None:
+        return Response(status_code=304, headers={**headers, "ETag": matched})
+    response = render()
+    response.headers.update(headers)
+    return response
+
+
+def _pdf_response(request: Request, course_id: str, path: str, title: str) -> Response:
+    """Serve a stored PDF from disk; the id is a content hash, so the ETag never goes stale."""
+    safe_title = re.sub(r"[^A-Za-z0-9_.-]+", "_", title)
+    # FileResponse streams the file itself and answers Range/If-Range requests.
+    return _cached_response(
+        request,
+        f'"{course_id}"',
+        IMMUTABLE_CACHE_CONTROL,
+        lambda: FileResponse(
+            path, media_type="application/pdf", filename=f"{safe_title or 'course'}.pdf"
+        ),
+    )
 
 
 @app.post("/course", response_model=CourseResponse)
@@ -103,31 +296,301 @@ async def create_course(
     level: str = Form(...),
     units: int = Form(...),
     include_pdf: bool = Form(False),
+    inline_pdf: bool = Form(False),
+    force_refresh: bool = Form(False),
     file: Optional[UploadFile] = File(None),
     pdf_text: Optional[str] = Form(None),
+    document_id: Optional[str] = Form(None),
+    owner: Optional[str] = Form(None),
 ):
-    course = await _build_course_from_input(file, pdf_text, course_title, level, units)
-    response = {"course": course}
+    """Generate a course. include_pdf renders it up front; inline_pdf also embeds it as base64.
+
+    The course is kept in the course store (under `owner`, if given) for GET /courses.
+    """
+    course, source_id = await _build_course_from_input(
+        file, pdf_text, document_id, course_title, level, units, force_refresh
+    )
+    course_id = save_course(course, source_id, owner)
+    response = {
+        "course": course,
+        "course_id": course_id,
+        "course_pdf_url": course_pdf_url(course_id),
+    }
 
-    if include_pdf:
-        pdf_bytes = render_course_pdf_to_bytes(course)
-        response["course_pdf_base64"] = base64.b64encode(pdf_bytes).decode("utf-8")
+    if include_pdf or inline_pdf:
+        pdf_path = await course_pdf_path(course_id)
+        if inline_pdf:
+            with stage("base64"), open(pdf_path, "rb") as pdf:
+                response["course_pdf_base64"] = base64.b64encode(pdf.read()).decode("utf-8")
 
     return response
 
 
 @app.post("/course/pdf")
 async def create_course_pdf(
+    request: Request,
+    course_title: str = Form(...),
+    level: str = Form(...),
+    units: int = Form(...),
+    force_refresh: bool = Form(False),
+    file: Optional[UploadFile] = File(None),
+    pdf_text: Optional[str] = Form(None),
+    document_id: Optional[str] = Form(None),
+    owner: Optional[str] = Form(None),
+):
+    course, source_id = await _build_course_from_input(
+        file, pdf_text, document_id, course_title, level, units, force_refresh
+    )
+    course_id, pdf_path = await store_course_pdf(course, source_id, owner)
+    return _pdf_response(request, course_id, pdf_path, course.get("title", course_title))
+
+
+@app.get("/course/{course_id}/pdf")
+async def get_course_pdf(course_id: str, request: Request):
+    """Download a generated course's PDF; rendered on the first request, then served from disk."""
+    pdf_path = await course_pdf_path(course_id)
+    if pdf_path is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired course id.")
+    course = get_artifact_store().load_course(course_id) or {}
+    return _pdf_response(request, course_id, pdf_path, course.get("title", "course"))
+
+
+@app.get("/courses")
+def list_courses(
+    owner: str,
+    document_id: Optional[str] = None,
+    level: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    fields: Optional[str] = None,
+):
+    """One owner's stored courses, newest first. `fields` picks columns (default: no JSON)."""
+    try:
+        columns = parse_fields(fields, SUMMARY_FIELDS + ("course_pdf_url",))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return FastJSONResponse(
+        get_course_store().list(owner, columns, document_id, level, limit, offset)
+    )
+
+
+@app.get("/courses/{course_id}")
+def get_course(course_id: str, request: Request, fields: Optional[str] = None):
+    """One stored course with its full JSON, or only the comma-separated `fields`.
+
+    A stored course never changes, so the ETag is its id plus the projection. Revalidation
+    only checks that the id exists and skips reading and encoding the course JSON.
+    """
+    try:
+        columns = parse_fields(fields, FIELDS)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    projection = hashlib.sha256(",".join(columns).encode("utf-8")).hexdigest()[:8]
+    etag = f'"{course_id}.{projection}"'
+    revalidating = (
+        matching_etag(
+            request.headers.get("if-none-match"), etag, request.headers.get("accept-encoding", "")
+        )
+        is not None
+    )
+    record = get_course_store().get(course_id, ("id",) if revalidating else columns)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Unknown course id.")
+    return _cached_response(
+        request, etag, IMMUTABLE_CACHE_CONTROL, lambda: FastJSONResponse(record)
+    )
+
+
+@app.post("/course/stream")
+async def create_course_stream(
     course_title: str = Form(...),
     level: str = Form(...),
     units: int = Form(...),
+    force_refresh: bool = Form(False),
     file: Optional[UploadFile] = File(None),
     pdf_text: Optional[str] = Form(None),
+    document_id: Optional[str] = Form(None),
+    owner: Optional[str] = Form(None),
 ):
-    course = await _build_course_from_input(file, pdf_text, course_title, level, units)
-    pdf_bytes = render_course_pdf_to_bytes(course)
-    safe_title = re.sub(r"[^A-Za-z0-9_.-]+", "_", course.get("title", course_title))
-    headers = {"Content-Disposition": f'attachment; filename="{safe_title or "course"}.pdf"'}
-    return StreamingResponse(
-        io.BytesIO(pdf_bytes), media_type="application/pdf", headers=headers
+    """Stream the course as NDJSON: top-level fields and each unit as soon as it is complete.
+
+    The final `done` event also carries the stored course's `course_id` and `course_pdf_url`.
+    """
+    source = await _resolve_source(file, pdf_text, document_id)
+    parsed_pdf_text = await _extract_source(source)
+    source_id = source_document_id(source, parsed_pdf_text)
+
+    async def events():
+        try:
+            async for event in stream_course(
+                parsed_pdf_text, course_title, level, units, force_refresh
+            ):
+                if event["type"] == "done":
+                    course_id = save_course(event["course"], source_id, owner)
+                    event = {
+                        **event,
+                        "course_id": course_id,
+                        "course_pdf_url": course_pdf_url(course_id),
+                    }
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except (RuntimeError, ValueError) as exc:
+            # Headers are already sent, so failures are reported in-band.
+            yield json.dumps({"type": "error", "detail": str(exc)}) + "\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type="application/x-ndjson", headers=headers)
+
+
+@app.post("/jobs/course", status_code=202)
+async def create_course_job(
+    course_title: str = Form(...),
+    level: str = Form(...),
+    units: int = Form(...),
+    include_pdf: bool = Form(False),
+    inline_pdf: bool = Form(False),
+    force_refresh: bool = Form(False),
+    file: Optional[UploadFile] = File(None),
+    pdf_text: Optional[str] = Form(None),
+    document_id: Optional[str] = Form(None),
+    owner: Optional[str] = Form(None),
+):
+    """Queue a course generation and return immediately with the job id."""
+    source = await _resolve_source(file, pdf_text, document_id)
+    job = CourseJob(
+        source, course_title, level, units, include_pdf, force_refresh, inline_pdf, owner
     )
+    try:
+        job_runner.submit(job)
+    except RuntimeError as exc:
+        source.discard()
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return job.snapshot(include_result=False)
+
+
+def _get_job(job_id: str) -> CourseJob:
+    job = job_runner.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id.")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+def get_course_job(job_id: str):
+    return _get_job(job_id).snapshot()
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_course_job(job_id: str):
+    """Server-Sent Events: one `progress` event per stage change, then `done` or `error`."""
+    job = _get_job(job_id)
+
+    async def events():
+        seen = -1
+        while True:
+            if job.version > seen:
+                seen = job.version
+                if job.finished:
+                    event = "done" if job.status == "succeeded" else "error"
+                    yield f"event: {event}\ndata: {json.dumps(job.snapshot())}\n\n"
+                    return
+                payload = json.dumps(job.snapshot(include_result=False))
+                yield f"event: progress\ndata: {payload}\n\n"
+            elif not await job.wait_for_change(seen, SSE_KEEPALIVE_SECONDS):
+                yield ": keep-alive\n\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+
+_batch_profiles = TypeAdapter(List[BatchProfile])
+
+
+def _parse_profiles(profiles: str) -> List[dict]:
+    try:
+        parsed = _batch_profiles.validate_json(profiles)
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail='profiles must be a JSON list like [{"level": "Beginner", "units": 10}].',
+        ) from exc
+    if not parsed:
+        raise HTTPException(status_code=400, detail="Provide at least one profile.")
+    return [profile.model_dump() for profile in parsed]
+
+
+@app.post("/batches", status_code=202)
+async def create_batch(
+    profiles: str = Form(..., description='JSON list, e.g. [{"level": "Beginner", "units": 10}]'),
+    files: Optional[List[UploadFile]] = File(None),
+    document_ids: Optional[List[str]] = Form(None),
+    course_title: Optional[str] = Form(None),
+    force_refresh: bool = Form(False),
+    owner: Optional[str] = Form(None),
+):
+    """Queue one course per document x profile; each document's text is extracted only once."""
+    parsed_profiles = _parse_profiles(profiles)
+    files = files or []
+    document_ids = document_ids or []
+    count = (len(files) + len(document_ids)) * len(parsed_profiles)
+    if not count:
+        raise HTTPException(status_code=400, detail="Provide PDF uploads or document ids.")
+    if count > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"The batch has {count} courses; the limit is {BATCH_MAX_ITEMS}.",
+        )
+    document_titles = []
+    for document_id in document_ids:
+        entry = get_document_cache().get(document_id)
+        if entry is None:
+            raise HTTPException(
+                status_code=404, detail=f"Unknown or expired document id {document_id}."
+            )
+        document_titles.append(await run_cpu_bound(document_title, entry["pages"]))
+
+    sources, names = [], []
+    try:
+        for file in files:
+            sources.append(await _spool_file(file))
+            names.append(file.filename or sources[-1].document_id)
+    except HTTPException:
+        for source in sources:
+            source.discard()
+        raise
+    titles = [course_title or os.path.splitext(name)[0] or "Course" for name in names]
+    # Stored documents have no filename; the first line of their normalized text names them.
+    sources += [CourseSource(document_id=document_id) for document_id in document_ids]
+    names += document_ids
+    titles += [course_title or title or "Course" for title in document_titles]
+
+    batch = CourseBatch(sources, titles, names, parsed_profiles, force_refresh, owner)
+    try:
+        await batch_runner.submit(batch)
+    except RuntimeError as exc:
+        batch.discard()
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return batch.manifest()
+
+
+def _get_batch(batch_id: str) -> CourseBatch:
+    batch = batch_runner.store.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired batch id.")
+    return batch
+
+
+@app.get("/batches/{batch_id}")
+def get_batch(batch_id: str):
+    """The batch manifest: every document x profile item with its status and course links."""
+    return _get_batch(batch_id).manifest()
+
+
+@app.get("/batches/{batch_id}/zip")
+async def get_batch_zip(batch_id: str):
+    """A zip of the batch's PDFs, streamed as items finish and closed with manifest.json."""
+    batch = _get_batch(batch_id)
+    headers = {
+        "Content-Disposition": f'attachment; filename="batch-{batch.id}.zip"',
+        "X-Accel-Buffering": "no",
+    }
+    return StreamingResponse(iter_batch_zip(batch), media_type="application/zip", headers=headers)
@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -17,6 +17,35 @@ class ProfileResponse(BaseModel):
     efficiency: float
 
 
+class BatchProfile(BaseModel):
+    level: str = Field(..., min_length=1)
+    units: int = Field(..., ge=1)
+
+
+class QuizQuestion(BaseModel):
+    question: str = Field(..., min_length=1)
+    choices: List[str] = Field(default_factory=list)
+    correct_choice: int = 0
+    explanation: str = ""
+
+
+class Unit(BaseModel):
+    title: str = Field(..., min_length=1)
+    content: str = Field(..., min_length=1)
+    objectives: List[str] = Field(default_factory=list)
+    quiz_questions: List[QuizQuestion] = Field(default_factory=list)
+
+
+class Course(BaseModel):
+    title: str
+    level: str = ""
+    description: str = ""
+    language: str = "en"
+    units: List[Unit] = Field(default_factory=list)
+
+
 class CourseResponse(BaseModel):
-    course: Dict[str, Any]
+    course: Course
+    course_id: Optional[str] = None
+    course_pdf_url: Optional[str] = None
     course_pdf_base64: Optional[str] = None
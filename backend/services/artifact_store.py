@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+from ..config import ARTIFACT_DIR, ARTIFACT_MAX_COURSES
+from .document_cache import is_digest
+
+
+def course_id(course: Dict[str, Any]) -> str:
+    """Stable id for a generated course: the SHA-256 of its canonical JSON."""
+    payload = json.dumps(course, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def course_pdf_url(course_id: str) -> str:
+    """API path that serves the stored PDF for a course."""
+    return f"/course/{course_id}/pdf"
+
+
+class ArtifactStore:
+    """Course JSON and its rendered PDF on disk, keyed by course_id.
+
+    The JSON is saved whenever a course is handed out so its PDF can be rendered lazily on
+    the first download; the PDF is rendered once and then served straight from disk.
+    """
+
+    def __init__(self, directory: str, max_courses: int):
+        self.directory = directory
+        self.max_courses = max_courses
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.pdf_hits = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def course_path(self, course_id: str) -> str:
+        return os.path.join(self.directory, f"{course_id}.json")
+
+    def pdf_path(self, course_id: str) -> str:
+        return os.path.join(self.directory, f"{course_id}.pdf")
+
+    def save_course(self, course: Dict[str, Any], cid: Optional[str] = None) -> str:
+        """Write the course JSON once; `cid` restores a course under an id it already has."""
+        cid = cid or course_id(course)
+        if not os.path.exists(self.course_path(cid)):
+            payload = json.dumps(course, ensure_ascii=False).encode("utf-8")
+            self._write(self.course_path(cid), payload)
+            self._evict()
+        return cid
+
+    def load_course(self, course_id: str) -> Optional[Dict[str, Any]]:
+        if not is_digest(course_id):
+            return None
+        try:
+            with open(self.course_path(course_id), "rb") as stored:
+                return json.loads(stored.read().decode("utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def find_pdf(self, course_id: str) -> Optional[str]:
+        if not is_digest(course_id):
+            return None
+        path = self.pdf_path(course_id)
+        if not os.path.exists(path):
+            return None
+        with self._lock:
+            self.pdf_hits += 1
+        return path
+
+    def save_pdf(self, course_id: str, pdf_bytes: bytes) -> str:
+        path = self.pdf_path(course_id)
+        self._write(path, pdf_bytes)
+        with self._lock:
+            self.renders += 1
+        return path
+
+    def _write(self, path: str, payload: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(payload)
+        # Atomic rename so a concurrent download never sees a half-written file.
+        os.replace(tmp_path, path)
+
+    def _evict(self) -> None:
+        courses = [e for e in os.scandir(self.directory) if e.name.endswith(".json")]
+        if len(courses) <= self.max_courses:
+            return
+        courses.sort(key=lambda e: e.stat().st_mtime)
+        for stale in courses[: len(courses) - self.max_courses]:
+            stale_id = stale.name[: -len(".json")]
+            for path in (stale.path, self.pdf_path(stale_id)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"renders": self.renders, "pdf_hits": self.pdf_hits, "directory": self.directory}
+
+
+_artifact_store: Optional[ArtifactStore] = None
+_artifact_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    global _artifact_store
+    with _artifact_store_lock:
+        if _artifact_store is None:
+            _artifact_store = ArtifactStore(ARTIFACT_DIR, ARTIFACT_MAX_COURSES)
+        return _artifact_store
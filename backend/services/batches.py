@@ -0,0 +1,288 @@
+import asyncio
+import json
+import re
+import uuid
+import zipfile
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from ..config import BATCH_QUEUE_SIZE, BATCH_RETENTION, BATCH_WORKERS, JOB_TTL_SECONDS
+from .artifact_store import course_pdf_url
+from .jobs import FINISHED_STATUSES, JobStore, Watchable
+from .pipeline import (
+    CourseSource,
+    course_pdf_path,
+    extract_text,
+    generate_course,
+    source_document_id,
+    store_course_pdf,
+)
+from .workers import FairQueue
+
+# How long a zip stream waits for the next finished item before checking again.
+ZIP_POLL_SECONDS = 15
+
+
+class BatchDocument:
+    """One input document of a batch; its text is extracted once and shared by every profile."""
+
+    def __init__(self, index: int, source: CourseSource, title: str, name: str, profiles: int):
+        self.index = index
+        self.source = source
+        self.title = title
+        self.name = name
+        self.remaining = profiles
+        self._text: Optional[asyncio.Task] = None
+
+    async def text(self) -> str:
+        if self._text is None:
+            self._text = asyncio.ensure_future(self._extract())
+        return await asyncio.shield(self._text)
+
+    async def _extract(self) -> str:
+        try:
+            return await extract_text(self.source)
+        finally:
+            self.source.discard()
+
+    def release(self) -> None:
+        """Called once per finished profile; the text is dropped after the last one."""
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self._text = None
+            self.source.discard()
+
+
+class BatchItem:
+    """One document x profile course of a batch."""
+
+    def __init__(
+        self, batch: "CourseBatch", index: int, document: BatchDocument, level: str, units: int
+    ):
+        self.batch = batch
+        self.index = index
+        self.document = document
+        self.level = level
+        self.units = units
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.course_id: Optional[str] = None
+        self.course_title: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def filename(self) -> str:
+        name = f"{self.course_title or self.document.title}-{self.level}-{self.units}u"
+        return f"{self.index + 1:03d}-{re.sub(r'[^A-Za-z0-9_.-]+', '_', name)}.pdf"
+
+    async def start(self) -> None:
+        self.status = "running"
+        await self.batch._touch()
+
+    async def succeed(self, course_id: str, course_title: str) -> None:
+        self.status = "succeeded"
+        self.course_id = course_id
+        self.course_title = course_title
+        await self.batch._touch()
+
+    async def fail(self, error: str) -> None:
+        self.status = "failed"
+        self.error = error
+        await self.batch._touch()
+
+    def manifest(self) -> Dict[str, Any]:
+        entry = {
+            "index": self.index,
+            "document": self.document.name,
+            "level": self.level,
+            "units": self.units,
+            "status": self.status,
+            "error": self.error,
+            "course_id": self.course_id,
+            "course_title": self.course_title,
+        }
+        if self.course_id:
+            entry["course_pdf_url"] = course_pdf_url(self.course_id)
+            entry["file"] = self.filename
+        return entry
+
+
+class CourseBatch(Watchable):
+    """Many documents times a list of level/units profiles, generated as independent items."""
+
+    def __init__(
+        self,
+        sources: List[CourseSource],
+        titles: List[str],
+        names: List[str],
+        profiles: List[Dict[str, Any]],
+        force_refresh: bool = False,
+        owner: Optional[str] = None,
+    ):
+        super().__init__()
+        self.id = uuid.uuid4().hex
+        self.created_at = self.updated_at
+        self.force_refresh = force_refresh
+        self.owner = owner
+        self.documents = [
+            BatchDocument(index, source, title, name, len(profiles))
+            for index, (source, title, name) in enumerate(zip(sources, titles, names))
+        ]
+        # Items are ordered document by document, so a document's profiles run back to back
+        # and its extracted text is held only briefly.
+        self.items: List[BatchItem] = []
+        for document in self.documents:
+            for profile in profiles:
+                self.items.append(
+                    BatchItem(self, len(self.items), document, profile["level"], profile["units"])
+                )
+
+    @property
+    def finished(self) -> bool:
+        return all(item.finished for item in self.items)
+
+    @property
+    def status(self) -> str:
+        if self.finished:
+            return "done"
+        if all(item.status == "queued" for item in self.items):
+            return "queued"
+        return "running"
+
+    def discard(self) -> None:
+        for document in self.documents:
+            document.source.discard()
+
+    def manifest(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for item in self.items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        return {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "counts": counts,
+            "zip_url": f"/batches/{self.id}/zip",
+            "items": [item.manifest() for item in self.items],
+        }
+
+
+class _ZipSink:
+    """Write-only file object for zipfile; the bytes written so far are drained per entry."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+async def iter_batch_zip(batch: CourseBatch) -> AsyncIterator[bytes]:
+    """Stream a zip of the batch's PDFs, adding each one as soon as its item finishes.
+
+    The archive ends with manifest.json once every item is done. Written to an unseekable
+    sink, zipfile puts sizes in data descriptors, so nothing has to be rewritten later.
+    """
+    sink = _ZipSink()
+    written = set()
+    with zipfile.ZipFile(sink, "w") as archive:
+        while True:
+            seen = batch.version
+            for item in batch.items:
+                if not item.finished or item.index in written:
+                    continue
+                written.add(item.index)
+                # The artifact store may have evicted the PDF since; it is then rendered again.
+                path = await course_pdf_path(item.course_id) if item.course_id else None
+                if path is not None:
+                    archive.write(path, item.filename, compress_type=zipfile.ZIP_STORED)
+                    yield sink.drain()
+            if batch.finished:
+                break
+            await batch.wait_for_change(seen, ZIP_POLL_SECONDS)
+        manifest = json.dumps(batch.manifest(), ensure_ascii=False, indent=2)
+        archive.writestr("manifest.json", manifest, compress_type=zipfile.ZIP_DEFLATED)
+    yield sink.drain()
+
+
+class BatchRunner:
+    """Fixed pool of asyncio workers taking batch items round-robin across batches."""
+
+    def __init__(self, store: JobStore, workers: int, queue_size: int):
+        self.store = store
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self._queue: Optional[FairQueue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = FairQueue("batch", self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def submit(self, batch: CourseBatch) -> CourseBatch:
+        if self._queue is None:
+            raise RuntimeError("Batch runner is not started.")
+        self.store.add(batch)
+        try:
+            await self._queue.put_many(batch.id, batch.items)
+        except RuntimeError:
+            self.store.discard(batch.id)
+            raise
+        return batch
+
+    async def _worker(self):
+        while True:
+            _, item = await self._queue.get()
+            await self._run(item)
+
+    async def _run(self, item: BatchItem):
+        try:
+            await item.start()
+            pdf_text = await item.document.text()
+            course = await generate_course(
+                pdf_text, item.document.title, item.level, item.units, item.batch.force_refresh
+            )
+            course_id, _ = await store_course_pdf(
+                course, source_document_id(item.document.source, pdf_text), item.batch.owner
+            )
+            await item.succeed(course_id, course.get("title") or item.document.title)
+        except asyncio.CancelledError:
+            await item.fail("Batch was cancelled during shutdown.")
+            raise
+        except Exception as exc:  # one failed item must not stop the batch or the worker
+            await item.fail(str(exc) or exc.__class__.__name__)
+        finally:
+            item.document.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue": self._queue.stats() if self._queue is not None else None,
+            **self.store.stats(),
+        }
+
+
+batch_runner = BatchRunner(
+    JobStore(BATCH_RETENTION, JOB_TTL_SECONDS), BATCH_WORKERS, BATCH_QUEUE_SIZE
+)
@@ -0,0 +1,50 @@
+import re
+from typing import List
+
+from .pdf_io import PAGE_BREAK
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def _split_oversized(text: str, max_chars: int) -> List[str]:
+    """Split one page that is too long on paragraph, then line, then hard boundaries."""
+    for separator in (_PARAGRAPH_BREAK, re.compile(r"\n")):
+        parts = [part for part in separator.split(text) if part.strip()]
+        if len(parts) > 1 and all(len(part) <= max_chars for part in parts):
+            return _pack(parts, max_chars, "\n\n")
+    return [text[start : start + max_chars] for start in range(0, len(text), max_chars)]
+
+
+def _pack(parts: List[str], max_chars: int, joiner: str) -> List[str]:
+    """Greedily merge consecutive parts into chunks of at most max_chars."""
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for part in parts:
+        extra = len(part) + (len(joiner) if current else 0)
+        if current and size + extra > max_chars:
+            chunks.append(joiner.join(current))
+            current, size = [], 0
+            extra = len(part)
+        current.append(part)
+        size += extra
+    if current:
+        chunks.append(joiner.join(current))
+    return chunks
+
+
+def split_into_chunks(text: str, max_chars: int) -> List[str]:
+    """Split extracted PDF text into ordered chunks that respect page boundaries.
+
+    Whole pages are packed together up to max_chars; a single page longer than that is
+    split on paragraph or line boundaries before falling back to a hard cut.
+    """
+    parts: List[str] = []
+    for page in text.split(PAGE_BREAK):
+        if not page.strip():
+            continue
+        if len(page) > max_chars:
+            parts.extend(_split_oversized(page, max_chars))
+        else:
+            parts.append(page)
+    return _pack(parts, max_chars, "\n\n")
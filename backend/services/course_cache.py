@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from ..config import (
+    COURSE_CACHE_BACKEND,
+    COURSE_CACHE_MAX_BYTES,
+    COURSE_CACHE_MAX_ENTRIES,
+    COURSE_CACHE_PATH,
+    COURSE_CACHE_TTL_SECONDS,
+)
+
+
+def course_cache_key(
+    pdf_text: str,
+    course_title: str,
+    level: str,
+    n_units: int,
+    model_name: str,
+    prompt_version: str,
+) -> str:
+    """Hash every input that influences the generated course into a stable key."""
+    payload = json.dumps(
+        [pdf_text, course_title, level, int(n_units), model_name, prompt_version],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CourseCache:
+    """Base cache: tracks hit/miss counters and stores nothing."""
+
+    backend = "none"
+    # Whether get/set touch the disk; request handlers then run them on a thread.
+    blocking = False
+
+    def __init__(self):
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        course = self._get(key)
+        with self._counter_lock:
+            if course is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return course
+
+    def set(self, key: str, course: Dict[str, Any]) -> None:
+        self._set(key, json.dumps(course, ensure_ascii=False))
+
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """get() for async handlers; a disk-backed cache is read off the event loop."""
+        if self.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def set_async(self, key: str, course: Dict[str, Any]) -> None:
+        if self.blocking:
+            await asyncio.to_thread(self.set, key, course)
+        else:
+            self.set(key, course)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counter_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "backend": self.backend,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            **self._usage(),
+        }
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    def _set(self, key: str, payload: str) -> None:
+        return None
+
+    def _usage(self) -> Dict[str, Any]:
+        return {"entries": 0}
+
+
+class MemoryCourseCache(CourseCache):
+    """In-process LRU cache with TTL expiry and entry/byte-size eviction."""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, _, payload = entry
+            if expires_at < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+        # Decode outside the lock; every caller gets its own copy of the course.
+        return json.loads(payload)
+
+    def _set(self, key, payload):
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, payload)
+            self._size += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._size > self.max_bytes
+            ):
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def _usage(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size}
+
+
+class SQLiteCourseCache(CourseCache):
+    """On-disk cache shared by every uvicorn worker pointing at the same file."""
+
+    backend = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS course_cache (
+                    key TEXT PRIMARY KEY,
+                    course TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_course_cache_accessed ON course_cache (accessed_at)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _get(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT course, expires_at FROM course_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, expires_at = row
+            if expires_at < now:
+                conn.execute("DELETE FROM course_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE course_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(payload)
+
+    def _set(self, key, payload):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO course_cache (key, course, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, payload, now + self.ttl_seconds, now),
+            )
+            conn.execute("DELETE FROM course_cache WHERE expires_at < ?", (now,))
+            conn.execute(
+                """
+                DELETE FROM course_cache WHERE key IN (
+                    SELECT key FROM course_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def _usage(self):
+        with self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(course)), 0) FROM course_cache"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "path": self.path}
+
+
+_cache: Optional[CourseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_course_cache() -> CourseCache:
+    """Return the process-wide course cache selected by COURSE_CACHE_BACKEND."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            if COURSE_CACHE_BACKEND == "sqlite":
+                _cache = SQLiteCourseCache(
+                    COURSE_CACHE_PATH, COURSE_CACHE_MAX_ENTRIES, COURSE_CACHE_TTL_SECONDS
+                )
+            elif COURSE_CACHE_BACKEND == "memory":
+                _cache = MemoryCourseCache(
+                    COURSE_CACHE_MAX_ENTRIES, COURSE_CACHE_MAX_BYTES, COURSE_CACHE_TTL_SECONDS
+                )
+            elif COURSE_CACHE_BACKEND == "none":
+                _cache = CourseCache()
+            else:
+                raise RuntimeError(
+                    f"Unknown COURSE_CACHE_BACKEND '{COURSE_CACHE_BACKEND}' "
+                    "(expected memory, sqlite or none)."
+                )
+        return _cache
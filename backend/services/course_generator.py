@@ -1,26 +1,43 @@
+import asyncio
 import json
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-import google.generativeai as genai
+from pydantic import ValidationError
 
-from ..config import MODEL_NAME, configure_genai
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib parser accepts the same documents
+    orjson = None
 
+from ..config import (
+    CHUNK_MAX_CHARS,
+    CHUNKED_GENERATION,
+    CHUNKED_GENERATION_MIN_CHARS,
+    GENERATION_MODE,
+    PASSAGE_RETRIEVAL,
+    PROMPT_TOKEN_BUDGET,
+    RETRIEVAL_TOP_K,
+    UNIT_MAX_ATTEMPTS,
+)
+from ..schemas import Course, Unit
+from .chunking import split_into_chunks
+from .json_stream import CourseStreamParser
+from .llm_router import get_llm_router
+from .passage_index import get_passage_index, retrieval_stats
+from .telemetry import stage
+from .text_prep import DEFAULT_CHARS_PER_TOKEN, pack_text_async, token_counter
 
-def clean_json_string(text: str) -> str:
-    """Strip Markdown fences often returned by LLMs."""
-    cleaned = text.strip()
-    if cleaned.startswith("```json"):
-        cleaned = cleaned[7:]
-    if cleaned.startswith("```"):
-        cleaned = cleaned[3:]
-    if cleaned.endswith("```"):
-        cleaned = cleaned[:-3]
-    return cleaned.strip()
+# Bump whenever the prompts below change so cached courses are regenerated.
+PROMPT_VERSION = "6"
 
+# Extraction reads this many times the prompt budget so packing has sections to choose from.
+# The budget is converted at the default token ratio, not the calibrated one: extracted text
+# feeds cache keys and stored documents, so its length must not drift between requests.
+EXTRACTION_BUDGET_FACTOR = 2
+EXTRACTION_MAX_CHARS = int(EXTRACTION_BUDGET_FACTOR * PROMPT_TOKEN_BUDGET * DEFAULT_CHARS_PER_TOKEN)
 
-def generate_course_from_pdf(pdf_text: str, course_title: str, level: str, n_units: int):
-    """Call Gemini to produce a structured course JSON from PDF text."""
-    configure_genai()
-    system_prompt = """
+SYSTEM_PROMPT = """
 You are PersonalLearn, an adaptive AI. Detect the language. Output ONLY valid JSON.
 JSON structure:
 {
@@ -48,18 +65,559 @@ Constraints:
 - EXACTLY n_units units.
 - Content must be physically adapted (simplified or deepened) based on 'level'.
 """
+
+CHUNK_OUTLINE_PROMPT = """
+You are PersonalLearn, an adaptive AI. The text below is one excerpt of a longer document.
+List the teachable topics it covers, in the order they appear. Output ONLY valid JSON.
+JSON structure:
+{
+  "topics": [
+    {"title": "String", "summary": "String (2-3 sentences, in the excerpt's language)"}
+  ]
+}
+Constraints:
+- At most 6 topics.
+"""
+
+COURSE_HEADER_PROMPT = """
+You are PersonalLearn, an adaptive AI. Describe a course built from the topics below.
+Detect the language of the topics. Output ONLY valid JSON.
+JSON structure:
+{
+  "title": "String",
+  "description": "String",
+  "language": "fr" or "en"
+}
+"""
+
+COURSE_OUTLINE_PROMPT = """
+You are PersonalLearn, an adaptive AI. Plan a course from the content below. Detect the language.
+Output ONLY valid JSON.
+JSON structure:
+{
+  "title": "String",
+  "description": "String",
+  "language": "fr" or "en",
+  "units": [
+    {"title": "String", "objectives": ["String", "String"]}
+  ]
+}
+Constraints:
+- EXACTLY n_units units, ordered from first to last.
+- Titles and objectives must be adapted to 'level'.
+"""
+
+UNIT_PROMPT = """
+You are PersonalLearn, an adaptive AI. Write ONE unit of a course. Output ONLY valid JSON.
+JSON structure:
+{
+  "title": "String",
+  "content": "String (Detailed, comprehensive educational content adapted to the level. Must be long enough to study.)",
+  "objectives": ["String", "String"],
+  "quiz_questions": [
+    {
+      "question": "String",
+      "choices": ["A","B","C","D"],
+      "correct_choice": 0,
+      "explanation": "String"
+    }
+  ]
+}
+Constraints:
+- Cover only the topics listed for this unit, drawing on the source excerpt.
+- Write in the language of the source excerpt.
+- Content must be physically adapted (simplified or deepened) based on 'level'.
+"""
+
+
+def clean_json_string(text: str) -> str:
+    """Strip Markdown fences often returned by LLMs."""
+    cleaned = text.strip()
+    if cleaned.startswith("```json"):
+        cleaned = cleaned[7:]
+    if cleaned.startswith("```"):
+        cleaned = cleaned[3:]
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3]
+    return cleaned.strip()
+
+
+async def _build_prompt_async(pdf_text: str, course_title: str, level: str, n_units: int) -> str:
     user_prompt = f"""
 Title: {course_title}
 Level: {level}
 Units: {n_units}
 Content:
-{pdf_text[:25000]}
+{await pack_text_async(pdf_text)}
+"""
+    return SYSTEM_PROMPT + "\n" + user_prompt
+
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class ParseStats:
+    """How often model output needed fixing, reported under "parsing" in /stats."""
+
+    def __init__(self):
+        self.responses = 0
+        self.invalid_json = 0
+        self.fixed_json = 0
+        self.salvaged_courses = 0
+        self.invalid_units = 0
+        self.repaired_units = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "responses": self.responses,
+            "invalid_json": self.invalid_json,
+            "fixed_json": self.fixed_json,
+            "salvaged_courses": self.salvaged_courses,
+            "invalid_units": self.invalid_units,
+            "repaired_units": self.repaired_units,
+            "parse_failure_rate": round(self.invalid_json / self.responses, 4)
+            if self.responses
+            else 0.0,
+        }
+
+
+parse_stats = ParseStats()
+
+
+def _loads(text: str):
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+def parse_model_json(raw: str):
+    """Parse a JSON model response, tolerating Markdown fences and trailing commas."""
+    parse_stats.responses += 1
+    cleaned = clean_json_string(raw or "")
+    try:
+        return _loads(cleaned)
+    except ValueError:  # orjson and json decode errors both subclass ValueError
+        parse_stats.invalid_json += 1
+    try:
+        value = _loads(_TRAILING_COMMA.sub(r"\1", cleaned))
+    except ValueError as exc:
+        raise ValueError("Model response was not valid JSON") from exc
+    parse_stats.fixed_json += 1
+    return value
+
+
+def _salvage_course(raw: str) -> Dict[str, Any]:
+    """Recover the header fields and every complete unit from a truncated course response."""
+    parser = CourseStreamParser()
+    course: Dict[str, Any] = {"units": []}
+    for event in parser.feed(raw or ""):
+        if event["type"] == "field":
+            course[event["name"]] = event["value"]
+        elif event["type"] == "unit":
+            course["units"].append(event["unit"])
+    if not course["units"]:
+        raise ValueError("Model response was not valid JSON")
+    parse_stats.salvaged_courses += 1
+    return course
+
+
+def validated_unit(raw_unit: Any) -> Optional[Dict[str, Any]]:
+    """A model unit as a validated Unit dict, or None when it does not validate."""
+    try:
+        return Unit.model_validate(raw_unit).model_dump()
+    except ValidationError:
+        return None
+
+
+async def validate_course_async(
+    raw: str, pdf_text: str, course_title: str, level: str, n_units: int
+) -> Dict[str, Any]:
+    """Parse a single-call course response into a validated Course dict.
+
+    Unusable output is repaired rather than discarded: complete units are salvaged from a
+    truncated response, and each missing or invalid unit is regenerated on its own.
+    """
+    with stage("parse"):
+        try:
+            data = parse_model_json(raw)
+        except ValueError:
+            data = _salvage_course(raw)
+        if not isinstance(data, dict):
+            raise ValueError("Model response was not a JSON object")
+
+        raw_units = data.get("units") if isinstance(data.get("units"), list) else []
+        raw_units = raw_units[:n_units]
+        units: List[Optional[Dict[str, Any]]] = [validated_unit(unit) for unit in raw_units]
+        units += [None] * (n_units - len(units))
+    broken = [index for index, unit in enumerate(units) if unit is None]
+    if broken:
+        parse_stats.invalid_units += len(broken)
+        repaired = await asyncio.gather(
+            *(
+                _repair_unit_async(raw_units, pdf_text, course_title, level, index, len(units))
+                for index in broken
+            )
+        )
+        for index, unit in zip(broken, repaired):
+            units[index] = unit
+        parse_stats.repaired_units += len(broken)
+
+    # A null header field takes the model default rather than failing the repaired course.
+    header = {name: value for name, value in data.items() if value is not None}
+    course = Course.model_validate(
+        {
+            **header,
+            "title": data.get("title") or course_title,
+            "level": data.get("level") or level,
+            "units": units,
+        }
+    )
+    return course.model_dump()
+
+
+async def generate_course_from_pdf_async(
+    pdf_text: str, course_title: str, level: str, n_units: int
+):
+    """Async variant used by the API so a generation never blocks the event loop."""
+    with stage("prompt"):
+        prompt = await _build_prompt_async(pdf_text, course_title, level, n_units)
+    completion = await get_llm_router().complete(prompt)
+    return await validate_course_async(completion.text, pdf_text, course_title, level, n_units)
+
+
+async def stream_course_from_pdf_async(
+    pdf_text: str, course_title: str, level: str, n_units: int
+):
+    """Yield the raw course JSON text chunk by chunk as the model produces it."""
+    prompt = await _build_prompt_async(pdf_text, course_title, level, n_units)
+    async for text in get_llm_router().stream(prompt):
+        yield text
+
+
+def generation_strategy(pdf_text: str) -> str:
+    """Pick how a course is generated: "chunked", "parallel" or "single"."""
+    if CHUNKED_GENERATION and len(pdf_text) > CHUNKED_GENERATION_MIN_CHARS:
+        return "chunked"
+    return GENERATION_MODE
+
+
+def prompt_char_budget() -> int:
+    """Characters of source text that fit PROMPT_TOKEN_BUDGET at the current token ratio."""
+    return token_counter.chars_for(PROMPT_TOKEN_BUDGET)
+
+
+def extraction_char_budget() -> Optional[int]:
+    """How much PDF text is worth extracting: everything when long documents are chunked."""
+    return None if CHUNKED_GENERATION else EXTRACTION_MAX_CHARS
+
+
+async def _unit_source_async(pdf_text: str, brief: str) -> str:
+    """Source excerpt for one unit: the passages that best match its brief, in document order.
+
+    Falls back to the packed document when retrieval is off or no passage shares a term
+    with the brief.
+    """
+    if PASSAGE_RETRIEVAL:
+        index = await get_passage_index(pdf_text)
+        with stage("retrieve"):
+            excerpt = index.excerpt(brief, RETRIEVAL_TOP_K, prompt_char_budget())
+        retrieval_stats.record(excerpt)
+        if excerpt is not None:
+            return excerpt
+    return await pack_text_async(pdf_text)
+
+
+async def _generate_json_async(prompt: str):
+    completion = await get_llm_router().complete(prompt)
+    return parse_model_json(completion.text)
+
+
+async def _outline_chunk_async(chunk: str, index: int, total: int) -> List[Dict[str, str]]:
+    """Map step: list the topics of one chunk (falls back to the chunk's first line)."""
+    prompt = f"""{CHUNK_OUTLINE_PROMPT}
+Excerpt {index + 1} of {total}:
+{chunk}
+"""
+    outline = await _generate_json_async(prompt)
+    topics = outline.get("topics") if isinstance(outline, dict) else None
+    topics = [t for t in topics or [] if isinstance(t, dict) and t.get("title")]
+    if not topics:
+        first_line = next((line.strip() for line in chunk.splitlines() if line.strip()), "")
+        topics = [{"title": first_line[:120] or f"Part {index + 1}", "summary": ""}]
+    return topics
+
+
+def _segment_topics(
+    topics: List[Tuple[int, Dict[str, str]]], n_units: int
+) -> List[List[Tuple[int, Dict[str, str]]]]:
+    """Reduce step: split the ordered topics into n_units contiguous, balanced segments.
+
+    With fewer topics than units, neighbouring units share a topic rather than coming out empty.
+    """
+    segments = []
+    for unit in range(n_units):
+        start = unit * len(topics) // n_units
+        end = (unit + 1) * len(topics) // n_units
+        segments.append(topics[start:end] or [topics[min(start, len(topics) - 1)]])
+    return segments
+
+
+async def _course_header_async(course_title: str, level: str, topics) -> Dict[str, Any]:
+    topic_lines = "\n".join(f"- {topic['title']}" for _, topic in topics)
+    prompt = f"""{COURSE_HEADER_PROMPT}
+Title: {course_title}
+Level: {level}
+Topics:
+{topic_lines}
+"""
+    header = await _generate_json_async(prompt)
+    if not isinstance(header, dict):
+        raise ValueError("Model course header was not a JSON object")
+    return {
+        "title": header.get("title") or course_title,
+        "level": level,
+        "description": header.get("description", ""),
+        "language": header.get("language", "en"),
+    }
+
+
+async def _course_outline_async(
+    pdf_text: str, course_title: str, level: str, n_units: int
+) -> Dict[str, Any]:
+    """Phase 1 of parallel mode: fix the course header and every unit's title/objectives."""
+    prompt = f"""{COURSE_OUTLINE_PROMPT}
+Title: {course_title}
+Level: {level}
+Units: {n_units}
+Content:
+{await pack_text_async(pdf_text)}
+"""
+    outline = await _generate_json_async(prompt)
+    units = outline.get("units") if isinstance(outline, dict) else None
+    units = [u for u in units or [] if isinstance(u, dict) and u.get("title")]
+    if len(units) < n_units:
+        raise ValueError(f"Model outline listed {len(units)} of {n_units} units")
+    return {
+        "title": outline.get("title") or course_title,
+        "level": level,
+        "description": outline.get("description", ""),
+        "language": outline.get("language", "en"),
+        "units": [
+            {"title": unit["title"], "objectives": list(unit.get("objectives") or [])}
+            for unit in units[:n_units]
+        ],
+    }
+
+
+async def _with_retries(make_call, attempts: int):
+    """Await make_call() until it succeeds, retrying unusable (ValueError) model output."""
+    for attempt in range(attempts):
+        try:
+            return await make_call()
+        except ValueError:
+            if attempt == attempts - 1:
+                raise
+
+
+async def _generate_unit_async(
+    course_title: str, level: str, index: int, n_units: int, brief: str, source: str
+) -> Dict[str, Any]:
+    """Generate one unit from its brief (topics or fixed title/objectives) and source text."""
+    prompt = f"""{UNIT_PROMPT}
+Course: {course_title}
+Level: {level}
+Unit: {index + 1} of {n_units}
+{brief}
+Source excerpt:
+{source}
 """
-    response = genai.GenerativeModel(MODEL_NAME).generate_content(
-        [{"role": "user", "parts": [system_prompt + "\n" + user_prompt]}]
+
+    async def call():
+        try:
+            return Unit.model_validate(await _generate_json_async(prompt)).model_dump()
+        except ValidationError as exc:
+            parse_stats.invalid_units += 1
+            raise ValueError(f"Model returned an invalid unit {index + 1}") from exc
+
+    return await _with_retries(call, UNIT_MAX_ATTEMPTS)
+
+
+async def _unit_from_segment_async(
+    segment,
+    chunks: List[str],
+    pdf_text: str,
+    course_title: str,
+    level: str,
+    index: int,
+    n_units: int,
+) -> Dict[str, Any]:
+    topic_lines = "\n".join(
+        f"- {topic['title']}: {topic.get('summary', '')}" for _, topic in segment
+    )
+    if PASSAGE_RETRIEVAL:
+        source = await _unit_source_async(pdf_text, topic_lines)
+    else:
+        chunk_ids = sorted({chunk_index for chunk_index, _ in segment})
+        source = await pack_text_async("\n\n".join(chunks[i] for i in chunk_ids))
+    return await _generate_unit_async(
+        course_title, level, index, n_units, f"Topics:\n{topic_lines}", source
     )
-    raw = response.text or ""
+
+
+async def _unit_from_outline_async(
+    outline_unit: Dict[str, Any],
+    pdf_text: str,
+    course_title: str,
+    level: str,
+    index: int,
+    n_units: int,
+) -> Dict[str, Any]:
+    objective_lines = "\n".join(f"- {objective}" for objective in outline_unit["objectives"])
+    brief = (
+        f"Topics:\n- {outline_unit['title']}\n"
+        f"Keep this exact unit title: {outline_unit['title']}\n"
+        f"Objectives to meet:\n{objective_lines}"
+    )
+    unit = await _generate_unit_async(
+        course_title,
+        level,
+        index,
+        n_units,
+        brief,
+        await _unit_source_async(pdf_text, f"{outline_unit['title']}\n{objective_lines}"),
+    )
+    # The outline is authoritative for titles and objectives; the unit call fills the rest.
+    unit["title"] = outline_unit["title"]
+    if outline_unit["objectives"]:
+        unit["objectives"] = outline_unit["objectives"]
+    return unit
+
+
+async def _repair_unit_async(
+    raw_units: List[Any],
+    pdf_text: str,
+    course_title: str,
+    level: str,
+    index: int,
+    n_units: int,
+) -> Dict[str, Any]:
+    """Regenerate one unit of a single-call course, keeping whatever title it already had."""
+    raw_unit = raw_units[index] if index < len(raw_units) else None
+    raw_unit = raw_unit if isinstance(raw_unit, dict) else {}
+    title = raw_unit.get("title") if isinstance(raw_unit.get("title"), str) else ""
+    objectives = raw_unit.get("objectives")
+    if not isinstance(objectives, list):
+        objectives = []
+    objectives = [objective for objective in objectives if isinstance(objective, str)]
+    if not title:
+        return await _generate_unit_async(
+            course_title,
+            level,
+            index,
+            n_units,
+            "Topics:\n- The next part of the source not covered by earlier units",
+            await pack_text_async(pdf_text),
+        )
+    return await _unit_from_outline_async(
+        {"title": title, "objectives": objectives}, pdf_text, course_title, level, index, n_units
+    )
+
+
+async def _unit_events(header_awaitable, unit_coros) -> AsyncIterator[Dict[str, Any]]:
+    """Start every unit call at once, yield the header fields, then each unit as it finishes."""
+
+    async def tagged(index, coro):
+        return index, await coro
+
+    tasks = [asyncio.ensure_future(tagged(i, coro)) for i, coro in enumerate(unit_coros)]
+    header_task = asyncio.ensure_future(header_awaitable)
     try:
-        return json.loads(clean_json_string(raw))
-    except json.JSONDecodeError as exc:
-        raise ValueError("Gemini response was not valid JSON") from exc
+        header = await header_task
+        for name, value in header.items():
+            yield {"type": "field", "name": name, "value": value}
+        for next_done in asyncio.as_completed(tasks):
+            index, unit = await next_done
+            yield {"type": "unit", "index": index, "unit": unit}
+    finally:
+        for task in tasks + [header_task]:
+            task.cancel()
+
+
+async def _iter_course_chunked_async(pdf_text, course_title, level, n_units):
+    """Map-reduce generation for long documents.
+
+    Chunks are outlined concurrently, the topics are split into n_units segments and every
+    unit is generated concurrently, so wall time follows the slowest chunk rather than the
+    document length.
+    """
+    chunks = split_into_chunks(pdf_text, CHUNK_MAX_CHARS)
+    if not chunks:
+        raise ValueError("The document did not contain any extractable text")
+    outlines = await asyncio.gather(
+        *(_outline_chunk_async(chunk, i, len(chunks)) for i, chunk in enumerate(chunks))
+    )
+    topics = [(i, topic) for i, outline in enumerate(outlines) for topic in outline]
+    segments = _segment_topics(topics, n_units)
+
+    unit_coros = [
+        _unit_from_segment_async(segment, chunks, pdf_text, course_title, level, i, n_units)
+        for i, segment in enumerate(segments)
+    ]
+    header = _course_header_async(course_title, level, topics)
+    async for event in _unit_events(header, unit_coros):
+        yield event
+
+
+async def _iter_course_parallel_async(pdf_text, course_title, level, n_units):
+    """Two-phase generation: one short outline call, then one call per unit in parallel.
+
+    A malformed unit is retried on its own instead of invalidating the whole course.
+    """
+    outline = await _with_retries(
+        lambda: _course_outline_async(pdf_text, course_title, level, n_units), UNIT_MAX_ATTEMPTS
+    )
+    header = {name: value for name, value in outline.items() if name != "units"}
+    unit_coros = [
+        _unit_from_outline_async(unit, pdf_text, course_title, level, i, n_units)
+        for i, unit in enumerate(outline["units"])
+    ]
+    async for event in _unit_events(asyncio.sleep(0, result=header), unit_coros):
+        yield event
+
+
+def iter_course_events_async(
+    pdf_text: str, course_title: str, level: str, n_units: int
+) -> AsyncIterator[Dict[str, Any]]:
+    """Multi-call generation ("chunked" or "parallel" strategy) as field/unit events.
+
+    Events match the streaming parser's; units may arrive out of order and carry their index.
+    """
+    if generation_strategy(pdf_text) == "chunked":
+        return _iter_course_chunked_async(pdf_text, course_title, level, n_units)
+    return _iter_course_parallel_async(pdf_text, course_title, level, n_units)
+
+
+class CourseBuilder:
+    """Assemble the course dict from field/unit events, whatever order units arrive in."""
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.units: Dict[int, Dict[str, Any]] = {}
+
+    def add(self, event: Dict[str, Any]) -> None:
+        if event["type"] == "field":
+            self.fields[event["name"]] = event["value"]
+        elif event["type"] == "unit":
+            self.units[event["index"]] = event["unit"]
+
+    def build(self) -> Dict[str, Any]:
+        course = {**self.fields, "units": [self.units[i] for i in sorted(self.units)]}
+        return Course.model_validate(course).model_dump()
+
+
+async def generate_course_multicall_async(
+    pdf_text: str, course_title: str, level: str, n_units: int
+) -> Dict[str, Any]:
+    """Run the chunked or parallel strategy to completion and return the course dict."""
+    builder = CourseBuilder()
+    async for event in iter_course_events_async(pdf_text, course_title, level, n_units):
+        builder.add(event)
+    return builder.build()
@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..config import COURSE_STORE_PATH
+from .artifact_store import course_pdf_url
+
+# Columns a client can ask for with `fields`; `course` (the full JSON) is the only large one.
+# `owner` is never projected: it is the only thing separating one browser's courses from
+# another's, so it is only ever taken as a filter.
+SUMMARY_FIELDS = (
+    "id",
+    "title",
+    "level",
+    "units",
+    "language",
+    "description",
+    "document_id",
+    "created_at",
+)
+FIELDS = SUMMARY_FIELDS + ("course", "course_pdf_url")
+MAX_PAGE_SIZE = 100
+
+
+def parse_fields(fields: Optional[str], default: Sequence[str]) -> List[str]:
+    """Turn a comma-separated projection into column names; ValueError for unknown ones."""
+    if not fields:
+        return list(default)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; choose from {list(FIELDS)}.")
+    return names
+
+
+class CourseStore:
+    """SQLite repository of every generated course, shared by all uvicorn workers.
+
+    Summary columns sit next to the course JSON and are indexed for the listing filters, so
+    a page of summaries never reads or decodes the courses themselves.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS courses (
+                    id TEXT NOT NULL,
+                    owner TEXT NOT NULL DEFAULT '',
+                    document_id TEXT,
+                    title TEXT NOT NULL,
+                    level TEXT NOT NULL,
+                    units INTEGER NOT NULL,
+                    language TEXT,
+                    description TEXT,
+                    created_at REAL NOT NULL,
+                    course TEXT NOT NULL,
+                    PRIMARY KEY (id, owner)
+                )
+                """
+            )
+            for name, columns in (
+                ("owner", "owner, created_at"),
+                ("document", "document_id, created_at"),
+                ("level", "level, created_at"),
+                ("created", "created_at"),
+            ):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_courses_{name} ON courses ({columns})")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(
+        self,
+        course_id: str,
+        course: Dict[str, Any],
+        document_id: Optional[str] = None,
+        owner: Optional[str] = None,
+    ) -> None:
+        """Record a course for an owner; saving the same course again keeps the first record."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO courses (id, owner, document_id, title, level, units, "
+                "language, description, created_at, course) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    course_id,
+                    owner or "",
+                    document_id,
+                    course.get("title", ""),
+                    course.get("level", ""),
+                    len(course.get("units", [])),
+                    course.get("language"),
+                    course.get("description"),
+                    time.time(),
+                    json.dumps(course, ensure_ascii=False),
+                ),
+            )
+
+    @staticmethod
+    def _columns(fields: Sequence[str]) -> List[str]:
+        columns = [name for name in fields if name != "course_pdf_url"]
+        return columns if "id" in columns else columns + ["id"]
+
+    @staticmethod
+    def _row(columns: List[str], values, fields: Sequence[str]) -> Dict[str, Any]:
+        row = dict(zip(columns, values))
+        if "course" in row:
+            row["course"] = json.loads(row["course"])
+        if "course_pdf_url" in fields:
+            row["course_pdf_url"] = course_pdf_url(row["id"])
+        return {name: row[name] for name in fields}
+
+    def get(self, course_id: str, fields: Sequence[str] = FIELDS) -> Optional[Dict[str, Any]]:
+        columns = self._columns(fields)
+        with self._connect() as conn:
+            values = conn.execute(
+                f"SELECT {', '.join(columns)} FROM courses WHERE id = ? "
+                "ORDER BY created_at LIMIT 1",
+                (course_id,),
+            ).fetchone()
+        return self._row(columns, values, fields) if values is not None else None
+
+    def list(
+        self,
+        owner: str,
+        fields: Sequence[str] = SUMMARY_FIELDS,
+        document_id: Optional[str] = None,
+        level: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """One owner's courses, newest first; one extra row tells whether another page exists."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        filters, params = ["owner = ?"], [owner]
+        for column, value in (("document_id", document_id), ("level", level)):
+            if value is not None:
+                filters.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(filters)}"
+        columns = self._columns(fields)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(columns)} FROM courses {where} "
+                "ORDER BY created_at DESC, id LIMIT ? OFFSET ?",
+                (*params, limit + 1, offset),
+            ).fetchall()
+        return {
+            "items": [self._row(columns, values, fields) for values in rows[:limit]],
+            "limit": limit,
+            "offset": offset,
+            "next_offset": offset + limit if len(rows) > limit else None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            (count,) = conn.execute("SELECT COUNT(*) FROM courses").fetchone()
+        return {"courses": count, "path": self.path}
+
+
+_course_store: Optional[CourseStore] = None
+_course_store_lock = threading.Lock()
+
+
+def get_course_store() -> CourseStore:
+    global _course_store
+    with _course_store_lock:
+        if _course_store is None:
+            _course_store = CourseStore(COURSE_STORE_PATH)
+        return _course_store
@@ -0,0 +1,50 @@
+from typing import Any, Dict, List
+
+# A merged unit keeps at most this many quiz questions, taken in turn from each part.
+MAX_MERGED_QUESTIONS = 5
+
+
+def group_units(units: List[Any], n_groups: int) -> List[List[Any]]:
+    """Split units into n_groups contiguous, balanced groups whose sizes differ by at most one."""
+    n_groups = max(1, min(n_groups, len(units)))
+    return [
+        units[group * len(units) // n_groups : (group + 1) * len(units) // n_groups]
+        for group in range(n_groups)
+    ]
+
+
+def _merged_title(titles: List[str]) -> str:
+    if len(titles) == 1:
+        return titles[0]
+    return ", ".join(titles[:-1]) + " & " + titles[-1]
+
+
+def merge_units(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Condense consecutive units into one.
+
+    The parts become titled sections in order, objectives are de-duplicated and the quiz
+    draws evenly from every part.
+    """
+    if len(parts) == 1:
+        return dict(parts[0])
+    content = "\n".join(f"{part['title']}\n{part['content']}" for part in parts)
+    objectives = list(dict.fromkeys(o for part in parts for o in part.get("objectives", [])))
+    quizzes = [list(part.get("quiz_questions", [])) for part in parts]
+    questions = []
+    for round_ in range(max(len(quiz) for quiz in quizzes)):
+        questions += [quiz[round_] for quiz in quizzes if round_ < len(quiz)]
+    return {
+        "title": _merged_title([part["title"] for part in parts]),
+        "content": content,
+        "objectives": objectives,
+        "quiz_questions": questions[:MAX_MERGED_QUESTIONS],
+    }
+
+
+def derive_course_variant(canonical: Dict[str, Any], level: str, n_units: int) -> Dict[str, Any]:
+    """Build an n_units course for `level` from a finer-grained canonical course.
+
+    No LLM call is made: neighbouring units are merged until the unit count matches.
+    """
+    units = [merge_units(group) for group in group_units(canonical["units"], n_units)]
+    return {**canonical, "level": level, "units": units}
@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from ..config import DOCUMENT_CACHE_DIR, DOCUMENT_CACHE_MAX_FILES, DOCUMENT_CACHE_MEMORY_ENTRIES
+
+
+class DocumentCache:
+    """Per-page extracted text keyed by the SHA-256 of the uploaded PDF bytes.
+
+    Entries live zlib-compressed on disk (shared by all workers) with a small in-memory LRU
+    in front. An entry records whether every page was extracted or extraction stopped early
+    at the prompt budget.
+    """
+
+    def __init__(self, directory: str, memory_entries: int, max_files: int):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.max_files = max_files
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, document_id: str) -> str:
+        return os.path.join(self.directory, f"{document_id}.json.z")
+
+    def contains(self, document_id: str) -> bool:
+        """Cheap existence check that does not touch the hit/miss counters."""
+        if not is_digest(document_id):
+            return False
+        with self._lock:
+            if document_id in self._memory:
+                return True
+        return os.path.exists(self._path(document_id))
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        if not is_digest(document_id):
+            return None
+        with self._lock:
+            entry = self._memory.get(document_id)
+            if entry is not None:
+                self._memory.move_to_end(document_id)
+                self.hits += 1
+                return entry
+        try:
+            with open(self._path(document_id), "rb") as stored:
+                entry = json.loads(zlib.decompress(stored.read()).decode("utf-8"))
+        except (FileNotFoundError, zlib.error, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self._remember(document_id, entry)
+        return entry
+
+    def put(self, document_id: str, pages: List[str], complete: bool) -> Dict[str, Any]:
+        entry = {"pages": pages, "complete": complete}
+        payload = zlib.compress(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(payload)
+        # Atomic rename so concurrent workers never read a half-written entry.
+        os.replace(tmp_path, self._path(document_id))
+        with self._lock:
+            self._remember(document_id, entry)
+        self._evict_files()
+        return entry
+
+    def _remember(self, document_id: str, entry: Dict[str, Any]) -> None:
+        self._memory[document_id] = entry
+        self._memory.move_to_end(document_id)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_files(self) -> None:
+        entries = [e for e in os.scandir(self.directory) if e.name.endswith(".json.z")]
+        if len(entries) <= self.max_files:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for stale in entries[: len(entries) - self.max_files]:
+            try:
+                os.remove(stale.path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "directory": self.directory,
+            }
+
+
+def is_digest(value: str) -> bool:
+    return len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+
+_document_cache: Optional[DocumentCache] = None
+_document_cache_lock = threading.Lock()
+
+
+def get_document_cache() -> DocumentCache:
+    global _document_cache
+    with _document_cache_lock:
+        if _document_cache is None:
+            _document_cache = DocumentCache(
+                DOCUMENT_CACHE_DIR, DOCUMENT_CACHE_MEMORY_ENTRIES, DOCUMENT_CACHE_MAX_FILES
+            )
+        return _document_cache
@@ -0,0 +1,157 @@
+import asyncio
+import random
+import threading
+from typing import Any, AsyncIterator, Dict, Optional
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from ..config import (
+    LLM_BACKOFF_BASE_SECONDS,
+    LLM_BACKOFF_MAX_SECONDS,
+    LLM_BURST,
+    LLM_MAX_RETRIES,
+    LLM_REQUEST_TIMEOUT_SECONDS,
+    LLM_REQUESTS_PER_MINUTE,
+    MODEL_NAME,
+    configure_genai,
+)
+from .workers import ConcurrencyLimiter, TokenBucket, llm_limiter
+
+# Quota (429), overload (503) and timeouts are worth retrying; anything else is a real error.
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+)
+
+
+class LLMUnavailable(RuntimeError):
+    """Raised when the model stays rate limited or unavailable after every retry."""
+
+
+class GeminiClient:
+    """Long-lived Gemini client shared by every request in a process.
+
+    The SDK is configured once and model handles are reused. Each call waits for a
+    rate-limit token and a concurrency slot, runs with a timeout, and retries quota and
+    availability errors with jittered exponential backoff (sleeping outside the slot).
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        limiter: ConcurrencyLimiter,
+        bucket: TokenBucket,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        timeout: float,
+    ):
+        self.model_name = model_name
+        self.limiter = limiter
+        self.bucket = bucket
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._model: Optional[genai.GenerativeModel] = None
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+
+    def model(self) -> genai.GenerativeModel:
+        if self._model is None:
+            configure_genai()
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def _retry_delay(self, exc: Exception, attempt: int) -> float:
+        """Count a retryable failure and return how long to back off, or raise if out of tries."""
+        if isinstance(exc, google_exceptions.ResourceExhausted):
+            self.throttled += 1
+        if attempt >= self.max_retries:
+            self.failures += 1
+            raise LLMUnavailable(
+                f"Gemini is unavailable after {attempt + 1} attempts: {exc}"
+            ) from exc
+        self.retries += 1
+        # "Full jitter" spreads retries from concurrent requests instead of retrying in lockstep.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def generate(self, contents, generation_config=None):
+        """Return the SDK response (text plus usage metadata) for `contents`."""
+        model = self.model()
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                async with self.limiter.slot():
+                    self.calls += 1
+                    return await model.generate_content_async(
+                        contents,
+                        generation_config=generation_config,
+                        request_options={"timeout": self.timeout},
+                    )
+            except RETRYABLE_ERRORS as exc:
+                delay = self._retry_delay(exc, attempt)
+            await asyncio.sleep(delay)
+
+    async def stream(self, contents, generation_config=None) -> AsyncIterator[str]:
+        """Yield response text as it arrives; retried only until the first text is yielded."""
+        model = self.model()
+        for attempt in range(self.max_retries + 1):
+            started = False
+            await self.bucket.acquire()
+            try:
+                async with self.limiter.slot():
+                    self.calls += 1
+                    response = await model.generate_content_async(
+                        contents,
+                        stream=True,
+                        generation_config=generation_config,
+                        request_options={"timeout": self.timeout},
+                    )
+                    async for chunk in response:
+                        # Safety/finish chunks carry no parts, and .text raises on those.
+                        if chunk.parts and chunk.text:
+                            started = True
+                            yield chunk.text
+                    return
+            except RETRYABLE_ERRORS as exc:
+                if started:
+                    raise
+                delay = self._retry_delay(exc, attempt)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "in_flight": self.limiter.running,
+            "queued": self.limiter.queued,
+            "rate_limit": self.bucket.stats(),
+            "calls": self.calls,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+        }
+
+
+_gemini_client: Optional[GeminiClient] = None
+_gemini_client_lock = threading.Lock()
+
+
+def get_gemini_client() -> GeminiClient:
+    global _gemini_client
+    with _gemini_client_lock:
+        if _gemini_client is None:
+            _gemini_client = GeminiClient(
+                MODEL_NAME,
+                llm_limiter,
+                TokenBucket(LLM_REQUESTS_PER_MINUTE, LLM_BURST),
+                LLM_MAX_RETRIES,
+                LLM_BACKOFF_BASE_SECONDS,
+                LLM_BACKOFF_MAX_SECONDS,
+                LLM_REQUEST_TIMEOUT_SECONDS,
+            )
+        return _gemini_client
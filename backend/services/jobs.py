@@ -0,0 +1,268 @@
+import asyncio
+import base64
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from ..config import JOB_QUEUE_SIZE, JOB_RETENTION, JOB_TTL_SECONDS, JOB_WORKERS
+from .artifact_store import course_pdf_url
+from .pipeline import (
+    CourseSource,
+    course_pdf_path,
+    extract_text,
+    generate_course,
+    save_course,
+    source_document_id,
+)
+from .telemetry import stage
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+
+class Watchable:
+    """Change counter that lets readers (SSE streams, zip streams) wait for the next update."""
+
+    def __init__(self):
+        self.updated_at = time.time()
+        self.version = 0
+        self._changed = asyncio.Condition()
+
+    async def _touch(self):
+        self.updated_at = time.time()
+        async with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+
+    async def wait_for_change(self, seen_version: int, timeout: float) -> bool:
+        """Block until the object changes past seen_version; False on timeout."""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait_for(lambda: self.version > seen_version), timeout
+                )
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+
+class CourseJob(Watchable):
+    """One queued course generation and the progress of each of its stages."""
+
+    def __init__(
+        self,
+        source: CourseSource,
+        course_title: str,
+        level: str,
+        units: int,
+        include_pdf: bool,
+        force_refresh: bool,
+        inline_pdf: bool = False,
+        owner: Optional[str] = None,
+    ):
+        super().__init__()
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.course_title = course_title
+        self.level = level
+        self.units = units
+        self.include_pdf = include_pdf or inline_pdf
+        self.inline_pdf = inline_pdf
+        self.force_refresh = force_refresh
+        self.owner = owner
+
+        stage_names = ["extract", "generate"] + (["render"] if self.include_pdf else [])
+        self.stages: List[Dict[str, Any]] = [
+            {"name": name, "status": "pending", "started_at": None, "finished_at": None}
+            for name in stage_names
+        ]
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.created_at = self.updated_at
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def stage(self) -> Optional[str]:
+        for stage in self.stages:
+            if stage["status"] == "running":
+                return stage["name"]
+        return None
+
+    async def start_stage(self, name: str):
+        self.status = "running"
+        stage = next(s for s in self.stages if s["name"] == name)
+        stage["status"] = "running"
+        stage["started_at"] = time.time()
+        await self._touch()
+
+    async def finish_stage(self, name: str):
+        stage = next(s for s in self.stages if s["name"] == name)
+        stage["status"] = "done"
+        stage["finished_at"] = time.time()
+        await self._touch()
+
+    async def succeed(self, result: Dict[str, Any]):
+        self.status = "succeeded"
+        self.result = result
+        self._release_input()
+        await self._touch()
+
+    async def fail(self, error: str):
+        for stage in self.stages:
+            if stage["status"] == "running":
+                stage["status"] = "failed"
+                stage["finished_at"] = time.time()
+        self.status = "failed"
+        self.error = error
+        self._release_input()
+        await self._touch()
+
+    def _release_input(self):
+        self.source.discard()
+
+    def snapshot(self, include_result: bool = True) -> Dict[str, Any]:
+        done = sum(1 for stage in self.stages if stage["status"] == "done")
+        payload = {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": [dict(stage) for stage in self.stages],
+            "progress": done / len(self.stages),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "error": self.error,
+        }
+        if include_result:
+            payload["result"] = self.result
+        return payload
+
+
+class JobStore:
+    """Bounded job registry: finished jobs are evicted oldest-first or after their TTL.
+
+    Batches are kept in one too; anything with `id`, `finished` and `updated_at` fits.
+    """
+
+    def __init__(self, max_jobs: int, ttl_seconds: float):
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self._jobs: "OrderedDict[str, CourseJob]" = OrderedDict()
+
+    def add(self, job: CourseJob) -> None:
+        self._evict()
+        if len(self._jobs) >= self.max_jobs:
+            raise RuntimeError("Job store is full; retry once running jobs complete.")
+        self._jobs[job.id] = job
+
+    def get(self, job_id: str) -> Optional[CourseJob]:
+        self._evict()
+        return self._jobs.get(job_id)
+
+    def discard(self, job_id: str) -> None:
+        self._jobs.pop(job_id, None)
+
+    def _evict(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and now - job.updated_at > self.ttl_seconds:
+                del self._jobs[job_id]
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        while len(self._jobs) >= self.max_jobs and finished:
+            del self._jobs[finished.pop(0)]
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"stored": len(self._jobs), "max_jobs": self.max_jobs, "by_status": counts}
+
+
+class JobRunner:
+    """Fixed pool of asyncio workers draining a bounded queue of course jobs."""
+
+    def __init__(self, store: JobStore, workers: int, queue_size: int):
+        self.store = store
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, job: CourseJob) -> CourseJob:
+        if self._queue is None:
+            raise RuntimeError("Job runner is not started.")
+        self.store.add(job)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull as exc:
+            self.store.discard(job.id)
+            raise RuntimeError("Job queue is full; retry shortly.") from exc
+        return job
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: CourseJob):
+        try:
+            await job.start_stage("extract")
+            pdf_text = await extract_text(job.source)
+            await job.finish_stage("extract")
+
+            await job.start_stage("generate")
+            course = await generate_course(
+                pdf_text, job.course_title, job.level, job.units, job.force_refresh
+            )
+            await job.finish_stage("generate")
+
+            course_id = save_course(
+                course, source_document_id(job.source, pdf_text), job.owner
+            )
+            result: Dict[str, Any] = {
+                "course": course,
+                "course_id": course_id,
+                "course_pdf_url": course_pdf_url(course_id),
+            }
+            if job.include_pdf:
+                await job.start_stage("render")
+                pdf_path = await course_pdf_path(course_id)
+                if job.inline_pdf:
+                    with stage("base64"), open(pdf_path, "rb") as pdf:
+                        result["course_pdf_base64"] = base64.b64encode(pdf.read()).decode("utf-8")
+                await job.finish_stage("render")
+            await job.succeed(result)
+        except asyncio.CancelledError:
+            await job.fail("Job was cancelled during shutdown.")
+            raise
+        except Exception as exc:  # surface every failure on the job instead of killing the worker
+            await job.fail(str(exc) or exc.__class__.__name__)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            **self.store.stats(),
+        }
+
+
+job_runner = JobRunner(JobStore(JOB_RETENTION, JOB_TTL_SECONDS), JOB_WORKERS, JOB_QUEUE_SIZE)
@@ -0,0 +1,100 @@
+import json
+from typing import Any, Dict, List, Optional
+
+
+class CourseStreamParser:
+    """Incremental parser for the course JSON as it arrives from a streaming model call.
+
+    Feed raw text chunks in order; each call returns the events completed by that chunk:
+    ``{"type": "field", "name": ..., "value": ...}`` for top-level scalar fields and
+    ``{"type": "unit", "index": ..., "unit": {...}}`` as soon as a unit object closes.
+    Anything before the root object (e.g. a Markdown fence) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.finished = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._expect_key = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._unit_start: Optional[int] = None
+        self._unit_index = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.buffer += chunk
+        events: List[Dict[str, Any]] = []
+        buffer = self.buffer
+        while self._pos < len(buffer) and not self.finished:
+            char = buffer[self._pos]
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._expect_key = True
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key_start is not None:
+                        self._key = json.loads(buffer[self._key_start : self._pos + 1])
+                        self._key_start = None
+            elif char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_start = self._pos
+            elif char in "{[":
+                if char == "{" and self._depth == 2 and self._key == "units":
+                    self._unit_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 2 and self._unit_start is not None and char == "}":
+                    unit_event = self._unit_event(buffer[self._unit_start : self._pos + 1])
+                    if unit_event is not None:
+                        events.append(unit_event)
+                    self._unit_start = None
+                elif self._depth == 0:
+                    self._close_value(self._pos, events)
+                    self.finished = True
+            elif self._depth == 1:
+                if char == ":":
+                    self._expect_key = False
+                    self._value_start = self._pos + 1
+                elif char == ",":
+                    self._close_value(self._pos, events)
+                    self._expect_key = True
+            self._pos += 1
+        return events
+
+    def _unit_event(self, raw: str) -> Optional[Dict[str, Any]]:
+        index = self._unit_index
+        self._unit_index += 1
+        try:
+            unit = json.loads(raw)
+        except json.JSONDecodeError:
+            # Leave malformed units to the final parse of the whole document.
+            return None
+        return {"type": "unit", "index": index, "unit": unit}
+
+    def _close_value(self, end: int, events: List[Dict[str, Any]]) -> None:
+        if self._value_start is None:
+            return
+        raw = self.buffer[self._value_start : end].strip()
+        self._value_start = None
+        # Units are reported one by one while they stream; skip the assembled array.
+        if self._key is None or self._key == "units" or not raw:
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        events.append({"type": "field", "name": self._key, "value": value})
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from ..config import (
+    LLM_FAKE_LATENCY_SECONDS,
+    LLM_FAKE_UNIT_CHARS,
+    LLM_MAX_CONCURRENCY,
+    LLM_REQUEST_TIMEOUT_SECONDS,
+    MISTRAL_MODEL_NAME,
+)
+from .gemini_client import get_gemini_client
+from .workers import ConcurrencyLimiter
+
+
+@dataclass
+class Completion:
+    """One model answer and what it cost."""
+
+    text: str
+    provider: str
+    model: str
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+
+class LLMProvider(ABC):
+    """A model backend the router can send a text prompt to.
+
+    Every prompt in this app asks for JSON, so providers request their native JSON output
+    mode, which rules out Markdown fences and prose around the object. Providers without a
+    streaming API inherit stream(), which yields the whole completion as one chunk.
+    """
+
+    name = "base"
+    model = ""
+
+    @abstractmethod
+    async def complete(self, prompt: str) -> Completion:
+        ...
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        completion = await self.complete(prompt)
+        yield completion.text
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+    generation_config = {"response_mime_type": "application/json"}
+
+    def __init__(self):
+        self.client = get_gemini_client()
+        self.model = self.client.model_name
+
+    @staticmethod
+    def _contents(prompt: str):
+        return [{"role": "user", "parts": [prompt]}]
+
+    async def complete(self, prompt: str) -> Completion:
+        response = await self.client.generate(self._contents(prompt), self.generation_config)
+        usage = getattr(response, "usage_metadata", None)
+        return Completion(
+            text=response.text,
+            provider=self.name,
+            model=self.model,
+            input_tokens=getattr(usage, "prompt_token_count", None),
+            output_tokens=getattr(usage, "candidates_token_count", None),
+        )
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        async for text in self.client.stream(self._contents(prompt), self.generation_config):
+            yield text
+
+
+class MistralProvider(LLMProvider):
+    name = "mistral"
+
+    def __init__(self, model: str = MISTRAL_MODEL_NAME):
+        self.model = model
+        self.limiter = ConcurrencyLimiter("mistral", LLM_MAX_CONCURRENCY)
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            api_key = os.getenv("MISTRAL_API_KEY")
+            if not api_key:
+                raise RuntimeError("MISTRAL_API_KEY environment variable is required.")
+            try:
+                from mistralai import Mistral
+            except ImportError:  # mistralai >= 2 moved the client under mistralai.client
+                from mistralai.client import Mistral
+            self._client = Mistral(api_key=api_key)
+        return self._client
+
+    def _request(self, prompt: str):
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "response_format": {"type": "json_object"},
+            "timeout_ms": int(LLM_REQUEST_TIMEOUT_SECONDS * 1000),
+        }
+
+    async def complete(self, prompt: str) -> Completion:
+        client = self._get_client()
+        async with self.limiter.slot():
+            response = await client.chat.complete_async(**self._request(prompt))
+        usage = getattr(response, "usage", None)
+        return Completion(
+            text=response.choices[0].message.content or "",
+            provider=self.name,
+            model=self.model,
+            input_tokens=getattr(usage, "prompt_tokens", None),
+            output_tokens=getattr(usage, "completion_tokens", None),
+        )
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        client = self._get_client()
+        async with self.limiter.slot():
+            events = await client.chat.stream_async(**self._request(prompt))
+            async for event in events:
+                text = event.data.choices[0].delta.content
+                if isinstance(text, str) and text:
+                    yield text
+
+
+class FakeProvider(LLMProvider):
+    """Offline provider that answers every course prompt with valid, deterministic JSON.
+
+    Used for local runs, smoke tests and load tests (LLM_PROVIDERS=fake); it needs no key.
+    """
+
+    name = "fake"
+    model = "fake-course-model"
+
+    def __init__(
+        self, latency: float = LLM_FAKE_LATENCY_SECONDS, unit_chars: int = LLM_FAKE_UNIT_CHARS
+    ):
+        self.latency = latency
+        self.unit_chars = unit_chars
+
+    @staticmethod
+    def _field(prompt: str, label: str, default: str) -> str:
+        match = re.search(rf"^{label}: (.+)$", prompt, re.MULTILINE)
+        return match.group(1).strip() if match else default
+
+    def _unit(self, title: str, level: str) -> dict:
+        content = f"{title} for a {level} learner.\nKey ideas and a worked example."
+        if len(content) < self.unit_chars:
+            filler = " Practice turns the idea into a skill that lasts."
+            repeats = (self.unit_chars - len(content)) // len(filler) + 1
+            content += "\n" + (filler * repeats).strip()
+        return {
+            "title": title,
+            "content": content,
+            "objectives": [f"Describe {title}", f"Apply {title}"],
+            "quiz_questions": [
+                {
+                    "question": f"Which statement about {title} is correct?",
+                    "choices": ["A", "B", "C", "D"],
+                    "correct_choice": 0,
+                    "explanation": "A restates the unit's main idea.",
+                }
+            ],
+        }
+
+    def answer(self, prompt: str) -> dict:
+        title = self._field(prompt, "Title", "Course")
+        level = self._field(prompt, "Level", "Intermediate")
+        units = int(self._field(prompt, "Units", "1"))
+        header = {
+            "title": title,
+            "level": level,
+            "description": f"A {level} course.",
+            "language": "en",
+        }
+        if "Write ONE unit" in prompt:
+            unit = self._field(prompt, "Unit", "1 of 1").split(" of ")[0]
+            return self._unit(f"Unit {unit}", self._field(prompt, "Level", level))
+        if '"topics": [' in prompt:
+            return {"topics": [{"title": "Excerpt topic", "summary": "What the excerpt covers."}]}
+        if "Describe a course built" in prompt:
+            return header
+        if "Plan a course" in prompt:
+            outline = [
+                {"title": f"Unit {i + 1}", "objectives": [f"Goal {i + 1}"]} for i in range(units)
+            ]
+            return {**header, "units": outline}
+        return {**header, "units": [self._unit(f"Unit {i + 1}", level) for i in range(units)]}
+
+    async def complete(self, prompt: str) -> Completion:
+        await asyncio.sleep(self.latency)
+        text = json.dumps(self.answer(prompt), ensure_ascii=False)
+        return Completion(
+            text=text,
+            provider=self.name,
+            model=self.model,
+            input_tokens=len(prompt) // 4,
+            output_tokens=len(text) // 4,
+        )
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        completion = await self.complete(prompt)
+        for start in range(0, len(completion.text), 256):
+            await asyncio.sleep(0)
+            yield completion.text[start : start + 256]
+
+
+PROVIDERS = {"gemini": GeminiProvider, "mistral": MistralProvider, "fake": FakeProvider}
+
+
+def build_provider(name: str) -> LLMProvider:
+    provider_class = PROVIDERS.get(name)
+    if provider_class is None:
+        raise RuntimeError(f"Unknown LLM provider {name!r}; choose from {sorted(PROVIDERS)}.")
+    return provider_class()
@@ -0,0 +1,232 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..config import (
+    LLM_HEDGE_AFTER_SECONDS,
+    LLM_PROVIDERS,
+    LLM_ROUTER_MAX_ERROR_RATE,
+    LLM_ROUTER_WINDOW,
+)
+from .gemini_client import LLMUnavailable
+from .llm_providers import Completion, LLMProvider, build_provider
+from .telemetry import annotate, record_llm_call, stage
+from .text_prep import token_counter
+
+# Below this many samples a provider's latency percentiles are not trusted for routing.
+MIN_SAMPLES = 5
+# A provider demoted for its error rate gets traffic again once it has had no error this long.
+ERROR_COOLDOWN_SECONDS = 60.0
+
+
+class ProviderStats:
+    """Rolling window of one provider's latencies and outcomes, plus token totals."""
+
+    def __init__(self, window: int):
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.last_error_at = 0.0
+
+    def record(self, seconds: float, ok: bool, completion: Optional[Completion] = None) -> None:
+        self.calls += 1
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(seconds)
+        else:
+            self.errors += 1
+            self.last_error_at = time.monotonic()
+        if completion is not None:
+            self.input_tokens += completion.input_tokens or 0
+            self.output_tokens += completion.output_tokens or 0
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def unhealthy(self, max_error_rate: float) -> bool:
+        recent = time.monotonic() - self.last_error_at < ERROR_COOLDOWN_SECONDS
+        return recent and self.error_rate > max_error_rate
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "error_rate": round(self.error_rate, 3),
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+class LLMRouter:
+    """Sends prompts to the healthiest, fastest provider, hedging and failing over.
+
+    Providers are ranked by recent error rate, then p50 latency, then configured order. A
+    request still running after the hedge deadline is raced against the next provider (the
+    loser is cancelled), and a failed request moves on to the next provider.
+    """
+
+    def __init__(self, providers: List[LLMProvider], hedge_after: float, max_error_rate: float):
+        if not providers:
+            raise RuntimeError("Configure at least one LLM provider in LLM_PROVIDERS.")
+        self.providers = providers
+        self.hedge_after = hedge_after
+        self.max_error_rate = max_error_rate
+        self.stats_by_provider = {p.name: ProviderStats(LLM_ROUTER_WINDOW) for p in providers}
+        self.hedges = 0
+        self.failovers = 0
+
+    @property
+    def model_tag(self) -> str:
+        """Identifies the configured models (part of the course cache key)."""
+        return ",".join(f"{p.name}:{p.model}" for p in self.providers)
+
+    def ranked(self) -> List[LLMProvider]:
+        def rank(item):
+            index, provider = item
+            stats = self.stats_by_provider[provider.name]
+            p50 = stats.percentile(0.5)
+            return (stats.unhealthy(self.max_error_rate), p50 if p50 is not None else 0.0, index)
+
+        return [provider for _, provider in sorted(enumerate(self.providers), key=rank)]
+
+    def _hedge_deadline(self, provider: LLMProvider) -> Optional[float]:
+        if self.hedge_after <= 0:
+            return None
+        p95 = self.stats_by_provider[provider.name].percentile(0.95)
+        return max(self.hedge_after, p95 or 0.0)
+
+    async def _timed(self, provider: LLMProvider, prompt: str) -> Completion:
+        stats = self.stats_by_provider[provider.name]
+        start = time.perf_counter()
+        with stage("llm", provider=provider.name, model=provider.model) as span:
+            try:
+                completion = await provider.complete(prompt)
+            except asyncio.CancelledError:
+                stats.cancelled += 1
+                raise
+            except Exception:
+                stats.record(time.perf_counter() - start, ok=False)
+                record_llm_call(provider.name, time.perf_counter() - start, ok=False)
+                raise
+            seconds = time.perf_counter() - start
+            stats.record(seconds, ok=True, completion=completion)
+            # Provider-reported prompt tokens calibrate the budget used to pack prompts.
+            token_counter.observe(len(prompt), completion.input_tokens)
+            record_llm_call(
+                provider.name, seconds, True, completion.input_tokens, completion.output_tokens
+            )
+            annotate(
+                span,
+                input_tokens=completion.input_tokens,
+                output_tokens=completion.output_tokens,
+            )
+        return completion
+
+    @staticmethod
+    def _give_up(errors: List[Tuple[str, Exception]]):
+        if len(errors) == 1:
+            raise errors[0][1]
+        detail = "; ".join(f"{name}: {exc}" for name, exc in errors)
+        raise LLMUnavailable(f"Every LLM provider failed ({detail})") from errors[-1][1]
+
+    async def complete(self, prompt: str) -> Completion:
+        order = self.ranked()
+        errors: List[Tuple[str, Exception]] = []
+        pending: Dict[asyncio.Task, LLMProvider] = {}
+
+        def launch(provider: LLMProvider) -> None:
+            pending[asyncio.create_task(self._timed(provider, prompt))] = provider
+
+        launch(order[0])
+        waiting = list(order[1:])
+        try:
+            while pending:
+                primary = next(iter(pending.values()))
+                timeout = self._hedge_deadline(primary) if waiting and len(pending) == 1 else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.hedges += 1
+                    launch(waiting.pop(0))
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append((provider.name, task.exception()))
+                if not pending and waiting:
+                    self.failovers += 1
+                    launch(waiting.pop(0))
+            self._give_up(errors)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream from the best provider, failing over only until the first chunk arrives."""
+        errors: List[Tuple[str, Exception]] = []
+        for index, provider in enumerate(self.ranked()):
+            if index:
+                self.failovers += 1
+            stats = self.stats_by_provider[provider.name]
+            start = time.perf_counter()
+            started = False
+            try:
+                async for text in provider.stream(prompt):
+                    started = True
+                    yield text
+            except Exception as exc:
+                stats.record(time.perf_counter() - start, ok=False)
+                record_llm_call(provider.name, time.perf_counter() - start, ok=False)
+                if started:
+                    raise
+                errors.append((provider.name, exc))
+                continue
+            stats.record(time.perf_counter() - start, ok=True)
+            record_llm_call(provider.name, time.perf_counter() - start, ok=True)
+            return
+        self._give_up(errors)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "order": [p.name for p in self.ranked()],
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "providers": {name: s.snapshot() for name, s in self.stats_by_provider.items()},
+        }
+
+
+_llm_router: Optional[LLMRouter] = None
+_llm_router_lock = threading.Lock()
+
+
+def get_llm_router() -> LLMRouter:
+    global _llm_router
+    with _llm_router_lock:
+        if _llm_router is None:
+            _llm_router = LLMRouter(
+                [build_provider(name) for name in LLM_PROVIDERS],
+                LLM_HEDGE_AFTER_SECONDS,
+                LLM_ROUTER_MAX_ERROR_RATE,
+            )
+        return _llm_router
@@ -0,0 +1,126 @@
+import heapq
+import math
+import re
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import RETRIEVAL_PASSAGE_CHARS
+from .chunking import split_into_chunks
+from .workers import TextMemo
+
+# Okapi BM25 parameters: term-frequency saturation and passage-length normalisation.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TERM = re.compile(r"[^\W_]{2,}")
+
+
+def _terms(text: str) -> List[str]:
+    return _TERM.findall(text.lower())
+
+
+class PassageIndex:
+    """In-memory BM25 inverted index over one document's passages.
+
+    Passages are page-aligned chunks of at most RETRIEVAL_PASSAGE_CHARS, so a unit prompt
+    can carry the few passages that match its title and objectives instead of the packed
+    document.
+    """
+
+    def __init__(self, passages: List[str]):
+        self.passages = passages
+        # Postings are flat (passage, count, passage, count, ...) arrays: an index built on the
+        # process pool then pickles back as a few buffers, not millions of small tuples.
+        self._postings: Dict[str, array] = {}
+        self._lengths = array("I")
+        for index, passage in enumerate(passages):
+            counts = Counter(_terms(passage))
+            self._lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = array("I")
+                postings.append(index)
+                postings.append(count)
+        self._average_length = sum(self._lengths) / max(1, len(passages))
+
+    @classmethod
+    def from_text(cls, text: str, passage_chars: int = RETRIEVAL_PASSAGE_CHARS) -> "PassageIndex":
+        return cls(split_into_chunks(text, passage_chars))
+
+    def _idf(self, term: str) -> float:
+        matches = len(self._postings[term]) // 2
+        return math.log1p((len(self.passages) - matches + 0.5) / (matches + 0.5))
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """The k best (passage index, score) pairs; passages sharing no term are left out."""
+        scores: Dict[int, float] = {}
+        for term in set(_terms(query)):
+            if term not in self._postings:
+                continue
+            idf = self._idf(term)
+            postings = self._postings[term]
+            for index, count in zip(postings[::2], postings[1::2]):
+                length = self._lengths[index] / max(1.0, self._average_length)
+                weight = count * (BM25_K1 + 1) / (count + BM25_K1 * (1 - BM25_B + BM25_B * length))
+                scores[index] = scores.get(index, 0.0) + idf * weight
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def excerpt(self, query: str, k: int, max_chars: int) -> Optional[str]:
+        """The top-k passages that fit max_chars, in document order; None if nothing matches."""
+        chosen, size = [], 0
+        for index, _ in self.search(query, k):
+            extra = len(self.passages[index]) + 2
+            if size + extra <= max_chars:
+                chosen.append(index)
+                size += extra
+        if not chosen:
+            return None
+        return "\n\n".join(self.passages[index] for index in sorted(chosen))
+
+
+def build_passage_index(text: str) -> PassageIndex:
+    """Top-level so the process pool can run it; the index pickles back as plain containers."""
+    return PassageIndex.from_text(text)
+
+
+# A 1000-page document takes most of a second to index, so it is built on the process pool.
+_indexes = TextMemo("passage_index", build_passage_index, max_entries=16)
+
+
+async def get_passage_index(text: str) -> PassageIndex:
+    """Index a document once per process; every unit, level and unit count reuses it.
+
+    Extraction builds it as soon as the text is known (see pipeline.extract_text), so unit
+    prompts normally find it ready.
+    """
+    return await _indexes.get(text)
+
+
+class RetrievalStats:
+    """How much source text unit prompts carry, reported under "retrieval" in /stats."""
+
+    def __init__(self):
+        self.queries = 0
+        self.fallbacks = 0
+        self.chars_sent = 0
+
+    def record(self, excerpt: Optional[str]) -> None:
+        self.queries += 1
+        if excerpt is None:
+            self.fallbacks += 1
+        else:
+            self.chars_sent += len(excerpt)
+
+    def stats(self) -> Dict[str, Any]:
+        grounded = self.queries - self.fallbacks
+        return {
+            "indexes_built": _indexes.computed,
+            "queries": self.queries,
+            "fallbacks": self.fallbacks,
+            "avg_chars_per_unit": round(self.chars_sent / grounded) if grounded else None,
+        }
+
+
+retrieval_stats = RetrievalStats()
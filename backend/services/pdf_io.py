@@ -1,107 +1,361 @@
-from io import BytesIO
+import importlib.util
+import os
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from io import BytesIO, StringIO
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
-import PyPDF2
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import cm
 from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
 
+from ..config import PDF_EXTRACTORS
+
+# Separator placed between extracted pages so later stages can split on page boundaries.
+PAGE_BREAK = "\f"
+
+# A PDF on disk (path) or already in memory (bytes).
+PdfSource = Union[str, bytes]
+
+
+class DocumentTooLarge(ValueError):
+    """Raised when an upload exceeds the configured byte or page limits."""
+
+
+class PdfBackend(ABC):
+    """One text extraction library behind a common page-by-page interface.
+
+    Libraries are imported only when a document is opened, so an extractor that is not
+    installed costs nothing unless it is configured and chosen. A subclass missing one of
+    the abstract methods fails when it is instantiated, not halfway through a document.
+    """
+
+    name = ""
+    module = ""
+
+    @classmethod
+    def installed(cls) -> bool:
+        return importlib.util.find_spec(cls.module) is not None
+
+    @abstractmethod
+    def open(self, source: PdfSource):
+        ...
+
+    @abstractmethod
+    def page_count(self, document) -> int:
+        ...
+
+    @abstractmethod
+    def page_text(self, document, index: int) -> str:
+        ...
+
+
+class PyPDF2Backend(PdfBackend):
+    name = "pypdf2"
+    module = "PyPDF2"
+
+    def _reader_class(self):
+        from PyPDF2 import PdfReader
+
+        return PdfReader
+
+    def open(self, source: PdfSource):
+        return self._reader_class()(BytesIO(source) if isinstance(source, bytes) else source)
+
+    def page_count(self, document) -> int:
+        return len(document.pages)
+
+    def page_text(self, document, index: int) -> str:
+        return document.pages[index].extract_text() or ""
+
+
+class PypdfBackend(PyPDF2Backend):
+    """pypdf is the maintained successor of PyPDF2 with the same reader API."""
+
+    name = "pypdf"
+    module = "pypdf"
+
+    def _reader_class(self):
+        from pypdf import PdfReader
+
+        return PdfReader
+
+
+class PdfiumBackend(PdfBackend):
+    """PDFium (Chrome's PDF engine) through pypdfium2: native code, by far the fastest."""
+
+    name = "pypdfium2"
+    module = "pypdfium2"
+
+    def open(self, source: PdfSource):
+        import pypdfium2
+
+        return pypdfium2.PdfDocument(source)
+
+    def page_count(self, document) -> int:
+        return len(document)
+
+    def page_text(self, document, index: int) -> str:
+        page = document[index]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range().replace("\r\n", "\n")
+        finally:
+            textpage.close()
+            page.close()
+
+
+class PdfminerBackend(PdfBackend):
+    """pdfminer.six: pure Python and slow, but its layout analysis keeps word spacing."""
+
+    name = "pdfminer"
+    module = "pdfminer"
+
+    def open(self, source: PdfSource):
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+
+        # The parser reads lazily from its stream, which lives as long as the document. Reading a
+        # path into memory means no file handle is held by a cached extractor.
+        if not isinstance(source, bytes):
+            with open(source, "rb") as pdf:
+                source = pdf.read()
+        stream = BytesIO(source)
+        return stream, list(PDFPage.create_pages(PDFDocument(PDFParser(stream))))
+
+    def page_count(self, document) -> int:
+        return len(document[1])
+
+    def page_text(self, document, index: int) -> str:
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+
+        output = StringIO()
+        manager = PDFResourceManager()
+        with TextConverter(manager, output, laparams=LAParams()) as converter:
+            PDFPageInterpreter(manager, converter).process_page(document[1][index])
+        return output.getvalue()
+
+
+PDF_BACKENDS = {
+    backend.name: backend
+    for backend in (PdfiumBackend, PypdfBackend, PyPDF2Backend, PdfminerBackend)
+}
+
+
+def build_pdf_backends(names: List[str]) -> List[PdfBackend]:
+    """Instantiate the named extractors that are installed, keeping the given order."""
+    unknown = [name for name in names if name not in PDF_BACKENDS]
+    if unknown:
+        raise RuntimeError(f"Unknown PDF extractors {unknown}; choose from {sorted(PDF_BACKENDS)}.")
+    backends = [PDF_BACKENDS[name]() for name in names if PDF_BACKENDS[name].installed()]
+    if not backends:
+        raise RuntimeError(f"None of the PDF extractors {names} is installed.")
+    return backends
+
+
+class PdfTextExtractor:
+    """Reads pages with the first backend and re-reads the pages it returns empty with the others.
+
+    A fast extractor that cannot decode a page's fonts or content streams then costs only
+    that page, not the document; one that cannot open the document at all is skipped.
+    Fallback backends open the document on first use.
+    """
+
+    def __init__(self, source: PdfSource, backends: List[PdfBackend]):
+        self.source = source
+        self.backends = backends
+        self._documents: Dict[str, object] = {}
+        self._errors: Dict[str, Exception] = {}
+
+    def _document(self, backend: PdfBackend):
+        if backend.name in self._errors:
+            raise self._errors[backend.name]
+        if backend.name not in self._documents:
+            try:
+                self._documents[backend.name] = backend.open(self.source)
+            except Exception as exc:
+                self._errors[backend.name] = exc
+                raise
+        return self._documents[backend.name]
+
+    def page_count(self) -> int:
+        error = None
+        for backend in self.backends:
+            try:
+                return backend.page_count(self._document(backend))
+            except Exception as exc:  # a document one library rejects may suit the next
+                error = exc
+        raise error
+
+    def page_text(self, index: int) -> str:
+        """Text of the page from the first backend that finds any; "" for a page with none.
+
+        Errors are raised only when every backend failed on the page.
+        """
+        error, read = None, False
+        for backend in self.backends:
+            try:
+                text = backend.page_text(self._document(backend), index)
+            except Exception as exc:
+                error = exc
+                continue
+            if text.strip():
+                return text
+            read = True
+        if not read:
+            raise error
+        return ""
+
+
+def iter_pdf_pages(file, max_pages: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of each page of a PDF path or file object, in order."""
+    source = file if isinstance(file, (str, bytes)) else file.read()
+    extractor = PdfTextExtractor(source, build_pdf_backends(PDF_EXTRACTORS))
+    total = extractor.page_count()
+    if max_pages is not None and total > max_pages:
+        raise DocumentTooLarge(f"PDF has {total} pages; the limit is {max_pages}.")
+    for index in range(total):
+        yield extractor.page_text(index)
+
+
+@lru_cache(maxsize=2)
+def _cached_extractor(path: str, mtime_ns: int, size: int) -> PdfTextExtractor:
+    # Keyed on mtime/size too, so a reused temp path never serves a stale document.
+    return PdfTextExtractor(path, build_pdf_backends(PDF_EXTRACTORS))
+
+
+def extract_page_range(path: str, start: int, stop: int) -> Tuple[int, List[str]]:
+    """Return (total page count, texts of pages [start, stop)) for a PDF on disk.
+
+    Top-level and path-based so process-pool workers can each open the file themselves;
+    a worker handling several batches of one document parses it only once.
+    """
+    stat = os.stat(path)
+    extractor = _cached_extractor(path, stat.st_mtime_ns, stat.st_size)
+    total = extractor.page_count()
+    return total, [extractor.page_text(i) for i in range(start, min(stop, total))]
+
 
 def read_pdf(file) -> str:
-    """Extract text from a PDF-like file object."""
-    reader = PyPDF2.PdfReader(file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text
-
-
-def _build_document(target):
-    return SimpleDocTemplate(
-        target,
-        pagesize=A4,
-        rightMargin=2 * cm,
-        leftMargin=2 * cm,
-        topMargin=2 * cm,
-        bottomMargin=2 * cm,
-    )
-
-
-def _build_flow(course):
-    styles = getSampleStyleSheet()
-
-    title_style = ParagraphStyle(
-        "MainTitle",
-        parent=styles["Title"],
-        fontSize=24,
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        textColor="#004576",
-    )
-    h1_style = ParagraphStyle(
-        "UnitTitle",
-        parent=styles["Heading1"],
-        fontSize=18,
-        spaceBefore=15,
-        spaceAfter=10,
-        textColor="#e61853",
-    )
-    body_style = ParagraphStyle(
-        "Body",
-        parent=styles["BodyText"],
-        fontSize=11,
-        leading=14,
-        alignment=TA_JUSTIFY,
-        spaceAfter=10,
-    )
-    obj_style = ParagraphStyle(
-        "Obj",
-        parent=styles["BodyText"],
-        fontSize=10,
-        leftIndent=20,
-        spaceAfter=5,
-    )
-
-    flow = []
-    flow.append(Paragraph(course["title"], title_style))
-    flow.append(Paragraph(f"Adaptive Level: {course['level']}", styles["Heading2"]))
-    flow.append(Paragraph(course.get("description", ""), body_style))
-    flow.append(PageBreak())
-
-    for idx, unit in enumerate(course.get("units", []), start=1):
-        flow.append(Paragraph(f"Unit {idx}: {unit.get('title', '')}", h1_style))
-        flow.append(Paragraph("Objectives:", styles["Heading3"]))
-        for obj in unit.get("objectives", []):
-            flow.append(Paragraph(f"- {obj}", obj_style))
-
-        flow.append(Spacer(1, 0.5 * cm))
-        content_lines = unit.get("content", "").split("\n")
-        for line in content_lines:
-            if line.strip():
-                flow.append(Paragraph(line, body_style))
-
-        flow.append(Spacer(1, 0.5 * cm))
-        flow.append(Paragraph("Review Quiz", styles["Heading3"]))
-        for q in unit.get("quiz_questions", []):
-            flow.append(Paragraph(f"Q: {q.get('question', '')}", styles["Italic"]))
-            flow.append(Spacer(1, 0.1 * cm))
-
-        flow.append(PageBreak())
-    return flow
+    """Extract text from a PDF path or file object."""
+    return PAGE_BREAK.join(iter_pdf_pages(file))
+
+
+class CoursePdfRenderer:
+    """Renders course dicts to PDF with styles built once and shared by every render.
+
+    ReportLab styles are immutable once built, so one renderer per process (see
+    get_pdf_renderer) serves every request handled by that process.
+    """
+
+    DOCUMENT_OPTIONS = {
+        "pagesize": A4,
+        "rightMargin": 2 * cm,
+        "leftMargin": 2 * cm,
+        "topMargin": 2 * cm,
+        "bottomMargin": 2 * cm,
+        # Fixed timestamps and document ids: the same course always renders to the same bytes.
+        "invariant": 1,
+    }
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.heading2_style = styles["Heading2"]
+        self.heading3_style = styles["Heading3"]
+        self.question_style = styles["Italic"]
+        self.title_style = ParagraphStyle(
+            "MainTitle",
+            parent=styles["Title"],
+            fontSize=24,
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            textColor="#004576",
+        )
+        self.h1_style = ParagraphStyle(
+            "UnitTitle",
+            parent=styles["Heading1"],
+            fontSize=18,
+            spaceBefore=15,
+            spaceAfter=10,
+            textColor="#e61853",
+        )
+        self.body_style = ParagraphStyle(
+            "Body",
+            parent=styles["BodyText"],
+            fontSize=11,
+            leading=14,
+            alignment=TA_JUSTIFY,
+            spaceAfter=10,
+        )
+        self.obj_style = ParagraphStyle(
+            "Obj",
+            parent=styles["BodyText"],
+            fontSize=10,
+            leftIndent=20,
+            spaceAfter=5,
+        )
+
+    def document(self, target) -> SimpleDocTemplate:
+        return SimpleDocTemplate(target, **self.DOCUMENT_OPTIONS)
+
+    def flow(self, course) -> list:
+        body_style = self.body_style
+        flow = [
+            Paragraph(course["title"], self.title_style),
+            Paragraph(f"Adaptive Level: {course['level']}", self.heading2_style),
+            Paragraph(course.get("description", ""), body_style),
+            PageBreak(),
+        ]
+        append = flow.append
+
+        for idx, unit in enumerate(course.get("units", []), start=1):
+            append(Paragraph(f"Unit {idx}: {unit.get('title', '')}", self.h1_style))
+            append(Paragraph("Objectives:", self.heading3_style))
+            for obj in unit.get("objectives", []):
+                append(Paragraph(f"- {obj}", self.obj_style))
+
+            append(Spacer(1, 0.5 * cm))
+            flow.extend(
+                Paragraph(line, body_style)
+                for line in unit.get("content", "").split("\n")
+                if line.strip()
+            )
+
+            append(Spacer(1, 0.5 * cm))
+            append(Paragraph("Review Quiz", self.heading3_style))
+            for q in unit.get("quiz_questions", []):
+                append(Paragraph(f"Q: {q.get('question', '')}", self.question_style))
+                append(Spacer(1, 0.1 * cm))
+
+            append(PageBreak())
+        return flow
+
+    def render(self, course, target) -> None:
+        self.document(target).build(self.flow(course))
+
+    def render_to_bytes(self, course) -> bytes:
+        buffer = BytesIO()
+        self.render(course, buffer)
+        return buffer.getvalue()
+
+
+@lru_cache(maxsize=1)
+def get_pdf_renderer() -> CoursePdfRenderer:
+    """Process-wide renderer (each process-pool worker builds its own once)."""
+    return CoursePdfRenderer()
 
 
 def export_course_pdf(course, filename):
     """Export a course dict to a PDF file on disk."""
-    doc = _build_document(filename)
-    doc.build(_build_flow(course))
+    get_pdf_renderer().render(course, filename)
     return filename
 
 
 def render_course_pdf_to_bytes(course) -> bytes:
     """Render a course PDF and return the raw bytes (for API responses)."""
-    buffer = BytesIO()
-    doc = _build_document(buffer)
-    doc.build(_build_flow(course))
-    buffer.seek(0)
-    return buffer.read()
+    return get_pdf_renderer().render_to_bytes(course)
@@ -0,0 +1,396 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..config import (
+    CANONICAL_UNITS,
+    MAX_PDF_PAGES,
+    MAX_UPLOAD_BYTES,
+    MULTI_LEVEL_GENERATION,
+    PASSAGE_RETRIEVAL,
+    PDF_PAGE_BATCH,
+)
+from .artifact_store import get_artifact_store
+from .course_cache import course_cache_key, get_course_cache
+from .course_generator import (
+    PROMPT_VERSION,
+    CourseBuilder,
+    extraction_char_budget,
+    generate_course_from_pdf_async,
+    generate_course_multicall_async,
+    generation_strategy,
+    iter_course_events_async,
+    stream_course_from_pdf_async,
+    validate_course_async,
+    validated_unit,
+)
+from .course_store import get_course_store
+from .course_variants import derive_course_variant
+from .document_cache import get_document_cache, is_digest
+from .json_stream import CourseStreamParser
+from .llm_router import get_llm_router
+from .passage_index import get_passage_index
+from .pdf_io import PAGE_BREAK, DocumentTooLarge, extract_page_range, render_course_pdf_to_bytes
+from .telemetry import annotate, record_bytes, stage
+from .text_prep import normalize_pages, prep_stats
+from .workers import SingleFlight, pdf_limiter, run_cpu_bound
+
+# Uploads are copied to disk in slices this size, never held in memory whole.
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+# Identical generations requested while one is already running share its result.
+generation_flight = SingleFlight("generate")
+
+# Register of the canonical course that multi-level variants are derived from; its own cache
+# key uses CANONICAL_KEY_LEVEL so it never collides with a course requested at this level.
+CANONICAL_LEVEL = "Intermediate"
+CANONICAL_KEY_LEVEL = "canonical"
+
+
+class DocumentNotFound(LookupError):
+    """Raised when a document id is not (or no longer) in the extraction cache."""
+
+
+class CourseSource:
+    """Where a course's text comes from: a spooled upload, a stored document id or raw text.
+
+    A spooled upload also carries its document id (the SHA-256 of its bytes) so its
+    extraction is cached for later requests.
+    """
+
+    def __init__(
+        self,
+        upload_path: Optional[str] = None,
+        document_id: Optional[str] = None,
+        pdf_text: Optional[str] = None,
+    ):
+        self.upload_path = upload_path
+        self.document_id = document_id
+        self.pdf_text = pdf_text
+
+    def discard(self) -> None:
+        discard_upload(self.upload_path)
+        self.upload_path = None
+        self.pdf_text = None
+
+
+def _cache_key(pdf_text: str, course_title: str, level: str, units: int) -> str:
+    return course_cache_key(
+        pdf_text, course_title, level, units, get_llm_router().model_tag, PROMPT_VERSION
+    )
+
+
+async def spool_upload(upload, max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[str, str]:
+    """Copy an async-readable upload to a temp file, hashing it on the way.
+
+    Returns (path, sha256 hex digest). Raises DocumentTooLarge past max_bytes and ValueError
+    for an empty upload; the caller owns the file and removes it with discard_upload.
+    """
+    fd, path = tempfile.mkstemp(prefix="personallearn-", suffix=".pdf")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with stage("upload") as span, os.fdopen(fd, "wb") as spooled:
+            while True:
+                chunk = await upload.read(SPOOL_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise DocumentTooLarge(f"Upload exceeds the {max_bytes}-byte limit.")
+                digest.update(chunk)
+                spooled.write(chunk)
+            annotate(span, bytes=size)
+        record_bytes("upload", size)
+        if size == 0:
+            raise ValueError("Uploaded PDF was empty.")
+    except BaseException:
+        discard_upload(path)
+        raise
+    return path, digest.hexdigest()
+
+
+def discard_upload(path: Optional[str]) -> None:
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def iter_pdf_pages_async(
+    path: str, max_pages: int = MAX_PDF_PAGES, max_chars: Optional[int] = None
+) -> AsyncIterator[str]:
+    """Yield page texts in order while batches of pages are extracted in parallel.
+
+    Keeps at most one batch per PDF worker in flight and stops scheduling work once
+    max_chars of text has been produced.
+    """
+    total, pages = await run_cpu_bound(extract_page_range, path, 0, PDF_PAGE_BATCH)
+    if total > max_pages:
+        raise DocumentTooLarge(f"PDF has {total} pages; the limit is {max_pages}.")
+
+    # The first batch stays small for a quick early stop; the rest is split so every worker
+    # gets a few large batches instead of paying the per-batch overhead many times.
+    batch = max(PDF_PAGE_BATCH, -(-(total - PDF_PAGE_BATCH) // (pdf_limiter.limit * 4)))
+    batches = deque(
+        (start, min(start + batch, total)) for start in range(PDF_PAGE_BATCH, total, batch)
+    )
+    in_flight: deque = deque()
+    chars = 0
+    try:
+        while True:
+            while batches and len(in_flight) < pdf_limiter.limit:
+                start, stop = batches.popleft()
+                in_flight.append(
+                    asyncio.ensure_future(run_cpu_bound(extract_page_range, path, start, stop))
+                )
+            for page in pages:
+                yield page
+                chars += len(page)
+                if max_chars is not None and chars >= max_chars:
+                    return
+            if not in_flight:
+                return
+            _, pages = await in_flight.popleft()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+def _within_budget(pages: List[str], max_chars: Optional[int]) -> List[str]:
+    """Leading pages up to the one that reaches max_chars, matching an early-stopped extraction."""
+    if max_chars is None:
+        return pages
+    chars = 0
+    for index, page in enumerate(pages):
+        chars += len(page)
+        if chars >= max_chars:
+            return pages[: index + 1]
+    return pages
+
+
+async def load_document_pages(source: CourseSource, max_chars: Optional[int]) -> List[str]:
+    """Return a document's page texts, reusing the extraction cache whenever it has enough."""
+    cache = get_document_cache()
+    entry = cache.get(source.document_id) if source.document_id else None
+    if entry is not None and (
+        entry["complete"]
+        or (max_chars is not None and sum(len(page) for page in entry["pages"]) >= max_chars)
+    ):
+        return _within_budget(entry["pages"], max_chars)
+    if not source.upload_path:
+        if entry is not None:
+            # Cut at a smaller budget by an earlier configuration; still the document's text.
+            return entry["pages"]
+        raise DocumentNotFound("Unknown or expired document id; upload the PDF again.")
+
+    pages = []
+    async for page in iter_pdf_pages_async(source.upload_path, max_chars=max_chars):
+        pages.append(page)
+    if source.document_id:
+        complete = max_chars is None or sum(len(page) for page in pages) < max_chars
+        cache.put(source.document_id, pages, complete)
+    return pages
+
+
+async def extract_text(source: CourseSource) -> str:
+    """Stage 1: turn an upload, stored document or raw text into the generator's input.
+
+    The text is normalized (whitespace, page numbers, running headers/footers) so prompts and
+    cache keys are not spent on layout noise.
+    """
+    if not source.upload_path and not source.document_id:
+        pages = (source.pdf_text or "").split(PAGE_BREAK)
+    else:
+        with stage("extract") as span:
+            pages = await load_document_pages(source, extraction_char_budget())
+            annotate(span, pages=len(pages), chars=sum(len(page) for page in pages))
+    with stage("preprocess") as span:
+        raw_chars = sum(len(page) for page in pages)
+        cleaned, lines_dropped = await run_cpu_bound(normalize_pages, pages)
+        text = PAGE_BREAK.join(cleaned)
+        prep_stats.record(raw_chars, len(text), lines_dropped)
+        annotate(span, chars_in=raw_chars, chars_out=len(text), lines_dropped=lines_dropped)
+    if PASSAGE_RETRIEVAL and generation_strategy(text) != "single":
+        # Per-unit prompts retrieve from this index; build it now, on the pool, with the text.
+        with stage("index"):
+            await get_passage_index(text)
+    return text
+
+
+def derives_variants(units: int) -> bool:
+    """Whether a course of this size is derived from the canonical course (multi-level mode)."""
+    return MULTI_LEVEL_GENERATION and units <= CANONICAL_UNITS
+
+
+async def _generate_and_cache(
+    cache_key: str, pdf_text: str, course_title: str, level: str, units: int
+) -> Dict[str, Any]:
+    """Generate a course with the strategy for its text, or join the identical one in flight."""
+    cache = get_course_cache()
+
+    async def generate():
+        if generation_strategy(pdf_text) != "single":
+            course = await generate_course_multicall_async(pdf_text, course_title, level, units)
+        else:
+            course = await generate_course_from_pdf_async(pdf_text, course_title, level, units)
+        await cache.set_async(cache_key, course)
+        return course
+
+    return await generation_flight.run(cache_key, generate)
+
+
+async def canonical_course(
+    pdf_text: str, course_title: str, force_refresh: bool = False
+) -> Dict[str, Any]:
+    """The document's fine-grained course that every multi-level variant is derived from."""
+    cache_key = _cache_key(pdf_text, course_title, CANONICAL_KEY_LEVEL, CANONICAL_UNITS)
+    cached = None if force_refresh else await get_course_cache().get_async(cache_key)
+    if cached is not None:
+        return cached
+    return await _generate_and_cache(
+        cache_key, pdf_text, course_title, CANONICAL_LEVEL, CANONICAL_UNITS
+    )
+
+
+async def generate_course(
+    pdf_text: str,
+    course_title: str,
+    level: str,
+    units: int,
+    force_refresh: bool = False,
+) -> Dict[str, Any]:
+    """Stage 2: return a cached course or generate (and cache) a fresh one.
+
+    Concurrent requests for the same course join the generation already in flight. In
+    multi-level mode the course is derived from the document's canonical course, so every
+    level shares one generation.
+    Raises RuntimeError for configuration problems and ValueError for unusable model output.
+    """
+    cache = get_course_cache()
+    cache_key = _cache_key(pdf_text, course_title, level, units)
+    strategy = generation_strategy(pdf_text)
+    with stage("generate", strategy=strategy, chars=len(pdf_text)) as span:
+        if not force_refresh:
+            cached = await cache.get_async(cache_key)
+            if cached is not None:
+                annotate(span, cache_hit=True)
+                return cached
+        annotate(span, cache_hit=False, derived=derives_variants(units))
+        if derives_variants(units):
+            canonical = await canonical_course(pdf_text, course_title, force_refresh)
+            course = derive_course_variant(canonical, level, units)
+            await cache.set_async(cache_key, course)
+            return course
+        return await _generate_and_cache(cache_key, pdf_text, course_title, level, units)
+
+
+async def stream_course(
+    pdf_text: str,
+    course_title: str,
+    level: str,
+    units: int,
+    force_refresh: bool = False,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stage 2, streamed: yield field/unit events as the model writes them, then `done`.
+
+    A cached course is replayed as the same event sequence so clients need only one code path.
+    """
+    cache = get_course_cache()
+    cache_key = _cache_key(pdf_text, course_title, level, units)
+    course = None if force_refresh else await cache.get_async(cache_key)
+
+    if course is None and derives_variants(units):
+        # Variants come from the canonical course in one piece; they are replayed like a hit.
+        course = await generate_course(pdf_text, course_title, level, units, force_refresh)
+
+    if course is not None:
+        for name, value in course.items():
+            if name != "units":
+                yield {"type": "field", "name": name, "value": value}
+        for index, unit in enumerate(course.get("units", [])):
+            yield {"type": "unit", "index": index, "unit": unit}
+    elif generation_strategy(pdf_text) != "single":
+        builder = CourseBuilder()
+        async for event in iter_course_events_async(pdf_text, course_title, level, units):
+            builder.add(event)
+            yield event
+        course = builder.build()
+        await cache.set_async(cache_key, course)
+    else:
+        parser = CourseStreamParser()
+        sent = set()
+        async for chunk in stream_course_from_pdf_async(pdf_text, course_title, level, units):
+            for event in parser.feed(chunk):
+                if event["type"] == "unit":
+                    # Only the validated form is sent, the same dict the final course holds;
+                    # invalid or surplus units wait for the repair pass below.
+                    unit = validated_unit(event["unit"]) if event["index"] < units else None
+                    if unit is None:
+                        continue
+                    event = {**event, "unit": unit}
+                    sent.add(event["index"])
+                yield event
+        course = await validate_course_async(parser.buffer, pdf_text, course_title, level, units)
+        # Units that were missing or repaired after the stream ended are sent now, once each.
+        for index, unit in enumerate(course["units"]):
+            if index not in sent:
+                yield {"type": "unit", "index": index, "unit": unit}
+        await cache.set_async(cache_key, course)
+
+    yield {"type": "done", "course": course}
+
+
+async def render_pdf(course: Dict[str, Any]) -> bytes:
+    """Stage 3: render the course PDF on the process pool."""
+    with stage("render") as span:
+        pdf_bytes = await run_cpu_bound(render_course_pdf_to_bytes, course)
+        annotate(span, bytes=len(pdf_bytes))
+    record_bytes("pdf", len(pdf_bytes))
+    return pdf_bytes
+
+
+async def course_pdf_path(course_id: str) -> Optional[str]:
+    """Path of the stored PDF for a course id, rendering it on first request; None if unknown.
+
+    Artifacts are evicted after ARTIFACT_MAX_COURSES courses, but the course store keeps every
+    course, so an evicted course is restored from there and rendered again.
+    """
+    store = get_artifact_store()
+    path = store.find_pdf(course_id)
+    if path is not None:
+        return path
+    course = store.load_course(course_id)
+    if course is None:
+        stored = get_course_store().get(course_id, ("course",)) if is_digest(course_id) else None
+        if stored is None:
+            return None
+        course = stored["course"]
+        store.save_course(course, course_id)
+    return store.save_pdf(course_id, await render_pdf(course))
+
+
+def source_document_id(source: CourseSource, pdf_text: str) -> str:
+    """The upload's SHA-256, or the text's for raw pdf_text, to group courses by document."""
+    return source.document_id or hashlib.sha256(pdf_text.encode("utf-8")).hexdigest()
+
+
+def save_course(
+    course: Dict[str, Any], document_id: Optional[str] = None, owner: Optional[str] = None
+) -> str:
+    """Keep a generated course for PDF downloads and GET /courses; returns its course id."""
+    course_id = get_artifact_store().save_course(course)
+    get_course_store().save(course_id, course, document_id, owner)
+    return course_id
+
+
+async def store_course_pdf(
+    course: Dict[str, Any], document_id: Optional[str] = None, owner: Optional[str] = None
+) -> Tuple[str, str]:
+    """Save the course and make sure its PDF is rendered; returns (course id, PDF path)."""
+    course_id = save_course(course, document_id, owner)
+    return course_id, await course_pdf_path(course_id)
@@ -0,0 +1,175 @@
+import gzip
+from typing import Any, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib encoder produces the same JSON
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+from ..config import BROTLI_QUALITY, COMPRESSION_MIN_BYTES, GZIP_LEVEL
+
+# Content types worth compressing; PDFs and zips are already compressed.
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+# Server preference, best ratio first; brotli only when the module is installed.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed; same bytes layout, less CPU."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """The preferred encoding in ENCODINGS that the Accept-Encoding header allows."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _encoded_etag(etag: str, encoding: str) -> str:
+    # A strong validator must differ per content-coding: "abc" becomes "abc-br".
+    return etag[:-1] + f'-{encoding}"' if etag.endswith('"') else etag
+
+
+def matching_etag(if_none_match: Optional[str], etag: str, accept_encoding: str) -> Optional[str]:
+    """The If-None-Match tag that names `etag` as this request would receive it.
+
+    Matches the plain tag and the suffix `negotiate_encoding` picks for `accept_encoding`, so a
+    client that no longer accepts br gets a full response rather than a 304 for `"abc-br"`.
+    Returns the variant the client holds so a 304 echoes it back; `etag` itself for `*`; None
+    when nothing matches.
+    """
+    if not if_none_match:
+        return None
+    variants = {etag}
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is not None:
+        variants.add(_encoded_etag(etag, encoding))
+    for candidate in if_none_match.split(","):
+        tag = candidate.strip().removeprefix("W/")
+        if tag == "*":
+            return etag
+        if tag in variants:
+            return tag
+    return None
+
+
+class CompressionStats:
+    """Bytes before and after compression per encoding, reported under "compression"."""
+
+    def __init__(self):
+        self.encodings: Dict[str, Dict[str, int]] = {}
+
+    def record(self, encoding: str, before: int, after: int) -> None:
+        totals = self.encodings.setdefault(
+            encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0}
+        )
+        totals["responses"] += 1
+        totals["bytes_in"] += before
+        totals["bytes_out"] += after
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": list(ENCODINGS),
+            "minimum_bytes": COMPRESSION_MIN_BYTES,
+            "encodings": self.encodings,
+        }
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing whole JSON/text bodies of at least `minimum_size` bytes.
+
+    Only single-message bodies are compressed; streamed responses (SSE, zips, files) pass
+    through untouched, so a stream is never buffered.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    def _compressible(self, start: Dict[str, Any], body: bytes) -> bool:
+        if start["status"] in (204, 304) or len(body) < self.minimum_size:
+            return False
+        headers = Headers(raw=start["headers"])
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type != "text/event-stream" and content_type.startswith(
+            COMPRESSIBLE_TYPES
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        pending: Optional[Dict[str, Any]] = None
+
+        async def compressing_send(message):
+            nonlocal pending
+            if message["type"] == "http.response.start":
+                pending = message  # held until the first body message shows what follows
+                return
+            start, pending = pending, None
+            if start is None:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            if (
+                message["type"] != "http.response.body"
+                or message.get("more_body", False)
+                or not self._compressible(start, body)
+            ):
+                await send(start)
+                await send(message)
+                return
+            compressed = compress(encoding, body)
+            compression_stats.record(encoding, len(body), len(compressed))
+            headers = MutableHeaders(raw=list(start["headers"]))
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            if "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers:
+                headers["ETag"] = _encoded_etag(headers["etag"], encoding)
+            await send({**start, "headers": headers.raw})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, compressing_send)
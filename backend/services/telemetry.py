@@ -0,0 +1,152 @@
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+try:
+    from opentelemetry import trace
+except ImportError:  # spans are optional; metrics work without OpenTelemetry installed
+    trace = None
+
+_tracer = trace.get_tracer("personallearn.backend") if trace is not None else None
+
+# Course generations take tens of seconds, so the buckets reach further than the defaults.
+_SLOW_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "personallearn_stage_seconds",
+    "Time spent in each course pipeline stage.",
+    ["stage"],
+    buckets=_SLOW_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "personallearn_llm_call_seconds",
+    "Latency of individual LLM calls.",
+    ["provider", "outcome"],
+    buckets=_SLOW_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "personallearn_llm_tokens_total",
+    "Tokens sent to and received from LLM providers.",
+    ["provider", "direction"],
+)
+PIPELINE_BYTES = Counter(
+    "personallearn_pipeline_bytes_total",
+    "Bytes flowing through the pipeline: uploads in, rendered PDFs out.",
+    ["kind"],
+)
+HTTP_SECONDS = Histogram(
+    "personallearn_http_request_seconds",
+    "HTTP request latency by route.",
+    ["method", "route", "status"],
+    buckets=_SLOW_BUCKETS,
+)
+HTTP_BYTES = Counter(
+    "personallearn_http_bytes_total",
+    "HTTP body bytes by route and direction.",
+    ["route", "direction"],
+)
+
+
+@contextmanager
+def stage(name: str, **attributes):
+    """Time a pipeline stage into STAGE_SECONDS and, when OpenTelemetry is present, a span.
+
+    Yields the span (or None) so callers can attach results such as page or token counts.
+    """
+    start = time.perf_counter()
+    span_context = (
+        _tracer.start_as_current_span(f"course.{name}", attributes=attributes)
+        if _tracer is not None
+        else nullcontext()
+    )
+    with span_context as span:
+        try:
+            yield span
+        finally:
+            STAGE_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+
+def annotate(span, **attributes) -> None:
+    if span is not None:
+        for key, value in attributes.items():
+            if value is not None:
+                span.set_attribute(key, value)
+
+
+def record_llm_call(
+    provider: str,
+    seconds: float,
+    ok: bool,
+    input_tokens: Optional[int] = None,
+    output_tokens: Optional[int] = None,
+) -> None:
+    LLM_SECONDS.labels(provider, "ok" if ok else "error").observe(seconds)
+    if input_tokens:
+        LLM_TOKENS.labels(provider, "input").inc(input_tokens)
+    if output_tokens:
+        LLM_TOKENS.labels(provider, "output").inc(output_tokens)
+
+
+def record_bytes(kind: str, count: int) -> None:
+    PIPELINE_BYTES.labels(kind).inc(count)
+
+
+def render_metrics():
+    """Prometheus exposition for this process, or for all workers in multiprocess mode."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and body bytes per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        received = 0
+        sent = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal sent, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            # The route template keeps label cardinality bounded (ids stay out of labels).
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_SECONDS.labels(scope["method"], route, str(status)).observe(
+                time.perf_counter() - start
+            )
+            HTTP_BYTES.labels(route, "in").inc(received)
+            HTTP_BYTES.labels(route, "out").inc(sent)
@@ -0,0 +1,245 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from ..config import PROMPT_TOKEN_BUDGET
+from .chunking import split_into_chunks
+from .workers import TextMemo
+
+# Lines this close to the top or bottom of a page are checked for headers, footers and numbers.
+EDGE_LINES = 3
+# A line at a page edge repeated on at least this share of pages is a running header/footer.
+RUNNING_LINE_MIN_SHARE = 0.4
+# Headers and footers are short; longer edge lines are body text even when they look alike.
+RUNNING_LINE_MAX_CHARS = 80
+# Packing works on sections of about this size, never splitting a page that fits.
+SECTION_CHARS = 2000
+# Longest title derived from a document's first line.
+TITLE_MAX_CHARS = 80
+# Typical characters per token for Latin-script text, before any calibration.
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+_SPACES = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_DIGITS = re.compile(r"\d+")
+# Well-formed roman numerals up to 399, lowercase only as front matter is numbered: in capitals
+# "I", "CLI" or "LI" are more often words or acronyms than page numbers.
+_ROMAN = r"(?=[ivxlc])c{0,3}(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3})"
+_PAGE_NUMBER = re.compile(
+    r"^(?i:page\s*)?[-–—]?\s*(?:\d{1,4}|" + _ROMAN + r")\s*[-–—]?"
+    r"(?:\s*(?:/|(?i:of))\s*\d{1,4})?$"
+)
+_WORD = re.compile(r"[^\W\d_]{3,}")
+_SENTENCE_END = re.compile(r"[.!?](\s|$)")
+
+
+def _clean_lines(page: str) -> List[str]:
+    """Collapse runs of spaces and keep at most one blank line in a row."""
+    lines: List[str] = []
+    for line in page.splitlines():
+        line = _SPACES.sub(" ", line).strip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _line_key(line: str) -> str:
+    # "Chapter 2 - page 14" and "Chapter 2 - page 15" are the same running footer.
+    return _DIGITS.sub("#", line.lower())
+
+
+def _edge_indexes(lines: List[str]) -> List[int]:
+    """Short lines among the first and last EDGE_LINES non-blank lines of a page.
+
+    A short page has fewer edge lines, so at least one line in its middle is never an edge.
+    """
+    filled = [index for index, line in enumerate(lines) if line]
+    count = min(EDGE_LINES, max(1, (len(filled) - 1) // 2))
+    edges = set(filled[:count] + filled[-count:])
+    return sorted(index for index in edges if len(lines[index]) <= RUNNING_LINE_MAX_CHARS)
+
+
+def normalize_pages(pages: List[str]) -> Tuple[List[str], int]:
+    """Clean extracted page texts for a prompt; returns (pages, number of lines dropped).
+
+    Whitespace runs are collapsed, and page numbers and running headers/footers (lines at a
+    page edge repeated across pages) are removed. Empty pages are dropped.
+    """
+    page_lines = [_clean_lines(page) for page in pages]
+    repeated = set()
+    if len(page_lines) >= 3:
+        seen = Counter()
+        for lines in page_lines:
+            # A header appears once per page; a pattern repeated within a page is body text.
+            on_page = Counter(_line_key(line) for line in lines)
+            edge_keys = {_line_key(lines[index]) for index in _edge_indexes(lines)}
+            seen.update(key for key in edge_keys if on_page[key] == 1)
+        threshold = max(3, RUNNING_LINE_MIN_SHARE * len(page_lines))
+        repeated = {key for key, count in seen.items() if count >= threshold}
+
+    cleaned: List[str] = []
+    dropped = 0
+    for lines in page_lines:
+        edges = _edge_indexes(lines)
+        numbers = {index for index in edges if _PAGE_NUMBER.match(lines[index])}
+        drop = numbers | {index for index in edges if _line_key(lines[index]) in repeated}
+        if all(index in drop for index, line in enumerate(lines) if line):
+            # Every line looked like a running header: the page is its own text, keep it.
+            drop = numbers
+        dropped += len(drop)
+        text = "\n".join(line for index, line in enumerate(lines) if index not in drop).strip()
+        if text:
+            cleaned.append(re.sub(r"\n{3,}", "\n\n", text))
+    return cleaned, dropped
+
+
+def document_title(pages: List[str]) -> str:
+    """A short title for a stored document: the first line of its normalized text.
+
+    Page numbers and running headers are removed first, so a header printed on every page
+    never names the document.
+    """
+    cleaned, _ = normalize_pages(pages)
+    for page in cleaned:
+        for line in page.splitlines():
+            if line and not _PAGE_NUMBER.match(line):
+                return line[:TITLE_MAX_CHARS].strip()
+    return ""
+
+
+class TokenCounter:
+    """Estimates prompt tokens from text length.
+
+    The characters-per-token ratio starts at a typical value for Latin-script text and is
+    calibrated against the prompt token counts the providers' tokenizers report, so it
+    follows the configured model and the language of the documents.
+    """
+
+    def __init__(self, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN):
+        self.chars_per_token = chars_per_token
+        self.samples = 0
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def chars_for(self, tokens: int) -> int:
+        return int(tokens * self.chars_per_token)
+
+    def observe(self, chars: int, tokens: int) -> None:
+        if chars <= 0 or not tokens:
+            return
+        ratio = min(8.0, max(1.0, chars / tokens))
+        # Running mean for the first samples, then an exponential moving average.
+        weight = max(0.05, 1.0 / (self.samples + 1))
+        self.chars_per_token += weight * (ratio - self.chars_per_token)
+        self.samples += 1
+
+
+token_counter = TokenCounter()
+
+
+def _section_scores(sections: List[str]) -> List[float]:
+    """Score sections by how many of the document's recurring terms they cover per character.
+
+    Terms found in many sections are the document's subject; sections that mostly hold
+    numbers, tables of contents or one-off names score low.
+    """
+    terms = [set(_WORD.findall(section.lower())) for section in sections]
+    frequency = Counter(term for section_terms in terms for term in section_terms)
+    scores = []
+    for section, section_terms in zip(sections, terms):
+        letters = sum(character.isalpha() for character in section)
+        coverage = sum(math.log1p(frequency[term]) for term in section_terms)
+        scores.append(coverage * letters / max(1, len(section)) ** 2)
+    return scores
+
+
+def _cut_at_sentence(text: str, max_chars: int) -> str:
+    head = text[:max_chars]
+    ends = [match.end() for match in _SENTENCE_END.finditer(head)]
+    return head[: ends[-1]].rstrip() if ends and ends[-1] > max_chars // 2 else head
+
+
+@lru_cache(maxsize=32)
+def _pack(text: str, max_chars: int) -> Tuple[str, int]:
+    sections = split_into_chunks(text, SECTION_CHARS)
+    if not sections:
+        return "", 0
+    scores = _section_scores(sections)
+    # The opening section (title, introduction) always goes first in the queue.
+    order = [0] + sorted(range(1, len(sections)), key=lambda index: -scores[index])
+    chosen, size = set(), 0
+    for index in order:
+        extra = len(sections[index]) + 2
+        if size + extra <= max_chars:
+            chosen.add(index)
+            size += extra
+    if not chosen:
+        return _cut_at_sentence(sections[0], max_chars), len(sections)
+    return "\n\n".join(sections[i] for i in sorted(chosen)), len(sections) - len(chosen)
+
+
+def pack_text(text: str, budget_tokens: int = PROMPT_TOKEN_BUDGET) -> str:
+    """Fit text into a prompt's token budget, keeping the highest-value sections in order.
+
+    Text that already fits is returned unchanged; otherwise whole sections are dropped
+    (lowest score first) rather than cutting the document off mid-sentence.
+    """
+    max_chars = token_counter.chars_for(budget_tokens)
+    if len(text) <= max_chars:
+        return text
+    packed, dropped = _pack(text, max_chars)
+    prep_stats.packed += 1
+    prep_stats.sections_dropped += dropped
+    return packed
+
+
+# Packing a 1000-page document takes about a second; async callers run it on the pool.
+_packed = TextMemo("pack", _pack, max_entries=32)
+
+
+async def pack_text_async(text: str, budget_tokens: int = PROMPT_TOKEN_BUDGET) -> str:
+    """pack_text for request handlers: sections are scored on the process pool, not the loop."""
+    max_chars = token_counter.chars_for(budget_tokens)
+    if len(text) <= max_chars:
+        return text
+    packed, dropped = await _packed.get(text, max_chars)
+    prep_stats.packed += 1
+    prep_stats.sections_dropped += dropped
+    return packed
+
+
+class PrepStats:
+    """Effect of text preprocessing, reported under "text_prep" in /stats."""
+
+    def __init__(self):
+        self.documents = 0
+        self.chars_in = 0
+        self.chars_out = 0
+        self.lines_dropped = 0
+        self.packed = 0
+        self.sections_dropped = 0
+
+    def record(self, chars_in: int, chars_out: int, lines_dropped: int) -> None:
+        self.documents += 1
+        self.chars_in += chars_in
+        self.chars_out += chars_out
+        self.lines_dropped += lines_dropped
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": self.documents,
+            "chars_in": self.chars_in,
+            "chars_out": self.chars_out,
+            "lines_dropped": self.lines_dropped,
+            "packed_prompts": self.packed,
+            "sections_dropped": self.sections_dropped,
+            "prompt_token_budget": PROMPT_TOKEN_BUDGET,
+            "chars_per_token": round(token_counter.chars_per_token, 3),
+        }
+
+
+prep_stats = PrepStats()
@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..config import LLM_MAX_CONCURRENCY, PDF_WORKERS
+
+
+class ConcurrencyLimiter:
+    """Async semaphore that also reports how many callers are waiting or running."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self._semaphore = asyncio.Semaphore(self.limit)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+        }
+
+
+class TokenBucket:
+    """Async token bucket holding calls to `per_minute` on average, with bursts up to `burst`.
+
+    A rate of 0 disables the bucket. All callers share one event loop, so the refill and
+    take below never interleave and need no lock.
+    """
+
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self.waiting = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        self.waiting += 1
+        try:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        if self.rate > 0:
+            self._refill()
+        return {
+            "per_minute": self.rate * 60,
+            "burst": self.capacity,
+            "tokens": round(self._tokens, 2),
+            "waiting": self.waiting,
+        }
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one shared task.
+
+    The first caller (the leader) starts the work; callers arriving while it runs await the
+    same result or exception. The work runs as its own task, so a leader that disconnects
+    does not cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, make_call: Callable[[], Awaitable[Any]]):
+        task = self._tasks.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(make_call())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _task: self._tasks.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._tasks),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+class FairQueue:
+    """Bounded queue that serves its keys (e.g. batches) round-robin.
+
+    Each key has its own FIFO and get() takes one item from the next key in turn, so a batch
+    of hundreds of items delays a later, smaller batch by at most one item per worker.
+    """
+
+    def __init__(self, name: str, max_items: int):
+        self.name = name
+        self.max_items = max_items
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._ready = asyncio.Condition()
+        self.size = 0
+        self.served = 0
+
+    async def put_many(self, key: str, items: List[Any]) -> None:
+        if self.size + len(items) > self.max_items:
+            raise RuntimeError(f"The {self.name} queue is full; retry once queued work drains.")
+        async with self._ready:
+            self._queues.setdefault(key, deque()).extend(items)
+            self.size += len(items)
+            self._ready.notify(len(items))
+
+    async def get(self) -> Tuple[str, Any]:
+        async with self._ready:
+            await self._ready.wait_for(lambda: self.size > 0)
+            key, items = self._queues.popitem(last=False)
+            item = items.popleft()
+            if items:
+                self._queues[key] = items  # back of the line
+            self.size -= 1
+            self.served += 1
+            return key, item
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.size,
+            "keys": len(self._queues),
+            "max_items": self.max_items,
+            "served": self.served,
+        }
+
+
+pdf_limiter = ConcurrencyLimiter("pdf", PDF_WORKERS)
+llm_limiter = ConcurrencyLimiter("llm", LLM_MAX_CONCURRENCY)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=pdf_limiter.limit)
+        return _process_pool
+
+
+async def run_cpu_bound(fn: Callable, *args):
+    """Run a picklable callable on the PDF process pool without blocking the event loop.
+
+    Calls beyond the pool size wait on the limiter instead of the executor's internal queue,
+    so the queue depth stays visible in the stats.
+    """
+    async with pdf_limiter.slot():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_process_pool(), fn, *args)
+
+
+class TextMemo:
+    """Per-process memo of a CPU-bound function of one large text, computed on the pool.
+
+    Entries are keyed by the text's SHA-256 (plus any extra arguments), so a multi-megabyte
+    document is not also held as a dict key. Concurrent misses for one key share a single
+    pool call, and the least recently used entries are dropped past max_entries.
+    """
+
+    def __init__(self, name: str, fn: Callable, max_entries: int):
+        self.name = name
+        self.fn = fn
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._flight = SingleFlight(name)
+        self.computed = 0
+
+    async def get(self, text: str, *args):
+        key = (hashlib.sha256(text.encode("utf-8")).hexdigest(), *args)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        async def compute():
+            value = await run_cpu_bound(self.fn, text, *args)
+            self.computed += 1
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+
+        return await self._flight.run(repr(key), compute)
+
+
+def worker_stats() -> Dict[str, Any]:
+    return {"pdf": pdf_limiter.stats(), "llm": llm_limiter.stats()}
+
+
+def shutdown_workers() -> None:
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
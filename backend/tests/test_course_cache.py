@@ -0,0 +1,164 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from backend.services import course_cache
+from backend.services.course_cache import (
+    CourseCache,
+    MemoryCourseCache,
+    SQLiteCourseCache,
+    course_cache_key,
+)
+
+
+def course(title, size=0):
+    return {"title": title, "units": [], "description": "x" * size}
+
+
+class Clock:
+    """Stands in for time.monotonic/time.time so expiry and recency are deterministic."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(course_cache.time, "monotonic", clock)
+    monkeypatch.setattr(course_cache.time, "time", clock)
+    return clock
+
+
+def payload_size(value):
+    return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+def test_key_covers_every_input():
+    args = ["text", "Title", "Beginner", 4, "fake:model", "6"]
+    key = course_cache_key(*args)
+    assert key == course_cache_key(*args)
+    for index, changed in enumerate(["text!", "Title!", "Advanced", 5, "other:model", "7"]):
+        assert course_cache_key(*args[:index], changed, *args[index + 1 :]) != key
+
+
+def test_disabled_cache_stores_nothing_and_counts_misses():
+    cache = CourseCache()
+    cache.set("k", course("A"))
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_memory_cache_counts_hits_and_returns_copies(clock):
+    cache = MemoryCourseCache(max_entries=4, max_bytes=10_000, ttl_seconds=60)
+    cache.set("k", course("A"))
+    first = cache.get("k")
+    first["title"] = "changed"
+    assert cache.get("k") == course("A")
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 1, 2 / 3)
+
+
+def test_memory_cache_expires_entries_after_the_ttl(clock):
+    cache = MemoryCourseCache(max_entries=4, max_bytes=10_000, ttl_seconds=60)
+    cache.set("k", course("A"))
+    clock.now += 59
+    assert cache.get("k") is not None
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_memory_cache_evicts_least_recently_used_past_max_entries(clock):
+    cache = MemoryCourseCache(max_entries=2, max_bytes=10_000, ttl_seconds=60)
+    cache.set("a", course("A"))
+    cache.set("b", course("B"))
+    cache.get("a")  # a is now the most recently used
+    cache.set("c", course("C"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_memory_cache_evicts_by_total_bytes(clock):
+    size = payload_size(course("A", 100))
+    cache = MemoryCourseCache(max_entries=10, max_bytes=2 * size + 10, ttl_seconds=60)
+    for key in "abc":
+        cache.set(key, course(key.upper(), 100))
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 2 * size
+    # Replacing an entry does not count its old size twice.
+    cache.set("c", course("C", 100))
+    assert cache.stats()["bytes"] == 2 * size
+
+
+def test_memory_cache_skips_a_course_larger_than_the_whole_budget(clock):
+    cache = MemoryCourseCache(max_entries=10, max_bytes=50, ttl_seconds=60)
+    cache.set("small", course("S"))
+    cache.set("big", course("B", 100))
+    assert cache.get("big") is None
+    assert cache.get("small") is not None
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path, clock):
+    path = str(tmp_path / "cache" / "courses.sqlite3")
+    writer = SQLiteCourseCache(path, max_entries=10, ttl_seconds=60)
+    writer.set("k", course("A"))
+    reader = SQLiteCourseCache(path, max_entries=10, ttl_seconds=60)
+    assert reader.get("k") == course("A")
+    assert reader.stats()["entries"] == 1
+
+
+def test_sqlite_cache_expires_entries_after_the_ttl(tmp_path, clock):
+    cache = SQLiteCourseCache(str(tmp_path / "c.sqlite3"), max_entries=10, ttl_seconds=60)
+    cache.set("k", course("A"))
+    clock.now += 61
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_sqlite_cache_evicts_least_recently_accessed(tmp_path, clock):
+    cache = SQLiteCourseCache(str(tmp_path / "c.sqlite3"), max_entries=2, ttl_seconds=600)
+    for key in "ab":
+        cache.set(key, course(key.upper()))
+        clock.now += 1
+    cache.get("a")  # refreshes a's access time past b's
+    clock.now += 1
+    cache.set("c", course("C"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_sqlite_cache_is_used_off_the_event_loop(tmp_path, monkeypatch):
+    cache = SQLiteCourseCache(str(tmp_path / "c.sqlite3"), max_entries=10, ttl_seconds=60)
+    threads = []
+    real_get = cache.get
+
+    def recording_get(key):
+        threads.append(threading.current_thread())
+        return real_get(key)
+
+    monkeypatch.setattr(cache, "get", recording_get)
+
+    async def scenario():
+        await cache.set_async("k", course("A"))
+        return await cache.get_async("k")
+
+    assert asyncio.run(scenario()) == course("A")
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_memory_cache_async_access_stays_on_the_loop():
+    cache = MemoryCourseCache(max_entries=4, max_bytes=10_000, ttl_seconds=60)
+
+    async def scenario():
+        await cache.set_async("k", course("A"))
+        return await cache.get_async("k")
+
+    assert not cache.blocking
+    assert asyncio.run(scenario()) == course("A")
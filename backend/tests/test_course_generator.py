@@ -0,0 +1,152 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.services import course_generator
+from backend.services.course_generator import (
+    _salvage_course,
+    parse_model_json,
+    parse_stats,
+    validate_course_async,
+)
+from backend.services.llm_providers import Completion, FakeProvider
+
+SOURCE = "Cells are the unit of life. Membranes control what enters a cell."
+
+
+def unit(title, content="Body text."):
+    return {"title": title, "content": content, "objectives": [f"Know {title}"]}
+
+
+def course_json(units, **header):
+    return json.dumps({"title": "Cells", "level": "Beginner", "units": units, **header})
+
+
+class StubRouter:
+    """Returns scripted answers in order, then the fake provider's answer to each prompt."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.prompts = []
+        self.fake = FakeProvider(latency=0.0, unit_chars=40)
+
+    async def complete(self, prompt):
+        self.prompts.append(prompt)
+        text = self.answers.pop(0) if self.answers else json.dumps(self.fake.answer(prompt))
+        return Completion(text=text, provider="stub", model="stub")
+
+
+@pytest.fixture
+def stub_router(monkeypatch):
+    def install(*answers):
+        router = StubRouter(*answers)
+        monkeypatch.setattr(course_generator, "get_llm_router", lambda: router)
+        return router
+
+    # Repairs fall back to the packed text, which fits, so no index or pool is involved.
+    monkeypatch.setattr(course_generator, "PASSAGE_RETRIEVAL", False)
+    return install
+
+
+def validate(raw, n_units=3, title="Cells", level="Beginner"):
+    return asyncio.run(validate_course_async(raw, SOURCE, title, level, n_units))
+
+
+def test_parse_model_json_strips_fences_and_fixes_trailing_commas():
+    fixed_before = parse_stats.fixed_json
+    assert parse_model_json('```json\n{"a": [1, 2,],}\n```') == {"a": [1, 2]}
+    assert parse_stats.fixed_json == fixed_before + 1
+    assert parse_model_json('```\n{"a": 1}\n```') == {"a": 1}
+
+
+def test_parse_model_json_rejects_what_it_cannot_fix():
+    with pytest.raises(ValueError, match="not valid JSON"):
+        parse_model_json('{"a": 1')
+    with pytest.raises(ValueError):
+        parse_model_json(None)
+
+
+def test_salvage_course_keeps_the_header_and_complete_units():
+    raw = course_json([unit("One"), unit("Two")])[:-40]  # cut inside the second unit
+    salvaged = _salvage_course(raw)
+    assert salvaged["title"] == "Cells"
+    assert [u["title"] for u in salvaged["units"]] == ["One"]
+    with pytest.raises(ValueError):
+        _salvage_course('{"title": "Cells", "units": [{"title": "On')
+
+
+def test_valid_course_needs_no_model_calls(stub_router):
+    router = stub_router()
+    course = validate(course_json([unit("One"), unit("Two"), unit("Three")]))
+    assert [u["title"] for u in course["units"]] == ["One", "Two", "Three"]
+    assert router.prompts == []
+
+
+def test_surplus_units_are_trimmed(stub_router):
+    router = stub_router()
+    course = validate(course_json([unit(str(n)) for n in range(5)]), n_units=3)
+    assert [u["title"] for u in course["units"]] == ["0", "1", "2"]
+    assert router.prompts == []
+
+
+def test_missing_units_are_generated_in_place(stub_router):
+    router = stub_router()
+    course = validate(course_json([unit("One")]), n_units=3)
+    assert [u["title"] for u in course["units"]] == ["One", "Unit 2", "Unit 3"]
+    assert len(router.prompts) == 2
+    assert all("Write ONE unit" in prompt for prompt in router.prompts)
+
+
+def test_invalid_unit_is_regenerated_keeping_its_title_and_objectives(stub_router):
+    router = stub_router()
+    broken = {"title": "Membranes", "content": "", "objectives": ["Explain osmosis", 3]}
+    course = validate(course_json([unit("One"), broken]), n_units=2)
+    repaired = course["units"][1]
+    assert repaired["title"] == "Membranes"
+    assert repaired["objectives"] == ["Explain osmosis"]
+    assert repaired["content"]
+    assert "Keep this exact unit title: Membranes" in router.prompts[0]
+
+
+def test_repair_retries_unusable_unit_output(stub_router):
+    router = stub_router("not json", json.dumps({"title": "x"}))
+    course = validate(course_json([unit("One")]), n_units=2)
+    assert course["units"][1]["title"] == "Unit 2"
+    assert len(router.prompts) == 3
+
+
+def test_null_header_fields_take_defaults(stub_router):
+    stub_router()
+    course = validate(
+        course_json([unit("One")], description=None, language=None, level=None), n_units=1
+    )
+    assert (course["description"], course["language"], course["level"]) == ("", "en", "Beginner")
+
+
+def test_missing_title_and_level_come_from_the_request(stub_router):
+    stub_router()
+    raw = json.dumps({"units": [unit("One")]})
+    course = validate(raw, n_units=1, title="Requested", level="Advanced")
+    assert (course["title"], course["level"]) == ("Requested", "Advanced")
+
+
+def test_truncated_response_is_salvaged_and_completed(stub_router):
+    router = stub_router()
+    raw = course_json([unit("One"), unit("Two"), unit("Three")])[:-60]
+    course = validate(raw, n_units=3)
+    assert [u["title"] for u in course["units"]][:2] == ["One", "Two"]
+    assert course["units"][2]["content"]
+    assert len(router.prompts) == 1
+
+
+def test_non_object_response_is_rejected(stub_router):
+    stub_router()
+    with pytest.raises(ValueError, match="not a JSON object"):
+        validate("[1, 2, 3]")
+
+
+def test_short_outline_error_names_no_provider(stub_router):
+    stub_router(json.dumps({"title": "Cells", "units": [{"title": "Only one"}]}))
+    with pytest.raises(ValueError, match="^Model outline listed 1 of 3 units$"):
+        asyncio.run(course_generator._course_outline_async(SOURCE, "Cells", "Beginner", 3))
@@ -0,0 +1,131 @@
+import asyncio
+import os
+
+import pytest
+
+from backend.services import course_store, pipeline
+from backend.services.artifact_store import ArtifactStore, course_id, course_pdf_url
+from backend.services.course_store import SUMMARY_FIELDS, CourseStore, parse_fields
+
+
+def course(title, level="Beginner", units=2):
+    return {
+        "title": title,
+        "level": level,
+        "description": f"About {title}.",
+        "language": "en",
+        "units": [
+            {"title": f"{title} {n}", "content": "Text.", "objectives": [], "quiz_questions": []}
+            for n in range(units)
+        ],
+    }
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    now = iter(range(1000, 2000))
+    monkeypatch.setattr(course_store.time, "time", lambda: float(next(now)))
+    return CourseStore(str(tmp_path / "courses.sqlite3"))
+
+
+def save(store, value, document_id="doc-a", owner="alice"):
+    cid = course_id(value)
+    store.save(cid, value, document_id, owner)
+    return cid
+
+
+def test_get_returns_the_course_and_its_summary(store):
+    cid = save(store, course("Cells", units=3))
+    row = store.get(cid)
+    assert row["course"] == course("Cells", units=3)
+    assert (row["title"], row["level"], row["units"], row["document_id"]) == (
+        "Cells",
+        "Beginner",
+        3,
+        "doc-a",
+    )
+    assert row["course_pdf_url"] == course_pdf_url(cid)
+    assert "owner" not in row
+    assert store.get("0" * 64) is None
+
+
+def test_get_projects_only_the_requested_fields(store):
+    cid = save(store, course("Cells"))
+    assert store.get(cid, ["title"]) == {"title": "Cells"}
+    assert store.get(cid, ["course_pdf_url", "level"]) == {
+        "course_pdf_url": course_pdf_url(cid),
+        "level": "Beginner",
+    }
+
+
+def test_parse_fields_rejects_unknown_columns_and_owner():
+    assert parse_fields(None, SUMMARY_FIELDS) == list(SUMMARY_FIELDS)
+    assert parse_fields(" id , title ,", SUMMARY_FIELDS) == ["id", "title"]
+    for fields in ("id,password", "owner"):
+        with pytest.raises(ValueError, match="Unknown fields"):
+            parse_fields(fields, SUMMARY_FIELDS)
+
+
+def test_listing_is_scoped_to_one_owner(store):
+    mine = save(store, course("Mine"), owner="alice")
+    save(store, course("Theirs"), owner="bob")
+    anonymous = save(store, course("Anonymous"), owner=None)
+    assert [item["id"] for item in store.list("alice")["items"]] == [mine]
+    assert [item["title"] for item in store.list("bob")["items"]] == ["Theirs"]
+    assert [item["id"] for item in store.list("")["items"]] == [anonymous]
+    assert store.list("mallory")["items"] == []
+    assert all("owner" not in item for item in store.list("alice")["items"])
+
+
+def test_one_course_saved_by_two_owners_is_listed_for_both(store):
+    shared = course("Shared")
+    save(store, shared, owner="alice")
+    save(store, shared, owner="bob")
+    save(store, shared, owner="bob")  # saving again keeps the first record
+    assert len(store.list("alice")["items"]) == 1
+    assert len(store.list("bob")["items"]) == 1
+    assert store.stats()["courses"] == 2
+
+
+def test_listing_filters_projects_and_pages_newest_first(store):
+    levels = ["Beginner", "Advanced"] * 3
+    ids = [save(store, course(f"C{n}", level=levels[n])) for n in range(5)]
+    save(store, course("Other doc"), document_id="doc-b")
+
+    page = store.list("alice", ["id", "title"], document_id="doc-a", limit=2)
+    assert page["items"] == [{"id": ids[4], "title": "C4"}, {"id": ids[3], "title": "C3"}]
+    assert page["next_offset"] == 2
+    last = store.list("alice", ["title"], document_id="doc-a", limit=2, offset=4)
+    assert (last["items"], last["next_offset"]) == ([{"title": "C0"}], None)
+
+    advanced = store.list("alice", ["title"], level="Advanced")["items"]
+    assert advanced == [{"title": "C3"}, {"title": "C1"}]
+    summaries = store.list("alice")["items"]
+    assert all(set(item) == set(SUMMARY_FIELDS) for item in summaries)
+
+
+def test_evicted_course_pdf_is_rendered_again_from_the_store(tmp_path, monkeypatch, store):
+    artifacts = ArtifactStore(str(tmp_path / "artifacts"), max_courses=1)
+    monkeypatch.setattr(pipeline, "get_artifact_store", lambda: artifacts)
+    monkeypatch.setattr(pipeline, "get_course_store", lambda: store)
+
+    first = pipeline.save_course(course("First"), "doc-a", "alice")
+    os.utime(artifacts.course_path(first), (1, 1))  # older than anything saved next
+    second = pipeline.save_course(course("Second"), "doc-a", "alice")
+    assert artifacts.load_course(first) is None
+    assert artifacts.load_course(second) is not None
+
+    path = asyncio.run(pipeline.course_pdf_path(first))
+    assert path == artifacts.pdf_path(first)
+    with open(path, "rb") as pdf:
+        assert pdf.read(5) == b"%PDF-"
+    assert artifacts.load_course(first) == course("First")
+
+
+def test_course_pdf_path_is_none_for_unknown_or_malformed_ids(tmp_path, monkeypatch, store):
+    artifacts = ArtifactStore(str(tmp_path / "artifacts"), max_courses=5)
+    monkeypatch.setattr(pipeline, "get_artifact_store", lambda: artifacts)
+    monkeypatch.setattr(pipeline, "get_course_store", lambda: store)
+    assert asyncio.run(pipeline.course_pdf_path("f" * 64)) is None
+    assert asyncio.run(pipeline.course_pdf_path("../../etc/passwd")) is None
+    assert os.listdir(artifacts.directory) == []
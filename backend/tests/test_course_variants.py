@@ -0,0 +1,117 @@
+import asyncio
+import copy
+
+import pytest
+
+from backend.schemas import Course
+from backend.services import course_generator, pipeline
+from backend.services.course_cache import MemoryCourseCache
+from backend.services.course_variants import (
+    MAX_MERGED_QUESTIONS,
+    derive_course_variant,
+    group_units,
+)
+from backend.services.llm_providers import FakeProvider
+from backend.services.llm_router import LLMRouter
+
+
+def canonical(n_units=10):
+    return {
+        "title": "Cells",
+        "level": "Intermediate",
+        "description": "All about cells.",
+        "language": "en",
+        "units": [
+            {
+                "title": f"Part {n}",
+                "content": f"Content {n}.",
+                "objectives": [f"Goal {n}", "Shared goal"],
+                "quiz_questions": [
+                    {"question": f"Q{n}.{q}", "choices": ["A", "B"], "correct_choice": 0}
+                    for q in range(3)
+                ],
+            }
+            for n in range(n_units)
+        ],
+    }
+
+
+@pytest.mark.parametrize(
+    "n_groups, sizes", [(10, [1] * 10), (7, [1, 1, 2, 1, 2, 1, 2]), (4, [2, 3, 2, 3])]
+)
+def test_groups_are_contiguous_and_balanced(n_groups, sizes):
+    groups = group_units(list(range(10)), n_groups)
+    assert [len(group) for group in groups] == sizes
+    assert [item for group in groups for item in group] == list(range(10))
+
+
+@pytest.mark.parametrize("level, n_units", [("Beginner", 10), ("Intermediate", 7), ("Advanced", 4)])
+def test_variant_matches_the_requested_level_and_unit_count(level, n_units):
+    source = canonical()
+    variant = derive_course_variant(source, level, n_units)
+    assert variant["level"] == level
+    assert len(variant["units"]) == n_units
+    assert {k: v for k, v in variant.items() if k not in ("level", "units")} == {
+        k: v for k, v in source.items() if k not in ("level", "units")
+    }
+    Course.model_validate(variant)
+
+
+def test_variant_keeps_every_canonical_unit_in_order():
+    variant = derive_course_variant(canonical(), "Advanced", 4)
+    content = "\n".join(unit["content"] for unit in variant["units"])
+    positions = [content.index(f"Content {n}.") for n in range(10)]
+    assert positions == sorted(positions)
+    assert variant["units"][0]["title"] == "Part 0 & Part 1"
+    assert variant["units"][1]["title"] == "Part 2, Part 3 & Part 4"
+
+
+def test_merged_units_dedupe_objectives_and_interleave_the_quiz():
+    merged = derive_course_variant(canonical(), "Advanced", 4)["units"][1]
+    assert merged["objectives"] == ["Goal 2", "Shared goal", "Goal 3", "Goal 4"]
+    questions = [q["question"] for q in merged["quiz_questions"]]
+    assert len(questions) == MAX_MERGED_QUESTIONS
+    assert questions == ["Q2.0", "Q3.0", "Q4.0", "Q2.1", "Q3.1"]
+
+
+def test_deriving_leaves_the_canonical_course_unchanged():
+    source = canonical()
+    before = copy.deepcopy(source)
+    derive_course_variant(source, "Beginner", 10)["units"][0]["title"] = "changed"
+    derive_course_variant(source, "Advanced", 4)
+    assert source == before
+
+
+def test_levels_share_one_cached_canonical_generation(monkeypatch):
+    provider = FakeProvider(latency=0.0, unit_chars=40)
+    calls = []
+    real_complete = provider.complete
+
+    async def counting_complete(prompt):
+        calls.append(prompt)
+        return await real_complete(prompt)
+
+    monkeypatch.setattr(provider, "complete", counting_complete)
+    router = LLMRouter([provider], hedge_after=0.0, max_error_rate=0.5)
+    cache = MemoryCourseCache(max_entries=32, max_bytes=1_000_000, ttl_seconds=60)
+    monkeypatch.setattr(course_generator, "get_llm_router", lambda: router)
+    monkeypatch.setattr(pipeline, "get_llm_router", lambda: router)
+    monkeypatch.setattr(pipeline, "get_course_cache", lambda: cache)
+    monkeypatch.setattr(pipeline, "MULTI_LEVEL_GENERATION", True)
+    monkeypatch.setattr(pipeline, "CANONICAL_UNITS", 10)
+    monkeypatch.setattr(pipeline, "generation_strategy", lambda text: "single")
+
+    async def scenario():
+        courses = []
+        for level, units in [("Beginner", 10), ("Intermediate", 7), ("Advanced", 4)]:
+            courses.append(await pipeline.generate_course("Some text.", "Cells", level, units))
+        return courses
+
+    courses = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [(c["level"], len(c["units"])) for c in courses] == [
+        ("Beginner", 10),
+        ("Intermediate", 7),
+        ("Advanced", 4),
+    ]
+    assert all(c["title"] == "Cells" for c in courses)
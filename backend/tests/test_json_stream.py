@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from backend.services.json_stream import CourseStreamParser
+
+COURSE = {
+    "title": 'Quotes "and" {braces}',
+    "level": "Beginner",
+    "units": [
+        {
+            "title": "Escapes \\ and \"quotes\" with ] and }",
+            "objectives": ["one", "two"],
+            "content": "Line one\nLine two: {\"not\": \"json\"}",
+            "quiz_questions": [{"question": "Why?", "options": ["a", "b"]}],
+        },
+        {"title": "Unicode é中", "objectives": [], "content": "", "quiz_questions": []},
+    ],
+    "description": "After the units, with a comma, here",
+    "language": None,
+}
+
+
+def feed_all(chunks):
+    parser = CourseStreamParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return parser, events
+
+
+def expected_events():
+    return [
+        {"type": "field", "name": "title", "value": COURSE["title"]},
+        {"type": "field", "name": "level", "value": "Beginner"},
+        {"type": "unit", "index": 0, "unit": COURSE["units"][0]},
+        {"type": "unit", "index": 1, "unit": COURSE["units"][1]},
+        {"type": "field", "name": "description", "value": COURSE["description"]},
+        {"type": "field", "name": "language", "value": None},
+    ]
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_whole_document_in_one_chunk(indent):
+    parser, events = feed_all([json.dumps(COURSE, indent=indent)])
+    assert events == expected_events()
+    assert parser.finished
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_every_split_point_gives_the_same_events(indent):
+    text = json.dumps(COURSE, indent=indent)
+    for split in range(1, len(text)):
+        _, events = feed_all([text[:split], text[split:]])
+        assert events == expected_events(), f"split at {split}: {text[split - 5 : split + 5]!r}"
+
+
+def test_one_character_at_a_time():
+    text = json.dumps(COURSE, ensure_ascii=False)
+    parser, events = feed_all(list(text))
+    assert events == expected_events()
+    assert parser.finished
+
+
+def test_chunk_ending_on_backslash_inside_string():
+    text = '{"title": "a\\"}, \\\\", "units": []}'
+    cut = text.index("\\") + 1  # the chunk ends right after the escaping backslash
+    _, events = feed_all([text[:cut], text[cut:]])
+    assert events == [{"type": "field", "name": "title", "value": 'a"}, \\'}]
+
+
+def test_unit_reported_when_it_closes_before_the_rest_arrives():
+    parser = CourseStreamParser()
+    assert parser.feed('{"title": "T", "units": [{"title": "U1"}') == [
+        {"type": "field", "name": "title", "value": "T"},
+        {"type": "unit", "index": 0, "unit": {"title": "U1"}},
+    ]
+    assert parser.feed(', {"title": "U2"') == []
+    assert parser.feed("}") == [{"type": "unit", "index": 1, "unit": {"title": "U2"}}]
+    assert not parser.finished
+
+
+def test_text_around_the_root_object_is_ignored():
+    text = '```json\n{"title": "T", "units": [{"title": "U"}]}\n```\n{"title": "ignored"}'
+    parser, events = feed_all([text])
+    assert events == [
+        {"type": "field", "name": "title", "value": "T"},
+        {"type": "unit", "index": 0, "unit": {"title": "U"}},
+    ]
+    assert parser.finished
+
+
+def test_malformed_unit_is_skipped_but_keeps_its_index():
+    text = '{"units": [{"title": "bad",}, {"title": "good"}], "level": "Advanced"}'
+    _, events = feed_all([text])
+    assert events == [
+        {"type": "unit", "index": 1, "unit": {"title": "good"}},
+        {"type": "field", "name": "level", "value": "Advanced"},
+    ]
+
+
+def test_nested_objects_are_not_reported_as_top_level_fields():
+    text = '{"meta": {"title": "inner", "units": [{"x": 1}]}, "title": "outer"}'
+    _, events = feed_all([text])
+    assert events == [
+        {"type": "field", "name": "meta", "value": {"title": "inner", "units": [{"x": 1}]}},
+        {"type": "field", "name": "title", "value": "outer"},
+    ]
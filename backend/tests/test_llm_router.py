@@ -0,0 +1,230 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from backend.services import llm_router
+from backend.services.gemini_client import LLMUnavailable
+from backend.services.llm_providers import Completion, FakeProvider, LLMProvider
+from backend.services.llm_router import MIN_SAMPLES, LLMRouter
+
+
+class StubProvider(LLMProvider):
+    """Answers after `delay` seconds, or raises `error`; counts calls and cancellations."""
+
+    def __init__(self, name, delay=0.0, error=None, chunks=("{}",), fail_after_chunks=None):
+        self.name = name
+        self.model = f"{name}-model"
+        self.delay = delay
+        self.error = error
+        self.chunks = chunks
+        self.fail_after_chunks = fail_after_chunks
+        self.calls = 0
+        self.cancelled = 0
+
+    async def complete(self, prompt):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return Completion(text="".join(self.chunks), provider=self.name, model=self.model)
+
+    async def stream(self, prompt):
+        self.calls += 1
+        if self.error is not None and self.fail_after_chunks is None:
+            raise self.error
+        for index, chunk in enumerate(self.chunks):
+            if index == self.fail_after_chunks:
+                raise self.error
+            yield chunk
+
+
+def router(*providers, hedge_after=0.0, max_error_rate=0.5):
+    return LLMRouter(list(providers), hedge_after, max_error_rate)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_provider_without_complete_cannot_be_instantiated():
+    class Incomplete(LLMProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_default_stream_yields_the_whole_completion():
+    class Whole(LLMProvider):
+        async def complete(self, prompt):
+            return Completion(text="all at once", provider="whole", model="m")
+
+    assert run(collect(Whole().stream("prompt"))) == ["all at once"]
+
+
+def test_fake_provider_course_through_the_router():
+    fake = FakeProvider(latency=0.0, unit_chars=100)
+    completion = run(router(fake).complete("Title: Cells\nLevel: Beginner\nUnits: 3\n"))
+    course = json.loads(completion.text)
+    assert (course["title"], course["level"], len(course["units"])) == ("Cells", "Beginner", 3)
+    assert completion.provider == "fake"
+
+
+def test_router_requires_a_provider():
+    with pytest.raises(RuntimeError):
+        router()
+
+
+def test_complete_uses_the_first_provider_when_it_answers():
+    first, second = StubProvider("first"), StubProvider("second")
+    llm = router(first, second)
+    assert run(llm.complete("p")).provider == "first"
+    assert (first.calls, second.calls, llm.failovers) == (1, 0, 0)
+
+
+def test_complete_fails_over_to_the_next_provider():
+    broken, healthy = StubProvider("broken", error=ConnectionError("down")), StubProvider("ok")
+    llm = router(broken, healthy)
+    assert run(llm.complete("p")).provider == "ok"
+    assert llm.failovers == 1
+    assert llm.stats()["providers"]["broken"]["errors"] == 1
+    assert llm.stats()["providers"]["ok"]["calls"] == 1
+
+
+def test_complete_reraises_a_single_providers_error():
+    with pytest.raises(ConnectionError):
+        run(router(StubProvider("only", error=ConnectionError("down"))).complete("p"))
+
+
+def test_complete_reports_every_error_when_all_providers_fail():
+    llm = router(
+        StubProvider("a", error=ConnectionError("a down")),
+        StubProvider("b", error=TimeoutError("b slow")),
+    )
+    with pytest.raises(LLMUnavailable, match="a: a down; b: b slow"):
+        run(llm.complete("p"))
+
+
+def test_slow_primary_is_hedged_and_the_loser_cancelled():
+    slow, fast = StubProvider("slow", delay=5.0), StubProvider("fast", delay=0.01)
+    llm = router(slow, fast, hedge_after=0.05)
+    start = time.perf_counter()
+    assert run(llm.complete("p")).provider == "fast"
+    assert time.perf_counter() - start < 1.0
+    assert llm.hedges == 1
+    assert slow.cancelled == 1
+    assert llm.stats()["providers"]["slow"]["cancelled"] == 1
+
+
+def test_primary_that_answers_before_the_deadline_is_not_hedged():
+    primary, backup = StubProvider("primary", delay=0.01), StubProvider("backup")
+    llm = router(primary, backup, hedge_after=1.0)
+    assert run(llm.complete("p")).provider == "primary"
+    assert (llm.hedges, backup.calls) == (0, 0)
+
+
+def test_hedging_is_off_at_zero():
+    slow, other = StubProvider("slow", delay=0.1), StubProvider("other")
+    llm = router(slow, other, hedge_after=0.0)
+    assert run(llm.complete("p")).provider == "slow"
+    assert other.calls == 0
+
+
+def test_hedge_deadline_follows_the_primarys_p95_but_never_drops_below_the_floor():
+    primary = StubProvider("primary")
+    llm = router(primary, StubProvider("backup"), hedge_after=0.5)
+    stats = llm.stats_by_provider["primary"]
+    assert llm._hedge_deadline(primary) == 0.5
+    for seconds in [0.1] * 18 + [2.0, 2.0]:
+        stats.record(seconds, ok=True)
+    assert llm._hedge_deadline(primary) == 2.0
+    stats.latencies.clear()
+    for _ in range(MIN_SAMPLES):
+        stats.record(0.1, ok=True)
+    assert llm._hedge_deadline(primary) == 0.5
+
+
+def test_ranking_prefers_lower_p50_once_enough_samples_exist():
+    a, b = StubProvider("a"), StubProvider("b")
+    llm = router(a, b)
+    for _ in range(MIN_SAMPLES - 1):
+        llm.stats_by_provider["a"].record(3.0, ok=True)
+        llm.stats_by_provider["b"].record(1.0, ok=True)
+    assert [p.name for p in llm.ranked()] == ["a", "b"]  # too few samples: configured order
+    llm.stats_by_provider["a"].record(3.0, ok=True)
+    llm.stats_by_provider["b"].record(1.0, ok=True)
+    assert [p.name for p in llm.ranked()] == ["b", "a"]
+
+
+def test_ranking_demotes_providers_with_recent_errors_until_the_cooldown(monkeypatch):
+    a, b = StubProvider("a"), StubProvider("b")
+    llm = router(a, b, max_error_rate=0.5)
+    stats = llm.stats_by_provider["a"]
+    stats.record(0.1, ok=True)
+    stats.record(0.1, ok=False)
+    assert [p.name for p in llm.ranked()] == ["a", "b"]  # 50% is not above the limit
+    stats.record(0.1, ok=False)
+    assert [p.name for p in llm.ranked()] == ["b", "a"]
+    monkeypatch.setattr(llm_router, "ERROR_COOLDOWN_SECONDS", 0.0)
+    assert [p.name for p in llm.ranked()] == ["a", "b"]
+
+
+def test_complete_routes_around_an_unhealthy_provider():
+    flaky = StubProvider("flaky", error=ConnectionError("down"))
+    healthy = StubProvider("healthy")
+    llm = router(flaky, healthy, max_error_rate=0.1)
+    run(llm.complete("p"))
+    run(llm.complete("p"))
+    assert flaky.calls == 1  # the second call starts with the healthy provider
+    assert llm.failovers == 1
+
+
+def test_stream_yields_every_chunk_from_the_best_provider():
+    llm = router(StubProvider("a", chunks=("{", '"x": 1', "}")), StubProvider("b"))
+    assert run(collect(llm.stream("p"))) == ["{", '"x": 1', "}"]
+    assert llm.stats()["providers"]["a"]["calls"] == 1
+
+
+def test_stream_fails_over_before_the_first_chunk():
+    broken = StubProvider("broken", error=ConnectionError("down"))
+    llm = router(broken, StubProvider("ok", chunks=("a", "b")))
+    assert run(collect(llm.stream("p"))) == ["a", "b"]
+    assert llm.failovers == 1
+    assert llm.stats()["providers"]["broken"]["errors"] == 1
+
+
+def test_stream_does_not_fail_over_after_the_first_chunk():
+    partial = StubProvider(
+        "partial", error=ConnectionError("cut"), chunks=("a", "b"), fail_after_chunks=1
+    )
+    backup = StubProvider("backup", chunks=("x",))
+    llm = router(partial, backup)
+    received = []
+
+    async def consume():
+        async for chunk in llm.stream("p"):
+            received.append(chunk)
+
+    with pytest.raises(ConnectionError):
+        run(consume())
+    assert received == ["a"]
+    assert backup.calls == 0
+
+
+def test_stream_gives_up_when_every_provider_fails_before_its_first_chunk():
+    llm = router(
+        StubProvider("a", error=ConnectionError("a down")),
+        StubProvider("b", error=ConnectionError("b down")),
+    )
+    with pytest.raises(LLMUnavailable):
+        run(collect(llm.stream("p")))
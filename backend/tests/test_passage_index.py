@@ -0,0 +1,84 @@
+import asyncio
+import pickle
+
+from backend.services import passage_index
+from backend.services.passage_index import PassageIndex, get_passage_index
+from backend.services.pdf_io import PAGE_BREAK
+
+PASSAGES = [
+    "Photosynthesis converts light into chemical energy in the chloroplast.",
+    "Mitochondria release energy from glucose during cellular respiration.",
+    "The chloroplast holds chlorophyll; chlorophyll absorbs red and blue light.",
+    "Mitosis divides the nucleus; meiosis halves the chromosome number.",
+]
+
+
+def test_search_ranks_passages_by_bm25_score():
+    index = PassageIndex(PASSAGES)
+    ranked = [passage for passage, _ in index.search("chlorophyll chloroplast", k=4)]
+    # Passage 2 holds "chlorophyll" twice and "chloroplast" once; passage 0 only "chloroplast".
+    assert ranked == [2, 0]
+
+
+def test_rare_terms_outweigh_common_ones():
+    index = PassageIndex(PASSAGES)
+    # "energy" is in two passages, "glucose" in one: the glucose passage wins.
+    assert index.search("energy glucose", k=1)[0][0] == 1
+
+
+def test_search_leaves_out_passages_without_a_shared_term_and_honours_k():
+    index = PassageIndex(PASSAGES)
+    assert index.search("quantum chromodynamics", k=3) == []
+    assert len(index.search("the energy light chloroplast", k=2)) == 2
+    scores = [score for _, score in index.search("the energy light", k=4)]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_query_terms_are_case_insensitive_and_ignore_single_letters():
+    index = PassageIndex(PASSAGES)
+    assert index.search("MEIOSIS", k=1)[0][0] == 3
+    assert index.search("a b c", k=4) == []
+
+
+def test_excerpt_returns_matches_in_document_order_within_budget():
+    index = PassageIndex(PASSAGES)
+    excerpt = index.excerpt("chlorophyll chloroplast light", k=4, max_chars=1000)
+    assert excerpt == PASSAGES[0] + "\n\n" + PASSAGES[2]
+
+
+def test_excerpt_skips_passages_that_do_not_fit_and_returns_none_without_matches():
+    index = PassageIndex(PASSAGES)
+    # Only the best passage fits; the second would pass the budget.
+    excerpt = index.excerpt("chlorophyll chloroplast", k=4, max_chars=len(PASSAGES[2]) + 2)
+    assert excerpt == PASSAGES[2]
+    assert index.excerpt("chlorophyll", k=4, max_chars=10) is None
+    assert index.excerpt("quantum", k=4, max_chars=1000) is None
+
+
+def test_from_text_keeps_pages_apart_up_to_the_passage_size():
+    text = PAGE_BREAK.join(["a" * 50, "b" * 50, "c" * 50])
+    assert PassageIndex.from_text(text, passage_chars=104).passages == [
+        "a" * 50 + "\n\n" + "b" * 50,
+        "c" * 50,
+    ]
+
+
+def test_index_survives_pickling():
+    index = PassageIndex(PASSAGES)
+    copy = pickle.loads(pickle.dumps(index))
+    assert copy.search("chlorophyll chloroplast", k=4) == index.search(
+        "chlorophyll chloroplast", k=4
+    )
+
+
+def test_get_passage_index_builds_once_per_text():
+    async def scenario():
+        text = PAGE_BREAK.join(PASSAGES) + " unique-to-this-test"
+        before = passage_index._indexes.computed
+        indexes = await asyncio.gather(*(get_passage_index(text) for _ in range(3)))
+        again = await get_passage_index(text)
+        assert passage_index._indexes.computed == before + 1
+        assert all(index is again for index in indexes)
+        assert again.search("glucose", k=1)[0][0] == 0  # one passage: the whole short text
+
+    asyncio.run(scenario())
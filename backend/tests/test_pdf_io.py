@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from backend.services.pdf_io import (
+    PdfBackend,
+    PdfminerBackend,
+    PdfTextExtractor,
+    render_course_pdf_to_bytes,
+)
+
+COURSE = {
+    "title": "Cell Biology",
+    "level": "Beginner",
+    "description": "Membranes and transport.",
+    "units": [{"title": "Osmosis", "content": "Water crosses the membrane.", "objectives": []}],
+}
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "course.pdf"
+    path.write_bytes(render_course_pdf_to_bytes(COURSE))
+    return str(path)
+
+
+def open_handles(path):
+    fd_dir = "/proc/self/fd"
+    if not os.path.isdir(fd_dir):
+        pytest.skip("needs /proc to list open file descriptors")
+    handles = []
+    for fd in os.listdir(fd_dir):
+        try:
+            handles.append(os.readlink(os.path.join(fd_dir, fd)))
+        except OSError:
+            pass
+    return handles.count(path)
+
+
+def test_pdfminer_backend_holds_no_file_handle_for_a_path(pdf_path):
+    pytest.importorskip("pdfminer")
+    extractor = PdfTextExtractor(pdf_path, [PdfminerBackend()])
+    assert extractor.page_count() == 2
+    assert "Water crosses the membrane." in extractor.page_text(1)
+    assert open_handles(pdf_path) == 0
+
+
+def test_pdfminer_backend_reads_bytes(pdf_path):
+    pytest.importorskip("pdfminer")
+    with open(pdf_path, "rb") as pdf:
+        extractor = PdfTextExtractor(pdf.read(), [PdfminerBackend()])
+    assert "Cell Biology" in extractor.page_text(0)
+
+
+def test_backend_missing_a_method_fails_when_instantiated():
+    class Incomplete(PdfBackend):
+        name = module = "incomplete"
+
+        def open(self, source):
+            return source
+
+    with pytest.raises(TypeError):
+        Incomplete()
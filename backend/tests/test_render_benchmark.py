@@ -0,0 +1,18 @@
+import pytest
+
+from backend.benchmarks.bench_render import sample_course
+from backend.services.pdf_io import render_course_pdf_to_bytes
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.parametrize("units", [4, 7, 10])
+def test_render_course_pdf(benchmark, units):
+    course = sample_course(units)
+    benchmark.group = "render_course_pdf_to_bytes"
+    pdf = benchmark.pedantic(
+        render_course_pdf_to_bytes, args=(course,), rounds=10, warmup_rounds=1
+    )
+    assert pdf.startswith(b"%PDF-")
+    # Rendering is deterministic, so a regression shows up as time, never as different bytes.
+    assert render_course_pdf_to_bytes(course) == pdf
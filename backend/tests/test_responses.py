@@ -0,0 +1,85 @@
+import pytest
+
+from backend.services import responses
+from backend.services.responses import matching_etag, negotiate_encoding
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    monkeypatch.setattr(responses, "ENCODINGS", ("br", "gzip"))
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(responses, "ENCODINGS", ("gzip",))
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("br;q=1.0, gzip;q=0.8", "br"),
+        ("gzip;q=1.0, br;q=0.5", "br"),  # any q > 0 allows it; the server order decides
+        ("BR", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("br;q=0.0, gzip;q=0.001", "gzip"),
+        ("gzip;q=0, br;q=0", None),
+        ("deflate, identity", None),
+        ("", None),
+        ("*", "br"),
+        ("*;q=0", None),
+        ("br;q=0, *", "gzip"),
+        ("*, gzip;q=0", "br"),
+        ("br;q=abc, gzip", "gzip"),
+        (" gzip ; q=0.5 ", "gzip"),
+    ],
+)
+def test_negotiate_encoding_with_brotli(with_brotli, header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate, br", "gzip"),
+        ("br", None),
+        ("br, *;q=0.1", "gzip"),
+        ("gzip;q=0", None),
+    ],
+)
+def test_negotiate_encoding_without_brotli(without_brotli, header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("", None),
+        ('"abc"', '"abc"'),
+        ('"abc-br"', '"abc-br"'),
+        ('W/"abc-br"', '"abc-br"'),
+        ('"other", "abc-br"', '"abc-br"'),
+        ("*", '"abc"'),
+        ('"abc-gzip"', None),
+        ('"abc-deflate"', None),
+        ('"ab"', None),
+    ],
+)
+def test_matching_etag(with_brotli, header, expected):
+    assert matching_etag(header, '"abc"', "gzip, br") == expected
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, header, expected",
+    [
+        ("identity", '"abc-br"', None),
+        ("identity", '"abc-gzip"', None),
+        ("identity", '"abc"', '"abc"'),
+        ("", '"abc-gzip"', None),
+        ("gzip, br;q=0", '"abc-br"', None),
+        ("gzip, br;q=0", '"abc-gzip"', '"abc-gzip"'),
+    ],
+)
+def test_matching_etag_follows_accept_encoding(with_brotli, accept_encoding, header, expected):
+    assert matching_etag(header, '"abc"', accept_encoding) == expected
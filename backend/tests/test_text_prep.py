@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from backend.services import text_prep
+from backend.services.pdf_io import PAGE_BREAK
+from backend.services.text_prep import (
+    _PAGE_NUMBER,
+    TITLE_MAX_CHARS,
+    document_title,
+    normalize_pages,
+    pack_text,
+    pack_text_async,
+)
+
+
+@pytest.fixture(autouse=True)
+def default_token_ratio(monkeypatch):
+    monkeypatch.setattr(text_prep.token_counter, "chars_per_token", 4.0)
+
+
+@pytest.mark.parametrize(
+    "line",
+    ["12", "- 12 -", "Page 3", "PAGE 3 of 10", "page 4/20", "iv", "xii", "xlix", "Page iii"],
+)
+def test_page_numbers_are_recognised(line):
+    assert _PAGE_NUMBER.match(line)
+
+
+@pytest.mark.parametrize(
+    "line", ["I", "Ill", "Civil", "CLI", "Lc", "IV", "mix", "iiii", "vx", "Chapter 2"]
+)
+def test_words_and_malformed_numerals_are_not_page_numbers(line):
+    assert not _PAGE_NUMBER.match(line)
+
+
+def test_roman_looking_words_at_page_edges_are_kept():
+    words = ["Civil", "Ill", "CLI", "Lc"]
+    pages = [f"{word}\nBody text of page {n} about rights.\nend" for n, word in enumerate(words)]
+    cleaned, _ = normalize_pages(pages)
+    assert [page.split("\n")[0] for page in cleaned] == words
+
+
+def test_document_title_skips_page_numbers_but_not_words():
+    assert document_title(["iv\n\nIll Winds of Change\nbody"]) == "Ill Winds of Change"
+    assert document_title(["I\nam a first line"]) == "I"
+
+
+def body(n):
+    return f"Paragraph {n} explains osmosis across the membrane in some detail."
+
+
+def test_normalize_pages_collapses_whitespace_and_drops_page_numbers():
+    pages = [f"  {body(n)}\t  more\n\n\n\nnext   line\n{n + 1}" for n in range(2)]
+    cleaned, dropped = normalize_pages(pages)
+    assert cleaned == [f"{body(n)} more\n\nnext line" for n in range(2)]
+    assert dropped == 2
+
+
+def test_normalize_pages_removes_running_headers_and_footers():
+    pages = [
+        f"Cell Biology\n{body(n)}\n{body(n + 10)}\n{body(n + 20)}\nChapter 2 - page {n}"
+        for n in range(5)
+    ]
+    cleaned, dropped = normalize_pages(pages)
+    assert cleaned[0] == "\n".join([body(0), body(10), body(20)])
+    assert dropped == 10
+
+
+def test_headers_need_three_pages_and_a_share_of_the_document():
+    two_pages = [f"Header\n{body(n)}\n{body(n + 1)}" for n in range(2)]
+    assert normalize_pages(two_pages)[1] == 0
+    # A line on 3 of 10 pages is under RUNNING_LINE_MIN_SHARE (40%) and stays.
+    tops = ["Aside"] * 3 + [f"Top {letter}" for letter in "DEFGHIJ"]
+    pages = [f"{top}\n{body(n)}\n{body(n + 1)}\nend {top}" for n, top in enumerate(tops)]
+    cleaned, _ = normalize_pages(pages)
+    assert cleaned[0].startswith("Aside\n")
+
+
+def test_lines_repeated_within_a_page_are_body_text():
+    pages = [f"Note\n{body(n)}\nNote\n{body(n + 1)}" for n in range(4)]
+    cleaned, dropped = normalize_pages(pages)
+    assert dropped == 0
+    assert cleaned[0].startswith("Note\n")
+
+
+def test_short_pages_that_differ_only_in_digits_keep_their_text():
+    pages = [f"Chapter {n}\nSection {n}.1\nPart {n}" for n in range(1, 4)]
+    cleaned, _ = normalize_pages(pages)
+    assert cleaned == ["Section 1.1", "Section 2.1", "Section 3.1"]
+    two_line_pages = [f"Unit {n}\nExercise {n}" for n in range(1, 4)]
+    assert normalize_pages(two_line_pages) == (two_line_pages, 0)
+
+
+def test_running_header_removal_never_empties_a_page_but_page_numbers_do():
+    pages = ["Summary 1", "Summary 2", "Summary 3", "  \n 4 \n"]
+    cleaned, dropped = normalize_pages(pages)
+    assert cleaned == ["Summary 1", "Summary 2", "Summary 3"]
+    assert dropped == 1
+
+
+def test_document_title_is_the_first_line_of_text():
+    assert document_title(["", "  \n 1 \n", "  Cell   Biology Basics \nbody"]) == (
+        "Cell Biology Basics"
+    )
+    assert document_title(["x" * 200]) == "x" * TITLE_MAX_CHARS
+    assert document_title(["", "3\n\n"]) == ""
+
+
+def test_document_title_skips_a_running_header():
+    pages = [f"Running Header Biology\nChapter {n}: Cells\n{body(n)}\n{n}" for n in range(1, 5)]
+    assert document_title(pages) == "Chapter 1: Cells"
+
+
+def test_pack_text_returns_text_that_fits_unchanged():
+    text = "short text"
+    assert pack_text(text, budget_tokens=10) is text
+
+
+def sections(count, size=1900):
+    return [f"Section {n} " + ("osmosis membrane cell. " * size)[: size - 11] for n in range(count)]
+
+
+def test_pack_text_keeps_whole_sections_in_document_order():
+    parts = sections(6)
+    parts[3] = "Index 1 2 3 4 5 6 7 8 9 " * 79  # numbers only: the lowest-value section
+    text = PAGE_BREAK.join(parts)
+    packed = pack_text(text, budget_tokens=2400)  # 9600 characters: five of six sections
+    kept = packed.split("\n\n")
+    assert kept == [parts[n] for n in (0, 1, 2, 4, 5)]
+
+
+def test_pack_text_always_keeps_the_opening_section():
+    parts = ["Title page 2024 " * 118] + sections(3)
+    packed = pack_text(PAGE_BREAK.join(parts), budget_tokens=600)
+    assert packed == parts[0]
+
+
+def test_pack_text_cuts_an_oversized_opening_at_a_sentence():
+    text = "First sentence here. " * 190  # two 2000-character sections, neither fits
+    packed = pack_text(text, budget_tokens=100)
+    assert len(packed) <= 400
+    assert packed.endswith("here.")
+
+
+def test_pack_text_async_matches_pack_text():
+    text = PAGE_BREAK.join(sections(6))
+    assert asyncio.run(pack_text_async(text, budget_tokens=2400)) == pack_text(
+        text, budget_tokens=2400
+    )
@@ -0,0 +1,207 @@
+import asyncio
+
+import pytest
+
+from backend.services.workers import FairQueue, SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "course"
+
+        waiters = [asyncio.ensure_future(flight.run("key", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.stats() == {"in_flight": 1, "leaders": 1, "coalesced": 4}
+        release.set()
+        assert await asyncio.gather(*waiters) == ["course"] * 5
+        assert calls == 1
+        assert flight.stats()["in_flight"] == 0
+
+    run(scenario())
+
+
+def test_single_flight_runs_again_once_the_call_finished():
+    async def scenario():
+        flight = SingleFlight("test")
+        results = iter(["first", "second"])
+
+        async def work():
+            return next(results)
+
+        assert await flight.run("key", work) == "first"
+        assert await flight.run("key", work) == "second"
+        assert flight.stats() == {"in_flight": 0, "leaders": 2, "coalesced": 0}
+
+    run(scenario())
+
+
+def test_single_flight_shares_the_exception_and_releases_the_key():
+    async def scenario():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise ValueError("bad model output")
+
+        waiters = [asyncio.ensure_future(flight.run("key", failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert [type(result) for result in results] == [ValueError] * 3
+
+        async def ok():
+            return "recovered"
+
+        assert await flight.run("key", ok) == "recovered"
+
+    run(scenario())
+
+
+def test_cancelled_leader_does_not_cancel_the_call_for_other_waiters():
+    async def scenario():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "course"
+
+        leader = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+        assert await follower == "course"
+        assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 1}
+
+    run(scenario())
+
+
+def test_call_keeps_running_after_every_waiter_cancelled():
+    async def scenario():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+        finished = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            finished.set()
+            return "course"
+
+        waiters = [asyncio.ensure_future(flight.run("key", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        assert flight.stats()["in_flight"] == 1
+
+        # A caller arriving meanwhile joins the surviving call instead of starting another.
+        late = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        release.set()
+        assert await late == "course"
+        assert finished.is_set()
+        assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 2}
+
+    run(scenario())
+
+
+def test_single_flight_keys_are_independent():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def work(value):
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(
+            flight.run("a", lambda: work("a")), flight.run("b", lambda: work("b"))
+        )
+        assert results == ["a", "b"]
+        assert flight.stats()["leaders"] == 2
+
+    run(scenario())
+
+
+def test_fair_queue_serves_keys_round_robin():
+    async def scenario():
+        queue = FairQueue("test", max_items=10)
+        await queue.put_many("big", ["b1", "b2", "b3", "b4"])
+        await queue.put_many("small", ["s1"])
+        await queue.put_many("other", ["o1", "o2"])
+        served = [await queue.get() for _ in range(7)]
+        assert [item for _, item in served] == ["b1", "s1", "o1", "b2", "o2", "b3", "b4"]
+        assert queue.stats() == {"queued": 0, "keys": 0, "max_items": 10, "served": 7}
+
+    run(scenario())
+
+
+def test_fair_queue_rejects_work_beyond_its_bound():
+    async def scenario():
+        queue = FairQueue("test", max_items=3)
+        await queue.put_many("a", [1, 2])
+        with pytest.raises(RuntimeError, match="queue is full"):
+            await queue.put_many("b", [3, 4])
+        assert queue.stats()["queued"] == 2
+        await queue.put_many("b", [3])
+
+    run(scenario())
+
+
+def test_fair_queue_get_waits_for_items():
+    async def scenario():
+        queue = FairQueue("test", max_items=10)
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        assert not getter.done()
+        await queue.put_many("a", ["item"])
+        assert await getter == ("a", "item")
+
+    run(scenario())
+
+
+def test_cancelled_getter_does_not_lose_an_item():
+    async def scenario():
+        queue = FairQueue("test", max_items=10)
+        cancelled = asyncio.ensure_future(queue.get())
+        waiting = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await queue.put_many("a", ["item"])
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert await asyncio.wait_for(waiting, 1) == ("a", "item")
+        assert queue.stats()["queued"] == 0
+
+    run(scenario())
+
+
+def test_getter_cancelled_after_notify_leaves_the_item_queued():
+    async def scenario():
+        queue = FairQueue("test", max_items=10)
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        await queue.put_many("a", ["item"])
+        getter.cancel()  # notified, but cancelled before it could take the item
+        await asyncio.gather(getter, return_exceptions=True)
+        assert getter.cancelled()
+        assert queue.stats()["queued"] == 1
+        assert await queue.get() == ("a", "item")
+
+    run(scenario())
@@ -26,9 +26,115 @@ export type ProfileResponse = {
 
 export type CourseResponse = {
   course: any;
+  course_id?: string;
+  course_pdf_url?: string;
   course_pdf_base64?: string;
 };
 
+export type CourseJobStage = {
+  name: "extract" | "generate" | "render";
+  status: "pending" | "running" | "done" | "failed";
+  started_at: number | null;
+  finished_at: number | null;
+};
+
+export type CourseJob = {
+  id: string;
+  status: "queued" | "running" | "succeeded" | "failed";
+  stage: CourseJobStage["name"] | null;
+  stages: CourseJobStage[];
+  progress: number;
+  error: string | null;
+  result?: CourseResponse | null;
+};
+
+export type StoredCourse = {
+  id: string;
+  title?: string;
+  level?: string;
+  units?: number;
+  language?: string | null;
+  description?: string | null;
+  document_id?: string | null;
+  created_at?: number;
+  course?: any;
+  course_pdf_url?: string;
+};
+
+export type DocumentSummary = {
+  document_id: string;
+  title: string;
+  pages: number;
+  chars: number;
+};
+
+/** A generation the profile page asked for and the results page streams. */
+export type PendingCourse = {
+  courseTitle: string;
+  level: string;
+  units: number;
+  documentId: string;
+};
+
+export type CoursePage = {
+  items: StoredCourse[];
+  limit: number;
+  offset: number;
+  next_offset: number | null;
+};
+
+const JOB_POLL_INTERVAL_MS = 1500;
+const OWNER_KEY = "personalLearnOwner";
+const PENDING_COURSE_KEY = "personalLearnPendingCourse";
+
+/** Absolute URL for a backend path such as `course_pdf_url` (served with ETag/Range support). */
+export function backendUrl(path: string): string {
+  return `${API_BASE}${path}`;
+}
+
+/** Anonymous id for this browser; courses generated here are stored under it on the server. */
+export function ownerId(): string {
+  if (typeof window === "undefined") return "";
+  let id = localStorage.getItem(OWNER_KEY);
+  if (!id) {
+    id =
+      crypto.randomUUID?.() ??
+      `${Date.now().toString(36)}${Math.random().toString(36).slice(2)}`;
+    localStorage.setItem(OWNER_KEY, id);
+  }
+  return id;
+}
+
+export function savePendingCourse(pending: PendingCourse) {
+  localStorage.setItem(PENDING_COURSE_KEY, JSON.stringify(pending));
+}
+
+export function loadPendingCourse(): PendingCourse | null {
+  const raw = localStorage.getItem(PENDING_COURSE_KEY);
+  if (!raw) return null;
+  try {
+    return JSON.parse(raw) as PendingCourse;
+  } catch {
+    localStorage.removeItem(PENDING_COURSE_KEY);
+    return null;
+  }
+}
+
+export function clearPendingCourse() {
+  localStorage.removeItem(PENDING_COURSE_KEY);
+}
+
+/** Form fields that ask the backend for a pending course, by stored document id. */
+export function pendingCourseForm(pending: PendingCourse): FormData {
+  const formData = new FormData();
+  formData.append("course_title", pending.courseTitle);
+  formData.append("level", pending.level);
+  formData.append("units", String(pending.units));
+  formData.append("document_id", pending.documentId);
+  formData.append("owner", ownerId());
+  return formData;
+}
+
 async function fetchJson<T>(path: string, options?: RequestInit): Promise<T> {
   const res = await fetch(`${API_BASE}${path}`, options);
   if (!res.ok) {
@@ -60,9 +166,161 @@ export async function submitProfile(score: number, durationSeconds: number) {
   });
 }
 
-export async function createCourse(formData: FormData) {
+export async function getCourse(courseId: string, fields?: string[]) {
+  const query = fields?.length ? `?fields=${encodeURIComponent(fields.join(","))}` : "";
+  return fetchJson<StoredCourse>(`/courses/${encodeURIComponent(courseId)}${query}`);
+}
+
+type CourseQuery = {
+  owner: string;
+  documentId?: string;
+  level?: string;
+  limit?: number;
+  offset?: number;
+};
+
+export async function listCourses(params: CourseQuery) {
+  const query = new URLSearchParams({ owner: params.owner });
+  if (params.documentId) query.set("document_id", params.documentId);
+  if (params.level) query.set("level", params.level);
+  if (params.limit) query.set("limit", String(params.limit));
+  if (params.offset) query.set("offset", String(params.offset));
+  return fetchJson<CoursePage>(`/courses?${query.toString()}`);
+}
+
+// Extract a PDF once on the server; courses are then requested by the returned document_id.
+export async function uploadDocument(file: File) {
+  const formData = new FormData();
+  formData.append("file", file);
+  return fetchJson<DocumentSummary>("/documents", { method: "POST", body: formData });
+}
+
+export async function createCourseBlocking(formData: FormData) {
   return fetchJson<CourseResponse>("/course", {
     method: "POST",
     body: formData,
   });
 }
+
+export async function createCourseJob(formData: FormData) {
+  return fetchJson<CourseJob>("/jobs/course", {
+    method: "POST",
+    body: formData,
+  });
+}
+
+export async function getCourseJob(jobId: string) {
+  return fetchJson<CourseJob>(`/jobs/${jobId}`);
+}
+
+function jobResult(job: CourseJob): CourseResponse {
+  if (job.status === "failed" || !job.result) {
+    throw new Error(job.error || "Course generation failed. Please try again.");
+  }
+  return job.result;
+}
+
+async function pollCourseJob(jobId: string, onProgress?: (job: CourseJob) => void) {
+  for (;;) {
+    const job = await getCourseJob(jobId);
+    onProgress?.(job);
+    if (job.status === "succeeded" || job.status === "failed") return jobResult(job);
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+}
+
+// Follow a job over Server-Sent Events, falling back to polling if the stream is unavailable.
+export function waitForCourseJob(
+  jobId: string,
+  onProgress?: (job: CourseJob) => void
+): Promise<CourseResponse> {
+  if (typeof EventSource === "undefined") return pollCourseJob(jobId, onProgress);
+
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${API_BASE}/jobs/${jobId}/events`);
+    let settled = false;
+    const finish = (data: string) => {
+      settled = true;
+      source.close();
+      try {
+        const job = JSON.parse(data) as CourseJob;
+        onProgress?.(job);
+        resolve(jobResult(job));
+      } catch (err) {
+        reject(err);
+      }
+    };
+
+    source.addEventListener("progress", (event) => {
+      onProgress?.(JSON.parse((event as MessageEvent).data) as CourseJob);
+    });
+    source.addEventListener("done", (event) => finish((event as MessageEvent).data));
+    source.addEventListener("error", (event) => {
+      const data = (event as MessageEvent).data;
+      if (typeof data === "string" && data) {
+        finish(data);
+        return;
+      }
+      // Connection-level error: stop the stream and keep following the job by polling.
+      if (settled) return;
+      settled = true;
+      source.close();
+      pollCourseJob(jobId, onProgress).then(resolve, reject);
+    });
+  });
+}
+
+export async function createCourse(
+  formData: FormData,
+  onProgress?: (job: CourseJob) => void
+): Promise<CourseResponse> {
+  const job = await createCourseJob(formData);
+  onProgress?.(job);
+  return waitForCourseJob(job.id, onProgress);
+}
+
+export type CourseStreamEvent =
+  | { type: "field"; name: string; value: unknown }
+  | { type: "unit"; index: number; unit: any }
+  | { type: "done"; course: any; course_id?: string; course_pdf_url?: string }
+  | { type: "error"; detail: string };
+
+// Read the NDJSON /course/stream response, handing each unit to the caller as soon as it closes.
+// Where the response body cannot be read as a stream, the course is generated as a background
+// job instead and only `onProgress` is called.
+export async function streamCourse(
+  formData: FormData,
+  onEvent: (event: CourseStreamEvent) => void,
+  onProgress?: (job: CourseJob) => void
+): Promise<CourseResponse> {
+  const res = await fetch(`${API_BASE}/course/stream`, { method: "POST", body: formData });
+  if (!res.ok) {
+    const detail = await res.text();
+    throw new Error(detail || res.statusText);
+  }
+  if (!res.body) return createCourse(formData, onProgress);
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffered += decoder.decode(value, { stream: !done });
+    const lines = buffered.split("\n");
+    buffered = done ? "" : lines.pop() || "";
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      const event = JSON.parse(line) as CourseStreamEvent;
+      onEvent(event);
+      if (event.type === "error") throw new Error(event.detail);
+      if (event.type === "done") {
+        return {
+          course: event.course,
+          course_id: event.course_id,
+          course_pdf_url: event.course_pdf_url,
+        };
+      }
+    }
+    if (done) throw new Error("Course stream ended before the course was complete.");
+  }
+}
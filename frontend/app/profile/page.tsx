@@ -3,7 +3,7 @@
 import { useEffect, useRef, useState } from "react";
 import { useRouter } from "next/navigation";
 import { GradientButton, GlassCard, TopBar } from "../components/ui";
-import { createCourse, ProfileResponse } from "../lib/api";
+import { ProfileResponse, savePendingCourse, uploadDocument } from "../lib/api";
 
 type Theme = "dark" | "light";
 type StoredProfile = { profile: ProfileResponse; score: number; durationSeconds: number };
@@ -92,23 +92,24 @@ export default function ProfilePage() {
     const effectiveProfile: ProfileResponse =
       profile || { level: "Intermediate", units: 7, desc: "Balanced", efficiency: 0 };
     try {
-      const formData = new FormData();
-      formData.append("course_title", courseTitleSafe);
-      formData.append("level", effectiveProfile.level);
-      formData.append("units", String(effectiveProfile.units));
-      formData.append("include_pdf", "true");
-      formData.append("file", selectedFile);
-
-      const response = await createCourse(formData);
+      // Only the extraction happens here; the results page streams the generation so the
+      // first unit shows up while the others are still being written.
+      const uploaded = await uploadDocument(selectedFile);
       if (typeof window !== "undefined") {
-        localStorage.setItem("personalLearnCourse", JSON.stringify(response.course));
-        if (response.course_pdf_base64) {
-          localStorage.setItem("personalLearnCoursePdf", response.course_pdf_base64);
-        }
+        localStorage.removeItem("personalLearnCourse");
+        localStorage.removeItem("personalLearnCoursePdf");
+        localStorage.removeItem("personalLearnCoursePdfUrl");
+        localStorage.removeItem("personalLearnCourseId");
+        savePendingCourse({
+          courseTitle: courseTitleSafe,
+          level: effectiveProfile.level,
+          units: effectiveProfile.units,
+          documentId: uploaded.document_id,
+        });
       }
       router.push("/results");
     } catch (err: any) {
-      setUploadError(err.message || "Failed to generate course. Please try again.");
+      setUploadError(err.message || "Failed to upload the PDF. Please try again.");
     } finally {
       setIsSubmitting(false);
     }
@@ -197,7 +198,7 @@ export default function ProfilePage() {
                 onChange={(event) => setCourseTitle(event.target.value)}
               />
               <GradientButton onClick={handleGenerate} disabled={isSubmitting}>
-                {isSubmitting ? "Generating..." : "Generate Adapted Course"}
+                {isSubmitting ? "Reading PDF..." : "Generate Adapted Course"}
               </GradientButton>
             </div>
           </div>
@@ -3,6 +3,17 @@
 import { useEffect, useState } from "react";
 import { useRouter } from "next/navigation";
 import { GradientButton, GlassCard, TopBar } from "../components/ui";
+import {
+  backendUrl,
+  clearPendingCourse,
+  getCourse,
+  listCourses,
+  loadPendingCourse,
+  ownerId,
+  pendingCourseForm,
+  StoredCourse,
+  streamCourse,
+} from "../lib/api";
 import { courseUnits } from "../lib/content";
 
 type CourseUnit = {
@@ -22,10 +33,20 @@ type CoursePayload = {
 
 type Theme = "dark" | "light";
 
+// Shown only when the browser cannot read the stream and the course runs as a background job.
+const STAGE_LABELS: Record<string, string> = {
+  extract: "Reading PDF...",
+  generate: "Generating...",
+  render: "Building PDF...",
+};
+
 export default function ResultsPage() {
   const [theme, setTheme] = useState<Theme>("dark");
   const [course, setCourse] = useState<CoursePayload | null>(null);
-  const [coursePdfBase64, setCoursePdfBase64] = useState<string | null>(null);
+  const [coursePdfUrl, setCoursePdfUrl] = useState<string | null>(null);
+  const [expectedUnits, setExpectedUnits] = useState<number | null>(null);
+  const [jobStage, setJobStage] = useState<string | null>(null);
+  const [error, setError] = useState<string | null>(null);
   const router = useRouter();
 
   useEffect(() => {
@@ -34,53 +55,106 @@ export default function ResultsPage() {
 
   useEffect(() => {
     if (typeof window === "undefined") return;
-    const savedCourse = localStorage.getItem("personalLearnCourse");
-    const savedPdf = localStorage.getItem("personalLearnCoursePdf");
-    if (savedPdf) setCoursePdfBase64(savedPdf);
-    if (savedCourse) {
-      try {
-        setCourse(JSON.parse(savedCourse));
-        return;
-      } catch {
-        // fall back to defaults below
-      }
+    const showDefaultCourse = () =>
+      setCourse({
+        title: "Introduction to Cognitive Science",
+        description:
+          "A foundational course adapted for intermediate learners, focusing on attention, memory, and decision-making.",
+        units: courseUnits.map((unit) => ({
+          title: unit.title,
+          description: unit.description,
+          objectives: [unit.objective],
+          objective: unit.objective,
+        })),
+      });
+
+    let cancelled = false;
+    const pending = loadPendingCourse();
+    if (pending) {
+      // A course the profile page asked for: render it while it streams, the header fields
+      // first and then every unit as soon as it is complete.
+      let header: Omit<CoursePayload, "units"> = { title: pending.courseTitle };
+      const units: CourseUnit[] = [];
+      const showPartial = () => setCourse({ ...header, units: units.filter(Boolean) });
+      setExpectedUnits(pending.units);
+      showPartial();
+      streamCourse(
+        pendingCourseForm(pending),
+        (event) => {
+          if (cancelled) return;
+          if (event.type === "field") header = { ...header, [event.name]: event.value };
+          else if (event.type === "unit") units[event.index] = event.unit;
+          else return;
+          showPartial();
+        },
+        (job) => {
+          if (!cancelled) setJobStage(job.stage);
+        }
+      )
+        .then((response) => {
+          clearPendingCourse();
+          if (response.course_id) {
+            localStorage.setItem("personalLearnCourseId", response.course_id);
+          }
+          if (cancelled) return;
+          setCourse(response.course);
+          if (response.course_pdf_url) setCoursePdfUrl(backendUrl(response.course_pdf_url));
+        })
+        .catch((err: any) => {
+          clearPendingCourse();
+          if (!cancelled) setError(err.message || "Failed to generate course. Please try again.");
+        })
+        .finally(() => {
+          if (!cancelled) setExpectedUnits(null);
+        });
+      return () => {
+        cancelled = true;
+      };
     }
-    setCourse({
-      title: "Introduction to Cognitive Science",
-      description:
-        "A foundational course adapted for intermediate learners, focusing on attention, memory, and decision-making.",
-      units: courseUnits.map((unit) => ({
-        title: unit.title,
-        description: unit.description,
-        objectives: [unit.objective],
-        objective: unit.objective,
-      })),
-    });
+
+    // The course lives on the server: load it by id, or this browser's latest one after the
+    // id was cleared (another tab, a reset), so a reload never needs a new generation.
+    const savedId = localStorage.getItem("personalLearnCourseId");
+    const load: Promise<StoredCourse | null> = savedId
+      ? getCourse(savedId, ["id", "course", "course_pdf_url"])
+      : listCourses({ owner: ownerId(), limit: 1 }).then((page) =>
+          page.items.length ? getCourse(page.items[0].id, ["id", "course", "course_pdf_url"]) : null
+        );
+    load
+      .then((stored) => {
+        if (cancelled) return;
+        if (!stored?.course) {
+          showDefaultCourse();
+          return;
+        }
+        setCourse(stored.course);
+        if (stored.course_pdf_url) setCoursePdfUrl(backendUrl(stored.course_pdf_url));
+      })
+      .catch(() => {
+        if (!cancelled) showDefaultCourse();
+      });
+    return () => {
+      cancelled = true;
+    };
   }, []);
 
   const toggleTheme = () => setTheme((prev) => (prev === "dark" ? "light" : "dark"));
 
   const handleDownload = () => {
-    if (!coursePdfBase64 || !course) return;
-    const byteChars = atob(coursePdfBase64);
-    const byteNumbers = new Array(byteChars.length);
-    for (let i = 0; i < byteChars.length; i += 1) {
-      byteNumbers[i] = byteChars.charCodeAt(i);
-    }
-    const blob = new Blob([new Uint8Array(byteNumbers)], { type: "application/pdf" });
-    const url = URL.createObjectURL(blob);
+    if (!coursePdfUrl || !course) return;
+    // The backend sends the stored PDF as an attachment, so the browser downloads it directly
+    // (and can revalidate with its ETag instead of fetching it again).
     const anchor = document.createElement("a");
-    anchor.href = url;
+    anchor.href = coursePdfUrl;
     anchor.download = `${(course.title || "course").replace(/\s+/g, "_")}.pdf`;
     anchor.click();
-    URL.revokeObjectURL(url);
   };
 
   const handleReset = () => {
     if (typeof window !== "undefined") {
       localStorage.removeItem("personalLearnProfile");
-      localStorage.removeItem("personalLearnCourse");
-      localStorage.removeItem("personalLearnCoursePdf");
+      localStorage.removeItem("personalLearnCourseId");
+      clearPendingCourse();
     }
     router.push("/");
   };
@@ -112,9 +186,20 @@ export default function ResultsPage() {
           <p className="eyebrow">Step 4 - Course Blueprint</p>
           <h2>{course.title}</h2>
           <p className="muted">{course.description}</p>
+          {expectedUnits !== null && (
+            <p className="muted small">
+              {(jobStage && STAGE_LABELS[jobStage]) ||
+                `Writing units... ${course.units.length} of ${expectedUnits} ready`}
+            </p>
+          )}
+          {error && (
+            <p className="upload-error small" role="alert">
+              {error}
+            </p>
+          )}
           <div className="cta-row">
-            <GradientButton onClick={handleDownload} disabled={!coursePdfBase64}>
-              {coursePdfBase64 ? "Download Full PDF Course" : "PDF will appear after generation"}
+            <GradientButton onClick={handleDownload} disabled={!coursePdfUrl}>
+              {coursePdfUrl ? "Download Full PDF Course" : "PDF will appear after generation"}
             </GradientButton>
             <GradientButton ghost onClick={handleReset}>
               Start New Session
@@ -123,8 +208,8 @@ export default function ResultsPage() {
         </GlassCard>
 
         <div className="unit-list">
-          {course.units.map((unit) => (
-            <GlassCard key={unit.title} className="unit-card">
+          {course.units.map((unit, index) => (
+            <GlassCard key={`${index}-${unit.title}`} className="unit-card">
               <div className="icon">{unit.icon || "📘"}</div>
               <div>
                 <p className="card-title">{unit.title}</p>
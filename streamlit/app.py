@@ -1,11 +1,13 @@
-import io
+import hashlib
 import time
 
 import streamlit as st
 
+from config import BACKEND_URL
 from data import QUESTIONS
-from services.course_generator import generate_course_from_pdf
-from services.pdf_io import export_course_pdf, read_pdf
+from services.backend_client import course_pdf_remote, generate_course_remote
+from services.course_generator import generate_course_cached
+from services.pdf_io import course_digest, course_pdf_bytes, read_pdf_cached
 from ui.styles import GLOBAL_STYLES
 
 
@@ -14,6 +16,8 @@ def init_state():
         st.session_state["step"] = 0
     if "courses" not in st.session_state:
         st.session_state["courses"] = []
+    if "course_key" not in st.session_state:
+        st.session_state["course_key"] = None
     if "quiz_index" not in st.session_state:
         st.session_state["quiz_index"] = 0
     if "quiz_score" not in st.session_state:
@@ -152,11 +156,20 @@ def render_profile_and_upload(container):
 
         if uploaded_file and st.button("Generate Adapted Course", use_container_width=True):
             with st.spinner("Re-engineering content structure..."):
-                pdf_text = read_pdf(io.BytesIO(uploaded_file.read()))
-                course = generate_course_from_pdf(
-                    pdf_text, course_title, profile["level"], profile["units"]
-                )
+                pdf_bytes = uploaded_file.getvalue()
+                pdf_hash = hashlib.sha256(pdf_bytes).hexdigest()
+                course_key = (pdf_hash, course_title, profile["level"], profile["units"])
+                if BACKEND_URL:
+                    # Thin client: the backend's course id is the key of its stored PDF.
+                    course, course_key = generate_course_remote(*course_key, pdf_bytes)
+                else:
+                    pdf_text = read_pdf_cached(pdf_hash, pdf_bytes)
+                    course = generate_course_cached(*course_key, pdf_text)
+                    # The PDF is keyed on the course itself, which the generation cache may
+                    # have replaced since the upload key was first seen.
+                    course_key = course_digest(course)
                 st.session_state["courses"] = [course]
+                st.session_state["course_key"] = course_key
                 st.session_state["step"] = 3
                 st.rerun()
 
@@ -176,16 +189,18 @@ def render_results(container):
         )
 
         fname = f"{course['title'].replace(' ', '_')}.pdf"
-        export_course_pdf(course, fname)
-
-        with open(fname, "rb") as f:
-            st.download_button(
-                "Download Full PDF Course",
-                f,
-                file_name=fname,
-                mime="application/pdf",
-                use_container_width=True,
-            )
+        course_key = st.session_state["course_key"]
+        if BACKEND_URL:
+            pdf_bytes = course_pdf_remote(course_key)
+        else:
+            pdf_bytes = course_pdf_bytes(course_key, course)
+        st.download_button(
+            "Download Full PDF Course",
+            pdf_bytes,
+            file_name=fname,
+            mime="application/pdf",
+            use_container_width=True,
+        )
 
         if st.button("Start New Session", use_container_width=True):
             st.session_state["step"] = 0
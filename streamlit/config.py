@@ -5,7 +5,26 @@ import google.generativeai as genai
 # Central place for Gemini settings so other modules can import without reconfiguring.
 MODEL_NAME = "gemini-2.5-flash"
 
+# Streamlit reruns the script on every interaction; extracted text, generated courses and
+# rendered PDFs are memoized per PDF hash, level and unit count within these limits.
+CACHE_TTL_SECONDS = int(os.getenv("STREAMLIT_CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("STREAMLIT_CACHE_MAX_ENTRIES", "32"))
+
+# Thin-client mode: with PERSONALLEARN_BACKEND_URL set (e.g. http://localhost:8000) the app
+# sends extraction, generation and rendering to the FastAPI backend instead of calling Gemini
+# itself, so both front ends share one course cache, one rate limit and one set of metrics.
+BACKEND_URL = os.getenv("PERSONALLEARN_BACKEND_URL", "").strip().rstrip("/")
+BACKEND_TIMEOUT_SECONDS = float(os.getenv("PERSONALLEARN_BACKEND_TIMEOUT_SECONDS", "300"))
+BACKEND_MAX_CONNECTIONS = int(os.getenv("PERSONALLEARN_BACKEND_MAX_CONNECTIONS", "20"))
+
+
+_genai_configured = False
+
 
 def configure_genai():
-    """Configure the Gemini SDK with the API key from environment."""
+    """Configure the Gemini SDK with the API key from environment (once per process)."""
+    global _genai_configured
+    if _genai_configured:
+        return
     genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    _genai_configured = True
@@ -0,0 +1,59 @@
+import httpx
+import streamlit as st
+
+from config import (
+    BACKEND_MAX_CONNECTIONS,
+    BACKEND_TIMEOUT_SECONDS,
+    BACKEND_URL,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL_SECONDS,
+)
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_client():
+    """One keep-alive connection pool to the backend, shared by every session and rerun."""
+    return httpx.Client(
+        base_url=BACKEND_URL,
+        timeout=httpx.Timeout(BACKEND_TIMEOUT_SECONDS, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=BACKEND_MAX_CONNECTIONS,
+            max_keepalive_connections=BACKEND_MAX_CONNECTIONS,
+        ),
+    )
+
+
+def _raise_for_status(response):
+    """Surface the backend's `detail` message instead of a bare status line."""
+    if response.is_success:
+        return
+    try:
+        detail = response.json().get("detail")
+    except ValueError:
+        detail = None
+    raise RuntimeError(f"Backend error {response.status_code}: {detail or response.text[:200]}")
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def generate_course_remote(pdf_hash, course_title, level, n_units, _pdf_bytes):
+    """Have the backend extract and generate; returns (course, course_id).
+
+    The backend caches by extracted text as well, so a second Streamlit process or a web
+    client asking for the same course is served without another Gemini call.
+    """
+    response = get_http_client().post(
+        "/course",
+        data={"course_title": course_title, "level": level, "units": str(n_units)},
+        files={"file": (f"{pdf_hash}.pdf", _pdf_bytes, "application/pdf")},
+    )
+    _raise_for_status(response)
+    payload = response.json()
+    return payload["course"], payload["course_id"]
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def course_pdf_remote(course_id) -> bytes:
+    """Download a course PDF the backend rendered (and keeps in its artifact store)."""
+    response = get_http_client().get(f"/course/{course_id}/pdf")
+    _raise_for_status(response)
+    return response.content
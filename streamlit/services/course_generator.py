@@ -1,8 +1,9 @@
 import json
 
 import google.generativeai as genai
+import streamlit as st
 
-from config import MODEL_NAME, configure_genai
+from config import CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, MODEL_NAME, configure_genai
 
 
 def clean_json_string(text):
@@ -16,8 +17,14 @@ def clean_json_string(text):
     return text
 
 
-def generate_course_from_pdf(pdf_text, course_title, level, n_units):
+@st.cache_resource(show_spinner=False)
+def get_model():
+    """Reuse one configured model handle for every session and generation in this process."""
     configure_genai()
+    return genai.GenerativeModel(MODEL_NAME)
+
+
+def generate_course_from_pdf(pdf_text, course_title, level, n_units):
     system_prompt = """
 You are PersonalLearn, an adaptive AI. Detect the language. Output ONLY valid JSON.
 JSON structure:
@@ -53,7 +60,16 @@ Units: {n_units}
 Content:
 {pdf_text[:25000]}
 """
-    response = genai.GenerativeModel(MODEL_NAME).generate_content(
+    response = get_model().generate_content(
         [{"role": "user", "parts": [system_prompt + "\n" + user_prompt]}]
     )
     return json.loads(clean_json_string(response.text))
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def generate_course_cached(pdf_hash, course_title, level, n_units, _pdf_text):
+    """Generate once per (PDF hash, title, level, units); reruns and other sessions reuse it.
+
+    The text itself is not hashed (leading underscore): pdf_hash already identifies it.
+    """
+    return generate_course_from_pdf(_pdf_text, course_title, level, n_units)
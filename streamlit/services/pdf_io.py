@@ -1,28 +1,32 @@
+import hashlib
+import io
+import json
+
 import PyPDF2
+import streamlit as st
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import cm
 from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
 
+from config import CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS
+
 
 def read_pdf(file) -> str:
     reader = PyPDF2.PdfReader(file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text
+    return "".join(page.extract_text() or "" for page in reader.pages)
 
 
-def export_course_pdf(course, filename):
-    doc = SimpleDocTemplate(
-        filename,
-        pagesize=A4,
-        rightMargin=2 * cm,
-        leftMargin=2 * cm,
-        topMargin=2 * cm,
-        bottomMargin=2 * cm,
-    )
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def read_pdf_cached(pdf_hash, _pdf_bytes) -> str:
+    """Extract a PDF once per content hash; the bytes themselves are not hashed again."""
+    return read_pdf(io.BytesIO(_pdf_bytes))
+
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_styles():
+    """Build the ReportLab paragraph styles once per process; they are only read afterwards."""
     styles = getSampleStyleSheet()
 
     title_style = ParagraphStyle(
@@ -56,16 +60,40 @@ def export_course_pdf(course, filename):
         leftIndent=20,
         spaceAfter=5,
     )
+    return {
+        "title": title_style,
+        "h1": h1_style,
+        "h2": styles["Heading2"],
+        "h3": styles["Heading3"],
+        "body": body_style,
+        "obj": obj_style,
+        "italic": styles["Italic"],
+    }
+
+
+def export_course_pdf(course, output):
+    """Render a course to `output`, a filename or a writable binary file object."""
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        rightMargin=2 * cm,
+        leftMargin=2 * cm,
+        topMargin=2 * cm,
+        bottomMargin=2 * cm,
+    )
+    styles = get_pdf_styles()
+    title_style, h1_style = styles["title"], styles["h1"]
+    body_style, obj_style = styles["body"], styles["obj"]
 
     flow = []
     flow.append(Paragraph(course["title"], title_style))
-    flow.append(Paragraph(f"Adaptive Level: {course['level']}", styles["Heading2"]))
+    flow.append(Paragraph(f"Adaptive Level: {course['level']}", styles["h2"]))
     flow.append(Paragraph(course["description"], body_style))
     flow.append(PageBreak())
 
     for i, u in enumerate(course["units"], start=1):
         flow.append(Paragraph(f"Unit {i}: {u['title']}", h1_style))
-        flow.append(Paragraph("Objectives:", styles["Heading3"]))
+        flow.append(Paragraph("Objectives:", styles["h3"]))
         for o in u["objectives"]:
             flow.append(Paragraph(f"�?� {o}", obj_style))
 
@@ -76,11 +104,25 @@ def export_course_pdf(course, filename):
                 flow.append(Paragraph(line, body_style))
 
         flow.append(Spacer(1, 0.5 * cm))
-        flow.append(Paragraph("Review Quiz", styles["Heading3"]))
+        flow.append(Paragraph("Review Quiz", styles["h3"]))
         for q in u["quiz_questions"]:
-            flow.append(Paragraph(f"Q: {q['question']}", styles["Italic"]))
+            flow.append(Paragraph(f"Q: {q['question']}", styles["italic"]))
             flow.append(Spacer(1, 0.1 * cm))
 
         flow.append(PageBreak())
 
     doc.build(flow)
+
+
+def course_digest(course) -> str:
+    """SHA-256 of the course JSON, so a regenerated course never reuses an older course's PDF."""
+    payload = json.dumps(course, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def course_pdf_bytes(course_hash, _course) -> bytes:
+    """Render a course in memory once per course digest; reruns and sessions never touch disk."""
+    buffer = io.BytesIO()
+    export_course_pdf(_course, buffer)
+    return buffer.getvalue()